@@ -0,0 +1,103 @@
+# ai/auth_cache.py
+# HasValidAPIKey용 API 키 -> SensorDevice(+ company) 캐시
+#
+# - 키는 sha256 해시로만 보관
+# - 없는 키도 짧은 시간(negative_ttl) 동안 캐시해서, 잘못된 키로 재시도가 몰려도 DB를 두드리지 않음
+# - SensorDevice/Company가 추가/수정/삭제되면 signals.py에서 버전을 올리므로,
+#   모든 워커 프로세스가 AI_CACHE_VERSION_CHECK_INTERVAL 안에 캐시를 비움 (비활성화/키 재발급/삭제 반영)
+#   ※ QuerySet.update()처럼 시그널이 발생하지 않는 변경은 ttl이 지나야 반영됨
+# - 적중/미스 수와 캐시된 키 수는 GET /api/ai/metrics/ 로 내보냄 (ai/metrics.py)
+
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+
+from .cache_versions import get_version
+from .metrics import registry
+from .models import SensorDevice
+
+API_KEY_VERSION_KEY = "sensor_devices"
+
+DEFAULT_TTL = 5 * 60
+DEFAULT_NEGATIVE_TTL = 30
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class APIKeyCache:
+    def __init__(self, ttl: float = DEFAULT_TTL, negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        # sha256(api_key) -> (device 또는 None, 만료 시각)
+        self._entries = {}
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def get_device(self, api_key: str):
+        """활성화된 SensorDevice(company 포함)를 반환, 없으면 None"""
+        key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+        version = get_version(API_KEY_VERSION_KEY)
+        now = time.monotonic()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(key_hash)
+            if entry is not None and entry[1] > now:
+                if entry[0] is None:
+                    self.negative_hits += 1
+                else:
+                    self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        device = (
+            SensorDevice.objects.select_related("company")
+            .filter(api_key=api_key, is_active=True)
+            .first()
+        )
+        expires_at = now + (self.ttl if device is not None else self.negative_ttl)
+        with self._lock:
+            if version == self._version:
+                if len(self._entries) >= self.max_entries:
+                    # 가장 먼저 넣은 항목부터 비움
+                    self._entries.pop(next(iter(self._entries)))
+                self._entries[key_hash] = (device, expires_at)
+        return device
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+            }
+
+
+api_key_cache = APIKeyCache(
+    ttl=getattr(settings, "AI_API_KEY_CACHE_TTL", DEFAULT_TTL),
+    negative_ttl=getattr(settings, "AI_API_KEY_NEGATIVE_TTL", DEFAULT_NEGATIVE_TTL),
+    max_entries=getattr(settings, "AI_API_KEY_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES),
+)
+
+# GET /api/ai/metrics/ 로 내보내는 API 키 캐시 지표 (ai/metrics.py). 캐시 잠금을 잡는 stats()로 읽음
+registry.callback("glife_api_key_cache_hits_total", "counter", "API 키 캐시 적중 수", lambda: api_key_cache.stats()["hits"])
+registry.callback(
+    "glife_api_key_cache_negative_hits_total", "counter", "없는 키로 캐시된 API 키 적중 수",
+    lambda: api_key_cache.stats()["negative_hits"],
+)
+registry.callback(
+    "glife_api_key_cache_misses_total", "counter", "API 키 캐시 미스 수 (DB 조회)", lambda: api_key_cache.stats()["misses"]
+)
+registry.callback("glife_api_key_cache_entries", "gauge", "캐시된 API 키 수", lambda: api_key_cache.stats()["entries"])
@@ -0,0 +1,56 @@
+# ai/cache_versions.py
+# 워커 프로세스마다 따로 가진 메모리 캐시를 모든 프로세스에서 함께 무효화하기 위한 버전 카운터
+#
+# - bump_version(key): 캐시 대상 데이터가 바뀔 때 호출 (signals.py). 데이터 변경과 같은 트랜잭션에서 버전이 올라감
+# - get_version(key): 현재 버전을 반환. 요청마다 DB를 읽지 않도록, 프로세스마다 이 프로세스가 물어본 키의 버전만
+#   AI_CACHE_VERSION_CHECK_INTERVAL(기본 1초)에 한 번만 한 번의 쿼리로 읽어옴 (처음 묻는 키는 바로 읽음)
+#   -> 다른 프로세스에서 바뀐 내용은 최대 이 시간만큼 늦게 반영됨
+#   (회사별 직원 캐시 키가 회사 수만큼 쌓이므로, 테이블 전체를 읽지 않음)
+
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import CacheVersion
+
+DEFAULT_CHECK_INTERVAL = 1.0
+
+_lock = threading.Lock()
+_versions = {}
+# 이 프로세스에서 get_version으로 물어본 키
+_keys = set()
+_checked_at = None
+
+
+def _check_interval() -> float:
+    return getattr(settings, "AI_CACHE_VERSION_CHECK_INTERVAL", DEFAULT_CHECK_INTERVAL)
+
+
+def get_version(key: str) -> int:
+    global _versions, _checked_at
+    now = time.monotonic()
+    if key not in _keys or _checked_at is None or now - _checked_at >= _check_interval():
+        with _lock:
+            if key not in _keys or _checked_at is None or now - _checked_at >= _check_interval():
+                _keys.add(key)
+                _versions = dict(CacheVersion.objects.filter(key__in=_keys).values_list("key", "version"))
+                _checked_at = now
+    return _versions.get(key, 0)
+
+
+def bump_version(key: str):
+    """key의 버전을 올림 (이 프로세스는 다음 get_version에서 바로 다시 읽음)"""
+    global _checked_at
+    with transaction.atomic():
+        updated = CacheVersion.objects.filter(key=key).update(version=F("version") + 1)
+        if not updated:
+            try:
+                with transaction.atomic():
+                    CacheVersion.objects.create(key=key, version=1)
+            except IntegrityError:
+                # 다른 프로세스가 먼저 만든 경우
+                CacheVersion.objects.filter(key=key).update(version=F("version") + 1)
+    _checked_at = None
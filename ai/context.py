@@ -0,0 +1,99 @@
+# ai/context.py
+# 평가 요청에 필요한 (사원번호 -> 직원 id), (동작 이름 -> 동작 정보)를 프로세스 메모리에 캐시
+#
+# POST /api/ai/evaluate/ 는 인증 후 Employee 조회, MotionType 조회를 차례로 수행했는데,
+# 이 값들은 거의 바뀌지 않으므로 회사별 사원번호 맵과 동작 맵을 한 번만 읽어서 재사용함
+# - 직원/동작이 추가/수정/삭제되면 signals.py에서 버전(ai/cache_versions.py)을 올리고,
+#   각 워커는 다음 버전 확인 때 맵을 다시 읽음
+# - 맵에 없는 값은 DB에서 한 번 더 확인 (버전이 반영되기 전에 새로 등록된 직원/동작도 바로 평가 가능)
+
+import threading
+from collections import namedtuple
+
+from organizations.models import Employee
+
+from .cache_versions import bump_version, get_version
+from .models import MotionType
+
+MOTION_TYPES_VERSION_KEY = "motion_types"
+
+# 평가에 필요한 MotionType 필드만 담은 읽기 전용 값
+MotionInfo = namedtuple(
+    "MotionInfo",
+    ["id", "motion_name", "max_dtw_distance", "reference_version", "evaluation_mode", "nearest_k", "dtw_engine"],
+)
+
+
+def employees_version_key(company_id) -> str:
+    return f"employees:{company_id}"
+
+
+def bump_employees_version(company_id):
+    bump_version(employees_version_key(company_id))
+
+
+def bump_motion_types_version():
+    bump_version(MOTION_TYPES_VERSION_KEY)
+
+
+def _motion_info_queryset():
+    return MotionType.objects.values_list(*MotionInfo._fields)
+
+
+class EvaluationContextResolver:
+    def __init__(self):
+        # company_id -> (버전, {emp_no: employee_id})
+        self._employees = {}
+        # (버전, {motion_name: MotionInfo})
+        self._motions = (None, {})
+        self._lock = threading.Lock()
+
+    def _employee_map(self, company_id) -> dict:
+        version = get_version(employees_version_key(company_id))
+        cached = self._employees.get(company_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        mapping = dict(Employee.objects.filter(company_id=company_id).values_list("emp_no", "id"))
+        with self._lock:
+            self._employees[company_id] = (version, mapping)
+        return mapping
+
+    def _motion_map(self) -> dict:
+        version = get_version(MOTION_TYPES_VERSION_KEY)
+        cached_version, mapping = self._motions
+        if cached_version == version:
+            return mapping
+        mapping = {row[1]: MotionInfo(*row) for row in _motion_info_queryset()}
+        with self._lock:
+            self._motions = (version, mapping)
+        return mapping
+
+    def employee_id(self, company_id, emp_no: str):
+        """회사의 사원번호에 해당하는 직원 id, 없으면 None"""
+        mapping = self._employee_map(company_id)
+        employee_id = mapping.get(emp_no)
+        if employee_id is None:
+            employee_id = (
+                Employee.objects.filter(company_id=company_id, emp_no=emp_no).values_list("id", flat=True).first()
+            )
+            if employee_id is not None:
+                mapping[emp_no] = employee_id
+        return employee_id
+
+    def motion(self, motion_name: str):
+        """동작 이름에 해당하는 MotionInfo, 없으면 None"""
+        mapping = self._motion_map()
+        info = mapping.get(motion_name)
+        if info is None:
+            row = _motion_info_queryset().filter(motion_name=motion_name).first()
+            if row is not None:
+                info = mapping[motion_name] = MotionInfo(*row)
+        return info
+
+    def clear(self):
+        with self._lock:
+            self._employees.clear()
+            self._motions = (None, {})
+
+
+context_resolver = EvaluationContextResolver()
@@ -0,0 +1,106 @@
+# ai/dba.py
+# 모범 동작 여러 개를 적은 수의 대표 동작(템플릿)으로 줄이는 함수들
+# 1. 모범 동작끼리의 DTW 거리 행렬로 k-medoids 군집화
+# 2. 군집마다 medoid(군집 중심에 있는 실제 녹화)에서 시작해서 DBA(DTW Barycenter Averaging)로 평균 동작을 만듦
+#    -> DTW로 맞춘 프레임끼리 평균을 내므로, 단순 평균과 달리 속도가 다른 녹화를 섞어도 동작 모양이 뭉개지지 않음
+#
+# DB/Django에 의존하지 않는 순수 함수 (ai/motion_templates.py와 벤치마크가 함께 사용)
+# 템플릿은 요청 처리 중이 아니라 작업 큐에서 만드므로, 모범 동작 수의 제곱만큼 필요한 DTW 계산은 C 구현을 사용
+# (dtaidistance의 dtw_barycenter C 구현은 길이가 다른 녹화 + 윈도우 조합에서 메모리를 깨뜨리므로,
+#  DBA 반복은 C warping_path로 직접 계산함)
+
+import numpy as np
+from dtaidistance import dtw_ndim
+
+from .dtw_engine import DTW_WINDOW
+
+DBA_MAX_ITERATIONS = 10
+# 한 번 반복했을 때 평균 동작의 변화가 이 값보다 작으면 멈춤 (전처리된 값은 0~1 범위)
+DBA_TOLERANCE = 1e-4
+KMEDOIDS_MAX_ITERATIONS = 50
+
+
+def distance_matrix(series: list) -> np.ndarray:
+    """모범 동작끼리의 DTW 거리 행렬 (평가와 같은 윈도우 사용)"""
+    series = [np.ascontiguousarray(data, dtype=np.float64) for data in series]
+    return dtw_ndim.distance_matrix(series, window=DTW_WINDOW, use_c=True)
+
+
+def kmedoids(distances: np.ndarray, k: int, max_iterations: int = KMEDOIDS_MAX_ITERATIONS) -> tuple:
+    """
+    거리 행렬로 k-medoids 군집화 (초기값은 PAM의 BUILD 방식이라 실행할 때마다 결과가 같음)
+    (medoid 인덱스 리스트, 각 원소가 속한 군집 번호 배열)을 반환
+    """
+    count = distances.shape[0]
+    k = min(k, count)
+    # BUILD: 전체 거리 합이 가장 작은 원소부터, 비용을 가장 많이 줄이는 원소를 하나씩 medoid로 추가
+    medoids = [int(np.argmin(distances.sum(axis=1)))]
+    nearest = distances[medoids[0]].copy()
+    while len(medoids) < k:
+        gains = np.maximum(nearest[None, :] - distances, 0).sum(axis=1)
+        gains[medoids] = -1
+        candidate = int(np.argmax(gains))
+        medoids.append(candidate)
+        nearest = np.minimum(nearest, distances[candidate])
+
+    labels = np.argmin(distances[medoids], axis=0)
+    for _ in range(max_iterations):
+        # 군집마다 군집 안의 거리 합이 가장 작은 원소를 새 medoid로
+        new_medoids = []
+        for cluster in range(k):
+            members = np.flatnonzero(labels == cluster)
+            if members.size == 0:
+                new_medoids.append(medoids[cluster])
+                continue
+            within = distances[np.ix_(members, members)].sum(axis=1)
+            new_medoids.append(int(members[np.argmin(within)]))
+        new_labels = np.argmin(distances[new_medoids], axis=0)
+        if new_medoids == medoids and np.array_equal(new_labels, labels):
+            break
+        medoids, labels = new_medoids, new_labels
+    return medoids, labels
+
+
+def barycenter(series: list, initial: np.ndarray, max_iterations: int = DBA_MAX_ITERATIONS,
+               tolerance: float = DBA_TOLERANCE) -> np.ndarray:
+    """
+    initial에서 시작한 DBA 평균 동작 (길이는 initial과 같음)
+    반복마다 각 녹화를 현재 평균에 DTW로 맞추고, 평균의 프레임마다 맞춰진 녹화 프레임들의 평균으로 바꿈
+    """
+    average = np.array(initial, dtype=np.float64)
+    if len(series) == 1:
+        return np.array(series[0], dtype=np.float64)
+    series = [np.ascontiguousarray(data, dtype=np.float64) for data in series]
+    for _ in range(max_iterations):
+        sums = np.zeros_like(average)
+        counts = np.zeros(average.shape[0])
+        for data in series:
+            path = np.asarray(dtw_ndim.warping_path(average, data, window=DTW_WINDOW, use_c=True))
+            np.add.at(sums, path[:, 0], data[path[:, 1]])
+            np.add.at(counts, path[:, 0], 1)
+        updated = sums / counts[:, None]
+        change = float(np.abs(updated - average).max())
+        average = updated
+        if change < tolerance:
+            break
+    return average
+
+
+def build_templates(references: list, k: int) -> list:
+    """
+    모범 동작들을 k개 템플릿으로 줄임
+    [(템플릿 배열, 이 템플릿에 묶인 모범 동작 인덱스 리스트), ...]를 반환
+    모범 동작이 k개 이하이면 각 모범 동작을 그대로 템플릿으로 사용
+    """
+    if len(references) <= k:
+        return [(np.array(data, dtype=np.float64), [index]) for index, data in enumerate(references)]
+
+    medoids, labels = kmedoids(distance_matrix(references), k)
+    templates = []
+    for cluster, medoid in enumerate(medoids):
+        members = [int(index) for index in np.flatnonzero(labels == cluster)]
+        if not members:
+            continue
+        template = barycenter([references[index] for index in members], references[medoid])
+        templates.append((template, members))
+    return templates
@@ -0,0 +1,207 @@
+# ai/dtw_engine.py
+# DTW 거리 계산과 관련된 공용 함수 모음
+# - 평가기(MotionEvaluator)와 max_dtw_distance 재계산이 같은 DTW 설정을 쓰도록 한 곳에 모아둠
+# - LB_Keogh 하한(lower bound)으로 결과에 영향을 줄 수 없는 DTW 계산을 미리 걸러냄
+# - 긴 녹화용 coarse_to_fine 방식: PAA로 줄인 녹화끼리 먼저 정렬하고, 그 경로 주변 통로(corridor)만 원래 해상도로 계산
+
+import numpy as np
+from dtaidistance import dtw_ndim
+
+# Sakoe-Chiba 윈도우 크기 (dtaidistance 기준: |i - j| < window 인 셀만 계산)
+DTW_WINDOW = 10
+
+# DTW 계산 방식 (MotionType.dtw_engine)
+# exact: 윈도우 안의 모든 셀을 계산
+# coarse_to_fine: PAA_FACTOR 프레임씩 평균 낸 녹화끼리 정렬한 뒤, 그 경로에서 CORRIDOR_RADIUS 프레임 안쪽만 계산
+#   -> 두 녹화의 길이가 달라서 윈도우가 넓어져도(길이 차이만큼 넓어짐) 계산량이 길이에 비례함
+#   -> 통로 밖을 지나는 경로는 보지 않으므로 결과는 exact 이상 (같거나 조금 큼, 잡음이 있는 녹화에서 보통 2% 이내)
+#   -> 그래서 max_dtw_distance 보정(ai/logic.py)도 반드시 평가와 같은 방식으로 계산해야 함
+#      (exact로 보정한 기준으로 coarse_to_fine 거리를 채점하면 점수가 조금씩 낮아짐)
+DTW_ENGINES = ("exact", "coarse_to_fine")
+PAA_FACTOR = 4
+CORRIDOR_RADIUS = 8
+# 이보다 짧은 녹화는 줄여도 이득이 없으므로 exact로 계산
+COARSE_MIN_FRAMES = 100
+
+
+def dtw_distance(s1: np.ndarray, s2: np.ndarray, max_dist: float = None, engine: str = "exact") -> float:
+    """
+    두 (프레임 수 × 채널 수) 배열의 다차원 DTW 거리
+    max_dist가 주어지면 그 값을 넘는 순간 계산을 멈추고 inf를 반환함
+    """
+    if engine == "coarse_to_fine":
+        return coarse_to_fine_distance(s1, s2, max_dist=max_dist)
+    if engine != "exact":
+        raise ValueError(f"지원하지 않는 DTW 계산 방식입니다: {engine}")
+    return dtw_ndim.distance(s1, s2, window=DTW_WINDOW, max_dist=max_dist)
+
+
+def window_bounds(rows: int, columns: int, window: int = DTW_WINDOW) -> tuple:
+    """
+    dtaidistance와 같은 Sakoe-Chiba 윈도우에서 행(s1 프레임)마다 계산하는 열(s2 프레임) 범위 (lo, hi, 양 끝 포함)
+    길이가 다르면 길이 차이만큼 윈도우를 한쪽으로 넓힘
+    """
+    i = np.arange(rows)
+    lo = np.maximum(0, i - max(0, rows - columns) - window + 1)
+    hi = np.minimum(columns, i + max(0, columns - rows) + window) - 1
+    return lo, hi
+
+
+def corridor_dtw(s1: np.ndarray, s2: np.ndarray, lo: np.ndarray, hi: np.ndarray,
+                 max_dist: float = None, keep_rows: bool = False):
+    """
+    행 i에서 열 lo[i]..hi[i]만 지나는 경로 중 가장 짧은 DTW 거리 (dtaidistance와 같은 제곱 유클리드 비용, 마지막에 sqrt)
+    keep_rows=True이면 (거리, 행별 누적 비용 리스트)를 반환 (경로 역추적용)
+
+    한 행의 누적 비용 D[j] = min(M[j], c[j] + D[j - 1]) (M: 위/대각선에서 오는 값, c: 셀 비용)은
+    S = cumsum(c)로 D = S + minimum.accumulate(M - S)가 되므로, 행 단위로 numpy 연산만 사용함
+    """
+    s1 = np.asarray(s1, dtype=np.float64)
+    s2 = np.asarray(s2, dtype=np.float64)
+    limit = np.inf if max_dist is None else max_dist * max_dist
+    rows = []
+    previous, previous_lo = None, 0
+    for i in range(s1.shape[0]):
+        start, end = int(lo[i]), int(hi[i])
+        diff = s2[start:end + 1] - s1[i]
+        cost = np.einsum("ij,ij->i", diff, diff)
+        if previous is None:
+            best = np.full(cost.shape[0], np.inf)
+            if start == 0:
+                best[0] = 0.0
+        else:
+            # extended[x] = 이전 행의 (start - 1 + x)열 값 -> 대각선은 extended[:-1], 위는 extended[1:]
+            extended = np.full(cost.shape[0] + 1, np.inf)
+            first = max(start - 1, previous_lo)
+            last = min(end, previous_lo + previous.shape[0] - 1)
+            if first <= last:
+                extended[first - start + 1:last - start + 2] = previous[first - previous_lo:last - previous_lo + 1]
+            best = np.minimum(extended[:-1], extended[1:])
+        cumulative = np.cumsum(cost)
+        current = cumulative + np.minimum.accumulate(best + cost - cumulative)
+        if current.min() > limit:
+            return (np.inf, rows) if keep_rows else np.inf
+        if keep_rows:
+            rows.append((start, current))
+        previous, previous_lo = current, start
+
+    if previous is None or previous_lo + previous.shape[0] != s2.shape[0]:
+        return (np.inf, rows) if keep_rows else np.inf
+    distance = previous[-1]
+    distance = np.inf if distance > limit else float(np.sqrt(distance))
+    return (distance, rows) if keep_rows else distance
+
+
+def _backtrack(rows: list) -> np.ndarray:
+    """corridor_dtw(keep_rows=True)의 행별 누적 비용으로 (0, 0)부터 끝까지의 최적 경로를 (행, 열) 배열로 반환"""
+
+    def value(i, j):
+        start, current = rows[i]
+        return current[j - start] if start <= j < start + current.shape[0] else np.inf
+
+    i = len(rows) - 1
+    j = rows[i][0] + rows[i][1].shape[0] - 1
+    path = [(i, j)]
+    while i > 0 or j > 0:
+        candidates = [(value(i - 1, j - 1), i - 1, j - 1), (value(i - 1, j), i - 1, j), (value(i, j - 1), i, j - 1)]
+        _, i, j = min(candidate for candidate in candidates if candidate[1] >= 0 and candidate[2] >= 0)
+        path.append((i, j))
+    return np.array(path[::-1])
+
+
+def paa(data: np.ndarray, factor: int = PAA_FACTOR) -> np.ndarray:
+    """PAA(Piecewise Aggregate Approximation): factor 프레임씩 평균 낸 배열 (마지막 구간은 남은 프레임만 평균)"""
+    starts = np.arange(0, data.shape[0], factor)
+    counts = np.diff(np.append(starts, data.shape[0]))
+    return np.add.reduceat(np.asarray(data, dtype=np.float64), starts, axis=0) / counts[:, None]
+
+
+def coarse_corridor(path: np.ndarray, rows: int, columns: int, factor: int = PAA_FACTOR,
+                    radius: int = CORRIDOR_RADIUS, window: int = DTW_WINDOW):
+    """
+    저해상도 경로를 원래 해상도로 옮기고 radius만큼 넓힌 통로 (lo, hi)
+    원래 윈도우 밖은 제외하고, 그 결과 (0, 0)에서 끝까지 이어지지 않으면 None
+    """
+    coarse_rows = int(path[:, 0].max()) + 1
+    coarse_lo = np.full(coarse_rows, np.iinfo(np.int64).max)
+    coarse_hi = np.full(coarse_rows, -1)
+    np.minimum.at(coarse_lo, path[:, 0], path[:, 1])
+    np.maximum.at(coarse_hi, path[:, 0], path[:, 1])
+
+    fine_rows = np.arange(rows) // factor
+    lo = np.maximum(coarse_lo[fine_rows] * factor - radius, 0)
+    hi = np.minimum((coarse_hi[fine_rows] + 1) * factor - 1 + radius, columns - 1)
+    window_lo, window_hi = window_bounds(rows, columns, window)
+    lo, hi = np.maximum(lo, window_lo), np.minimum(hi, window_hi)
+    if (lo > hi).any() or lo[0] != 0 or hi[-1] != columns - 1 or (lo[1:] > hi[:-1] + 1).any():
+        return None
+    return lo, hi
+
+
+def coarse_to_fine_distance(s1: np.ndarray, s2: np.ndarray, max_dist: float = None,
+                            factor: int = PAA_FACTOR, radius: int = CORRIDOR_RADIUS) -> float:
+    """coarse_to_fine 방식의 DTW 거리 (짧은 녹화나 통로를 만들 수 없는 경우는 exact로 계산)"""
+    rows, columns = s1.shape[0], s2.shape[0]
+    if min(rows, columns) < COARSE_MIN_FRAMES:
+        return dtw_distance(s1, s2, max_dist=max_dist)
+
+    coarse1, coarse2 = paa(s1, factor), paa(s2, factor)
+    # 원래 윈도우(|i - j| < DTW_WINDOW)를 덮도록 저해상도 윈도우를 잡음
+    coarse_window = -(-DTW_WINDOW // factor) + 1
+    _, coarse_rows = corridor_dtw(
+        coarse1, coarse2, *window_bounds(coarse1.shape[0], coarse2.shape[0], coarse_window), keep_rows=True
+    )
+    corridor = coarse_corridor(_backtrack(coarse_rows), rows, columns, factor, radius)
+    if corridor is None:
+        return dtw_distance(s1, s2, max_dist=max_dist)
+    return corridor_dtw(s1, s2, *corridor, max_dist=max_dist)
+
+
+def _sliding_extreme(data: np.ndarray, before: int, after: int, length: int, reduce) -> np.ndarray:
+    """
+    out[i] = reduce(data[i - before : i + after + 1]) (범위는 data 안으로 잘라냄), i = 0 .. length-1
+    윈도우를 두 배씩 넓혀가는 방식이라 O(n log(window))로 모든 채널을 한 번에 계산함
+    """
+    size = before + after + 1
+    # 범위 밖은 가장자리 값으로 채움 -> 최대/최소값에는 영향이 없음
+    tail = max(0, length + after - data.shape[0])
+    padded = np.pad(data, ((before, tail), (0, 0)), mode="edge")[:length + size - 1]
+
+    result = padded
+    span = 1
+    while span * 2 <= size:
+        result = reduce(result[:-span], result[span:])
+        span *= 2
+    if span < size:
+        # 남은 길이는 두 구간을 겹쳐서 처리
+        result = reduce(result[:len(result) - (size - span)], result[size - span:])
+    return result[:length]
+
+
+def envelope(data: np.ndarray, window: int = DTW_WINDOW) -> tuple:
+    """
+    참조 데이터의 (lower, upper) 엔벨로프
+    j번째 프레임이 DTW에서 매칭될 수 있는 범위 [j - window + 1, j + window - 1]의 채널별 최소/최대값
+    """
+    reach = window - 1
+    lower = _sliding_extreme(data, reach, reach, data.shape[0], np.minimum)
+    upper = _sliding_extreme(data, reach, reach, data.shape[0], np.maximum)
+    return lower, upper
+
+
+def lb_keogh(query: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> float:
+    """
+    query와 (lower, upper) 엔벨로프를 가진 참조 데이터 사이 DTW 거리의 하한(LB_Keogh)
+
+    dtaidistance는 길이가 다르면 길이 차이만큼 윈도우를 한쪽으로 넓히므로,
+    엔벨로프도 같은 만큼 넓혀서 query의 각 프레임이 매칭될 수 있는 모든 범위를 덮도록 함
+    """
+    query_len, ref_len = query.shape[0], lower.shape[0]
+    before = max(0, query_len - ref_len)
+    after = max(0, ref_len - query_len)
+    if query_len != ref_len:
+        lower = _sliding_extreme(lower, before, after, query_len, np.minimum)
+        upper = _sliding_extreme(upper, before, after, query_len, np.maximum)
+
+    excess = np.maximum(query - upper, 0.0) + np.maximum(lower - query, 0.0)
+    return float(np.sqrt(np.sum(excess * excess)))
@@ -0,0 +1,359 @@
+# ai/eval_service.py
+# 평가 전용 서비스 모드 (python manage.py run_eval_service)
+#
+# 웹 워커마다 평가기(모범 동작 배열)를 따로 들고 요청 스레드에서 DTW를 돌리는 대신,
+#   - 서비스 본체가 동작별 모범 동작 + 엔벨로프를 multiprocessing.shared_memory 한 곳에 올려두고
+#   - CPU 코어 수만큼의 평가 프로세스가 그 메모리를 복사 없이 붙여서(attach) 점수를 계산함
+#   - 평가 프로세스는 노드(기본 4개씩)로 묶이고, 동작 이름은 일관된 해싱(consistent hashing)으로 노드에 배정되므로,
+#     같은 동작은 항상 같은 노드로 가고, 노드 수가 바뀌어도 일부 동작만 옮겨감
+#   - 노드 안의 프로세스들은 같은 공유 메모리를 붙여서 한 동작의 요청을 나눠 처리함 (인기 동작도 여러 코어 사용)
+# 웹 워커는 AI_EVAL_SERVICE_ADDRESS(유닉스 소켓)로 작업을 보내고 결과를 받음
+# 서비스에 연결할 수 없으면 run_evaluation이 기존처럼 현재 프로세스에서 평가함
+#
+# 평가 프로세스는 Django 없이 ai/scoring.py의 순수 함수만 실행 (DB 조회는 서비스 본체가 담당)
+
+import bisect
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+from django.conf import settings
+
+from .scoring import score_sensor_array
+
+DEFAULT_TIMEOUT = 30.0
+# 노드 하나의 평가 프로세스 수
+DEFAULT_NODE_PROCESSES = 4
+# 해시 링에서 노드 하나가 차지하는 가상 노드 수 (많을수록 동작이 고르게 나뉨)
+RING_REPLICAS = 64
+# 공유 메모리 안에서 배열 시작 위치 정렬 단위
+_ALIGN = 64
+
+
+class EvalServiceUnavailable(Exception):
+    """평가 서비스에 연결할 수 없거나 응답이 없을 때 발생"""
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """동작 이름 -> 노드 번호 (consistent hashing)"""
+
+    def __init__(self, nodes, replicas: int = RING_REPLICAS):
+        points = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas))
+        self._keys = [point[0] for point in points]
+        self._nodes = [point[1] for point in points]
+
+    def node_for(self, key: str):
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._nodes[index]
+
+
+# --- 공유 메모리 배치 ---
+
+def pack_references(references: list, envelopes: list) -> tuple:
+    """
+    모범 동작 배열들과 (lower, upper) 엔벨로프들을 공유 메모리 한 덩어리에 복사
+    (SharedMemory, layout)을 반환. layout만 있으면 다른 프로세스에서 같은 배열을 복원할 수 있음
+    """
+    arrays = list(references) + [array for pair in envelopes for array in pair]
+    dtype = np.result_type(*arrays) if arrays else np.dtype(np.float32)
+    slots = []
+    size = 0
+    for array in arrays:
+        slots.append((size, array.shape))
+        size += -(-array.size * dtype.itemsize // _ALIGN) * _ALIGN
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for (offset, shape), array in zip(slots, arrays):
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)[...] = array
+    return shm, {"dtype": dtype.str, "slots": slots, "references": len(references)}
+
+
+def unpack_references(buffer, layout: dict) -> tuple:
+    """pack_references의 layout으로 공유 메모리 위의 (모범 동작들, 엔벨로프들)을 복사 없이 복원"""
+    dtype = np.dtype(layout["dtype"])
+    arrays = []
+    for offset, shape in layout["slots"]:
+        array = np.ndarray(tuple(shape), dtype=dtype, buffer=buffer, offset=offset)
+        array.flags.writeable = False
+        arrays.append(array)
+    count = layout["references"]
+    references = arrays[:count]
+    envelopes = list(zip(arrays[count::2], arrays[count + 1::2]))
+    return references, envelopes
+
+
+# --- 평가 프로세스 쪽 ---
+
+# motion_name -> (공유 메모리 이름, SharedMemory, 모범 동작들, 엔벨로프들)
+_attached = {}
+
+
+def _attach(motion_name: str, shm_name: str, layout: dict) -> tuple:
+    cached = _attached.get(motion_name)
+    if cached is not None and cached[0] == shm_name:
+        return cached[2], cached[3]
+
+    # 3.12 이하는 붙일 때도 resource_tracker에 등록하지만, spawn으로 만든 평가 프로세스는 서비스 본체와 같은
+    # tracker를 쓰고 이미 본체가 등록한 이름이라 변화가 없음. 정리(unlink)는 만든 쪽인 본체만 하고,
+    # 여기서는 close만 하므로 등록이 해제되지도 않음
+    shm = shared_memory.SharedMemory(name=shm_name)
+    references, envelopes = unpack_references(shm.buf, layout)
+    _attached[motion_name] = (shm_name, shm, references, envelopes)
+
+    if cached is not None:
+        # 모범 동작이 바뀌어 새 공유 메모리를 받은 경우, 이전 것은 떼어냄
+        old_shm = cached[1]
+        del cached
+        try:
+            old_shm.close()
+        except BufferError:
+            pass
+    return references, envelopes
+
+
+def score_shared_job(motion_name, shm_name, layout, sensor_array, channels, max_dtw_distance, mode, k,
+                     engine="exact") -> dict:
+    """평가 프로세스에서 실행: 공유 메모리의 모범 동작과 비교해서 점수 계산"""
+    try:
+        references, envelopes = _attach(motion_name, shm_name, layout)
+    except FileNotFoundError:
+        return {"error": f"'{motion_name}' 모범 동작 공유 메모리를 찾을 수 없습니다."}
+    return score_sensor_array(
+        sensor_array, channels, references, envelopes, max_dtw_distance, mode=mode, k=k, engine=engine
+    )
+
+
+# --- 서비스 본체 ---
+
+def service_address():
+    return getattr(settings, "AI_EVAL_SERVICE_ADDRESS", None)
+
+
+def service_authkey() -> bytes:
+    authkey = getattr(settings, "AI_EVAL_SERVICE_AUTHKEY", None)
+    if authkey:
+        return authkey.encode("utf-8")
+    return hashlib.sha256(f"eval-service:{settings.SECRET_KEY}".encode("utf-8")).digest()
+
+
+class EvaluationService:
+    def __init__(self, workers: int, address: str, timeout: float = DEFAULT_TIMEOUT,
+                 node_processes: int = DEFAULT_NODE_PROCESSES):
+        self.address = address
+        self.timeout = timeout
+        self._context = multiprocessing.get_context("spawn")
+        # 평가 프로세스 workers개를 node_processes개씩 노드로 나눔 (예: 10개, 4개씩 -> 4 + 3 + 3)
+        nodes = -(-workers // max(1, min(node_processes, workers)))
+        self._node_sizes = [workers // nodes + (node < workers % nodes) for node in range(nodes)]
+        self._executors = [self._new_executor(node) for node in range(nodes)]
+        self._ring = HashRing(range(nodes))
+        # motion_name -> (reference_version, SharedMemory, layout)
+        self._segments = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+        self._listener = None
+        self._closed = False
+        self.jobs = [0] * nodes
+        self.errors = 0
+
+    def _new_executor(self, node: int):
+        return ProcessPoolExecutor(max_workers=self._node_sizes[node], mp_context=self._context)
+
+    def _shared_references(self, motion_name: str, version) -> tuple:
+        """동작의 공유 메모리 (이름, layout)을 반환. 버전이 바뀌었으면 DB에서 다시 읽어서 새로 만듦"""
+        with self._lock:
+            segment = self._segments.get(motion_name)
+            if segment is not None and segment[0] == version:
+                return segment[1].name, segment[2]
+            loading_lock = self._loading.setdefault(motion_name, threading.Lock())
+
+        with loading_lock:
+            with self._lock:
+                segment = self._segments.get(motion_name)
+            if segment is not None and segment[0] == version:
+                return segment[1].name, segment[2]
+
+            from django.db import close_old_connections
+            from .safty_training_ai import MotionEvaluator
+
+            close_old_connections()
+            evaluator = MotionEvaluator(motion_name, version)
+            shm, layout = pack_references(evaluator.reference_motion_preprocessed, evaluator.reference_envelopes)
+            with self._lock:
+                old = self._segments.get(motion_name)
+                self._segments[motion_name] = (version, shm, layout)
+                self._loading.pop(motion_name, None)
+            if old is not None:
+                # 이미 붙여둔 평가 프로세스는 계속 쓸 수 있고, 모두 떼어내면 메모리가 반환됨
+                old[1].close()
+                old[1].unlink()
+            return shm.name, layout
+
+    def evaluate(self, request: dict) -> dict:
+        motion_name = request["motion_name"]
+        try:
+            shm_name, layout = self._shared_references(motion_name, request["reference_version"])
+        except Exception as e:
+            self.errors += 1
+            print(f"[Error] Evaluation failed for {motion_name}: {e}")
+            return {"error": f"평가 중 오류 발생: {str(e)}"}
+
+        node = self._ring.node_for(motion_name)
+        job = (
+            motion_name, shm_name, layout, request["sensor_array"], request["channels"],
+            request["max_dtw_distance"], request["mode"], request["k"], request.get("engine", "exact"),
+        )
+        for attempt in range(2):
+            executor = self._executors[node]
+            try:
+                result = executor.submit(score_shared_job, *job).result(timeout=self.timeout)
+                break
+            except TimeoutError:
+                self.errors += 1
+                return {"error": f"평가가 {self.timeout}초 안에 끝나지 않았습니다."}
+            except BrokenProcessPool:
+                # 평가 프로세스가 죽은 경우 새로 띄우고 한 번 더 시도
+                with self._lock:
+                    if self._executors[node] is executor:
+                        self._executors[node] = self._new_executor(node)
+                print(f"[Error] 노드 #{node}의 평가 프로세스가 중단되어 다시 시작합니다.")
+        else:
+            self.errors += 1
+            return {"error": "평가 프로세스가 응답하지 않습니다."}
+
+        self.jobs[node] += 1
+        if "error" in result:
+            self.errors += 1
+            return result
+        return {"evaluator_motion_name": motion_name, **result}
+
+    def stats(self) -> dict:
+        with self._lock:
+            shared_bytes = sum(segment[1].size for segment in self._segments.values())
+            motions = len(self._segments)
+        return {
+            "workers": sum(self._node_sizes),
+            "nodes": list(self._node_sizes),
+            "jobs": list(self.jobs),
+            "errors": self.errors,
+            "motions": motions,
+            "shared_bytes": shared_bytes,
+            "pids": [os.getpid()] + [pid for executor in self._executors for pid in (executor._processes or {})],
+        }
+
+    def _handle(self, conn):
+        with conn:
+            while not self._closed:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                op = request.get("op", "evaluate")
+                if op == "evaluate":
+                    response = self.evaluate(request)
+                elif op == "stats":
+                    response = self.stats()
+                else:
+                    response = {"error": f"알 수 없는 요청입니다: {op}"}
+                try:
+                    conn.send(response)
+                except (EOFError, OSError):
+                    return
+
+    def serve_forever(self):
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        self._listener = connection.Listener(self.address, family="AF_UNIX", authkey=service_authkey())
+        print(f"평가 서비스 시작: {self.address} (평가 프로세스 {sum(self._node_sizes)}개, 노드 {len(self._node_sizes)}개)")
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError) as e:
+                if self._closed:
+                    break
+                # 인증 실패 등 연결 하나의 문제는 무시하고 계속 받음
+                print(f"[Error] 평가 서비스 연결 실패: {e}")
+                continue
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def close(self):
+        self._closed = True
+        if self._listener is not None:
+            self._listener.close()
+        for executor in self._executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            for _, shm, _ in self._segments.values():
+                shm.close()
+                shm.unlink()
+            self._segments.clear()
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+# --- 웹 워커 쪽 (클라이언트) ---
+
+_local = threading.local()
+
+
+def _drop_connection():
+    conn = getattr(_local, "conn", None)
+    _local.conn = None
+    if conn is not None:
+        try:
+            conn.close()
+        except OSError:
+            pass
+
+
+def _request(message: dict, timeout: float):
+    address = service_address()
+    if not address:
+        raise EvalServiceUnavailable("AI_EVAL_SERVICE_ADDRESS가 설정되어 있지 않습니다.")
+    last_error = None
+    # 끊어진 연결을 재사용하다 실패한 경우를 위해 한 번 다시 연결해서 시도
+    for attempt in range(2):
+        try:
+            conn = getattr(_local, "conn", None)
+            if conn is None:
+                conn = _local.conn = connection.Client(address, family="AF_UNIX", authkey=service_authkey())
+            conn.send(message)
+            if not conn.poll(timeout):
+                _drop_connection()
+                raise EvalServiceUnavailable(f"평가 서비스가 {timeout}초 안에 응답하지 않았습니다.")
+            return conn.recv()
+        except (OSError, EOFError, connection.AuthenticationError) as e:
+            _drop_connection()
+            last_error = e
+    raise EvalServiceUnavailable(f"평가 서비스에 연결할 수 없습니다: {last_error}")
+
+
+def evaluate_remote(motion_info, sensor_array, channels) -> dict:
+    """평가 서비스에 점수 계산을 요청 (motion_info는 ai/context.py의 MotionInfo)"""
+    timeout = getattr(settings, "AI_EVAL_SERVICE_TIMEOUT", DEFAULT_TIMEOUT)
+    return _request(
+        {
+            "op": "evaluate",
+            "motion_name": motion_info.motion_name,
+            "reference_version": motion_info.reference_version,
+            "max_dtw_distance": motion_info.max_dtw_distance,
+            "mode": motion_info.evaluation_mode,
+            "k": motion_info.nearest_k,
+            "engine": motion_info.dtw_engine,
+            "sensor_array": sensor_array,
+            "channels": tuple(channels),
+        },
+        timeout,
+    )
+
+
+def service_stats(timeout: float = 5.0) -> dict:
+    return _request({"op": "stats"}, timeout)
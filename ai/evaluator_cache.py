@@ -1,36 +1,212 @@
 # ai/evaluator_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import F
+
+from .context import bump_motion_types_version
+from .jobs import enqueue_template_build
+from .metrics import registry
+from .models import MotionType
 from .safty_training_ai import MotionEvaluator
 
-# 동작 이름(motion_name)을 키로, MotionEvaluator 객체를 값으로 저장하는 캐시
-evaluator_cache = {}
+# 캐시 전체가 사용할 수 있는 최대 메모리 (모범 동작 배열 + 엔벨로프 기준, 기본 256MB)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# 버전이 바뀌지 않아도 이 시간(초)이 지나면 평가기를 다시 만듦 (None이면 만료 없음)
+DEFAULT_TTL = 60 * 60
+
+
+class EvaluatorCache:
+    """
+    동작 이름(motion_name)을 키로 MotionEvaluator 객체를 저장하는 캐시
+
+    - LRU: 메모리 예산(max_bytes)을 넘으면 가장 오래 쓰지 않은 평가기부터 삭제
+    - 버전: MotionType.reference_version과 캐시된 평가기의 버전이 다르면 다시 생성
+      (모범 동작이 바뀌면 DB의 버전이 올라가므로, 모든 워커 프로세스가 다음 조회 때 알아챔)
+    - single-flight: 같은 동작을 동시에 요청해도 평가기 생성(DB 조회)은 한 번만 수행
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = DEFAULT_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # motion_name -> (evaluator, version, 생성 시각, 크기)
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        # 생성 중인 동작별 잠금 (single-flight)
+        self._loading = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, motion_name: str, version):
+        # self._lock을 잡은 상태에서 호출해야 함
+        entry = self._entries.get(motion_name)
+        if entry is None:
+            return None
+        evaluator, cached_version, created_at, _ = entry
+        expired = self.ttl is not None and time.monotonic() - created_at > self.ttl
+        if cached_version != version or expired:
+            self._remove(motion_name)
+            return None
+        self._entries.move_to_end(motion_name)
+        return evaluator
+
+    def _remove(self, motion_name: str):
+        entry = self._entries.pop(motion_name, None)
+        if entry is not None:
+            self._size -= entry[3]
+
+    def _store(self, motion_name: str, evaluator: MotionEvaluator, version):
+        self._remove(motion_name)
+        nbytes = evaluator.nbytes
+        self._entries[motion_name] = (evaluator, version, time.monotonic(), nbytes)
+        self._size += nbytes
+        # 방금 넣은 평가기 하나는 예산을 넘더라도 남겨둠
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def get(self, motion_name: str, version) -> MotionEvaluator:
+        with self._lock:
+            evaluator = self._lookup(motion_name, version)
+            if evaluator is not None:
+                self.hits += 1
+                return evaluator
+            self.misses += 1
+            loading_lock = self._loading.setdefault(motion_name, threading.Lock())
+
+        with loading_lock:
+            # 다른 스레드가 먼저 만들어 두었으면 그대로 사용
+            with self._lock:
+                evaluator = self._lookup(motion_name, version)
+            if evaluator is not None:
+                return evaluator
+
+            evaluator = MotionEvaluator(motion_name, version)  # 이때 DB 조회(또는 스냅샷 파일 열기) 발생
+            with self._lock:
+                self._store(motion_name, evaluator, version)
+                self._loading.pop(motion_name, None)
+            return evaluator
+
+    def discard(self, motion_name: str = None):
+        with self._lock:
+            if motion_name:
+                self._remove(motion_name)
+            else:
+                self._entries.clear()
+                self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+evaluator_cache = EvaluatorCache(
+    max_bytes=getattr(settings, "AI_EVALUATOR_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES),
+    ttl=getattr(settings, "AI_EVALUATOR_CACHE_TTL", DEFAULT_TTL),
+)
+
+# GET /api/ai/metrics/ 로 내보내는 캐시 지표 (ai/metrics.py). 캐시 잠금을 잡는 stats()로 읽음
+registry.callback(
+    "glife_evaluator_cache_hits_total", "counter", "평가기 캐시 적중 수", lambda: evaluator_cache.stats()["hits"]
+)
+registry.callback(
+    "glife_evaluator_cache_misses_total", "counter", "평가기 캐시 미스 수", lambda: evaluator_cache.stats()["misses"]
+)
+registry.callback(
+    "glife_evaluator_cache_evictions_total", "counter", "메모리 예산 초과로 삭제된 평가기 수",
+    lambda: evaluator_cache.stats()["evictions"],
+)
+registry.callback("glife_evaluator_cache_entries", "gauge", "캐시된 평가기 수", lambda: evaluator_cache.stats()["entries"])
+registry.callback(
+    "glife_evaluator_cache_bytes", "gauge", "캐시된 평가기의 메모리(바이트)", lambda: evaluator_cache.stats()["bytes"]
+)
+
+
+def get_reference_version(motion_name: str):
+    return MotionType.objects.filter(motion_name=motion_name).values_list("reference_version", flat=True).first()
+
 
 # 타입힌트 문법: motion_name 인자는 문자열(str)이고, 반환 값은 MotionEvaluator 객체임을 명시!
-def get_evaluator(motion_name: str) -> MotionEvaluator:
+def get_evaluator(motion_name: str, version: int = None) -> MotionEvaluator:
     """
     캐시에서 평가기(Evaluator)를 가져오거나, 없으면 새로 생성하여 캐시에 저장 후 반환하는 함수.
+    version(MotionType.reference_version)을 넘겨주지 않으면 DB에서 조회함
     """
-    # 1. 캐시에 해당 동작의 평가기가 있는지 확인
-    if motion_name in evaluator_cache:
-        # print(f"'{motion_name}' 평가기를 캐시에서 로드합니다.") # 디버깅용
-        return evaluator_cache[motion_name]
+    if version is None:
+        version = get_reference_version(motion_name)
+    return evaluator_cache.get(motion_name, version)
+
+
+def bump_reference_version(motion_type_id: int):
+    """
+    모범 동작 데이터가 바뀌었음을 DB에 기록해서, 모든 워커의 캐시가 다음 조회 때 평가기를 다시 만들도록 함
+    templates 방식인 동작이면 템플릿을 다시 만드는 작업도 등록함 (만들어지기 전까지는 모든 모범 동작으로 평가)
+    """
+    MotionType.objects.filter(pk=motion_type_id).update(reference_version=F("reference_version") + 1)
+    bump_motion_types_version()
+    enqueue_template_build(motion_type_id)
 
-    # 2. 캐시에 없으면, 새로 생성 (이때 DB 조회 발생)
-    evaluator = MotionEvaluator(motion_name)
-    evaluator_cache[motion_name] = evaluator  # 캐시에 저장
-    return evaluator
 
 # 인자 값 필수X(= None)
 def clear_evaluator_cache(motion_name: str = None):
     """
     특정 동작 또는 전체 평가기 캐시를 비움
-    모범/0점 동작 데이터가 변경되었을 때 호출해야 함
+    모범 동작 데이터가 변경되면 signals.py에서 버전을 올리므로, 보통은 직접 호출할 필요 없음
+    motion_name을 주면 DB 버전도 올려서 다른 워커 프로세스의 캐시까지 무효화함
     """
-    global evaluator_cache
-
     if motion_name:
-        if motion_name in evaluator_cache:
-            del evaluator_cache[motion_name]
-            print(f"'{motion_name}' 평가기 캐시가 삭제되었습니다.")
+        motion_type_id = MotionType.objects.filter(motion_name=motion_name).values_list("pk", flat=True).first()
+        if motion_type_id is not None:
+            bump_reference_version(motion_type_id)
+        evaluator_cache.discard(motion_name)
+        print(f"'{motion_name}' 평가기 캐시가 삭제되었습니다.")
     else:
-        evaluator_cache = {}
+        evaluator_cache.discard()
         print("전체 평가기 캐시가 삭제되었습니다.")
+
+
+def warm_evaluator_cache() -> int:
+    """
+    모든 MotionType의 평가기를 미리 만들어 캐시에 올림 (워커가 요청을 받기 전에 호출)
+    AI_WARMUP_EVALUATORS 설정이 켜져 있으면 back/wsgi.py, back/asgi.py에서 자동으로 호출됨
+    """
+    from django.db import DatabaseError, connections
+    from .preprocessing import SAVGOL_MAX_WINDOW, savgol_projection
+
+    started = time.perf_counter()
+    # 전처리에 쓰는 Savitzky–Golay 계수도 미리 계산
+    for window_length in range(5, SAVGOL_MAX_WINDOW + 1, 2):
+        savgol_projection(window_length)
+
+    try:
+        motions = list(MotionType.objects.values_list("motion_name", "reference_version"))
+    except DatabaseError as e:
+        # 마이그레이션 전이거나 DB에 연결할 수 없는 경우 (manage.py 명령 등): 평가기는 첫 요청 때 만들어짐
+        connections.close_all()
+        print(f"[Error] DB를 사용할 수 없어 평가기를 미리 준비하지 않습니다: {e}")
+        return 0
+
+    warmed = 0
+    for motion_name, version in motions:
+        try:
+            evaluator_cache.get(motion_name, version)
+            warmed += 1
+        except Exception as e:
+            print(f"[Error] '{motion_name}' 평가기 준비 실패: {e}")
+
+    # gunicorn --preload처럼 이 프로세스가 fork될 수 있으므로, 열어둔 DB 연결은 닫아둠
+    connections.close_all()
+    print(f"평가기 {warmed}개를 미리 준비했습니다. ({(time.perf_counter() - started) * 1000:.0f}ms)")
+    return warmed
@@ -0,0 +1,212 @@
+# ai/jobs.py
+# DB 테이블(Job)을 큐로 사용하는 백그라운드 작업 처리
+# - enqueue_job: 요청 처리 중에 작업을 등록 (같은 dedup_key의 대기 작업이 있으면 합침)
+#   대기 작업의 pending_key 유일 인덱스로 동시에 등록해도 하나만 생기게 함 (먼저 만든 쪽이 이기고 나머지는 그 작업을 반환)
+# - claim_next_job / run_job: manage.py run_ai_worker가 작업을 하나씩 가져가서 실행
+#   실행하는 동안 별도 스레드가 JOB_HEARTBEAT마다 heartbeat_at을 갱신하므로, 오래 걸리는 작업도 다른 워커가 다시 가져가지 않음
+
+import threading
+import traceback
+from datetime import timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job, MotionType
+
+# 실행 중(running)인 작업의 heartbeat_at이 이 시간 동안 갱신되지 않으면 워커가 죽은 것으로 보고 다시 가져감
+JOB_LEASE = timedelta(minutes=5)
+# 실행 중인 작업의 heartbeat_at 갱신 간격
+JOB_HEARTBEAT = timedelta(seconds=30)
+# 실패 후 재시도까지 기다리는 시간 (시도 횟수만큼 늘어남)
+RETRY_BACKOFF = timedelta(seconds=30)
+
+RECALIBRATE_MAX_DTW = "recalibrate_max_dtw"
+BUILD_TEMPLATES = "build_motion_templates"
+
+
+def _recalibrate_max_dtw(payload: dict):
+    from .logic import update_max_dtw_for_motion
+
+    motion_type = MotionType.objects.filter(pk=payload["motion_type_id"]).first()
+    if motion_type is None:
+        # 그 사이 동작 유형이 삭제된 경우 할 일이 없음
+        return
+    update_max_dtw_for_motion(motion_type)
+
+
+def _build_templates(payload: dict):
+    from .motion_templates import rebuild_templates
+
+    rebuild_templates(payload["motion_type_id"])
+
+
+# 작업 종류(kind)별 실행 함수
+JOB_HANDLERS = {
+    RECALIBRATE_MAX_DTW: _recalibrate_max_dtw,
+    BUILD_TEMPLATES: _build_templates,
+}
+
+
+def enqueue_job(kind: str, payload: dict = None, dedup_key: str = "", company=None) -> Job:
+    """
+    작업을 등록하고 Job 객체를 반환
+    dedup_key가 같은 대기 중인 작업이 이미 있으면 그 작업을 그대로 반환함
+    (예: 같은 동작의 녹화가 연달아 올라오면 재계산은 한 번만 실행)
+    company를 주면 작업을 등록한 회사로 기록해서 그 회사가 작업 상태를 조회할 수 있게 함
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"등록되지 않은 작업 종류입니다: {kind}")
+
+    job = _create_or_join(kind, payload or {}, dedup_key)
+    if company is not None:
+        job.requested_by.add(company)
+    return job
+
+
+def _create_or_join(kind: str, payload: dict, dedup_key: str) -> Job:
+    if not dedup_key:
+        return Job.objects.create(kind=kind, payload=payload)
+    # 찾은 대기 작업이 그 사이 실행되기 시작했으면 다시 만들어야 하므로 몇 번 반복
+    for _ in range(3):
+        with transaction.atomic():
+            # 잠그는 조회라서 다른 트랜잭션이 방금 커밋한 행도 보임 (MySQL REPEATABLE READ)
+            pending = Job.objects.select_for_update().filter(pending_key=dedup_key).first()
+            if pending is not None:
+                return pending
+            try:
+                with transaction.atomic():
+                    return Job.objects.create(kind=kind, payload=payload, dedup_key=dedup_key, pending_key=dedup_key)
+            except IntegrityError:
+                # 다른 요청이 같은 키의 대기 작업을 먼저 만듦 -> 그 작업에 합침
+                continue
+    raise RuntimeError(f"작업을 등록하지 못했습니다: {dedup_key}")
+
+
+def enqueue_recalibration(motion_type: MotionType, company=None) -> Job:
+    return enqueue_job(
+        RECALIBRATE_MAX_DTW,
+        {"motion_type_id": motion_type.id},
+        dedup_key=f"{RECALIBRATE_MAX_DTW}:{motion_type.id}",
+        company=company,
+    )
+
+
+def enqueue_template_build(motion_type_id: int):
+    """
+    templates 방식인 동작이면 템플릿을 다시 만드는 작업을 등록하고 Job을 반환 (아니면 None)
+    모범 동작이 바뀌어 reference_version이 올라갈 때마다 호출됨 (ai/evaluator_cache.py)
+    """
+    if not MotionType.objects.filter(pk=motion_type_id, reference_set="templates").exists():
+        return None
+    return enqueue_job(
+        BUILD_TEMPLATES,
+        {"motion_type_id": motion_type_id},
+        dedup_key=f"{BUILD_TEMPLATES}:{motion_type_id}",
+    )
+
+
+def claim_next_job():
+    """
+    실행할 작업 하나를 잠금(row lock)으로 가져와서 running 상태로 바꿈
+    여러 워커가 동시에 돌아도 skip_locked 덕분에 같은 작업을 두 번 가져가지 않음
+    heartbeat가 끊긴 작업은 다시 가져가되, 이미 max_attempts만큼 시도했으면 실행하지 않고 실패로 끝냄
+    """
+    now = timezone.now()
+    stale = Q(status=Job.STATUS_RUNNING, heartbeat_at__lt=now - JOB_LEASE)
+    Job.objects.filter(stale, attempts__gte=F("max_attempts")).update(
+        status=Job.STATUS_FAILED,
+        last_error="작업을 실행하던 워커가 응답하지 않아 최대 시도 횟수를 넘었습니다.",
+        finished_at=now,
+        updated_at=now,
+    )
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=Job.STATUS_PENDING, run_after__lte=now) | stale)
+            .order_by("run_after", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.STATUS_RUNNING
+        job.attempts += 1
+        job.started_at = now
+        job.heartbeat_at = now
+        # 실행이 시작되면 같은 키의 새 작업을 받을 수 있도록 대기 키를 비움
+        job.pending_key = None
+        job.save(update_fields=["status", "attempts", "started_at", "heartbeat_at", "pending_key", "updated_at"])
+    return job
+
+
+class _Heartbeat(threading.Thread):
+    """작업을 실행하는 동안 heartbeat_at을 주기적으로 갱신 (이 시도를 다른 워커가 가져갔으면 갱신하지 않음)"""
+
+    def __init__(self, job: Job, interval: float):
+        super().__init__(daemon=True, name=f"job-heartbeat-{job.id}")
+        self.job = job
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                Job.objects.filter(
+                    pk=self.job.pk, status=Job.STATUS_RUNNING, attempts=self.job.attempts
+                ).update(heartbeat_at=timezone.now())
+        except Exception as e:
+            print(f"[Error] 작업 #{self.job.id} heartbeat 갱신 실패: {e}")
+        finally:
+            # 스레드마다 DB 연결이 따로 열리므로 닫아줌
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def _finish(job: Job) -> bool:
+    """실행 결과를 저장. 이 시도가 다른 워커에게 넘어간 뒤라면 덮어쓰지 않고 False"""
+    fields = ["status", "last_error", "run_after", "finished_at", "pending_key"]
+    job.updated_at = timezone.now()
+    return bool(
+        Job.objects.filter(pk=job.pk, status=Job.STATUS_RUNNING, attempts=job.attempts)
+        .update(updated_at=job.updated_at, **{field: getattr(job, field) for field in fields})
+    )
+
+
+def run_job(job: Job, heartbeat: timedelta = JOB_HEARTBEAT) -> Job:
+    """가져온 작업을 실행하고 결과(완료/재시도/실패)를 기록"""
+    beat = _Heartbeat(job, heartbeat.total_seconds())
+    beat.start()
+    try:
+        JOB_HANDLERS[job.kind](job.payload)
+    except Exception as e:
+        job.last_error = f"{e}\n{traceback.format_exc()}"
+        if job.attempts < job.max_attempts:
+            job.status = Job.STATUS_PENDING
+            job.run_after = timezone.now() + RETRY_BACKOFF * job.attempts
+            job.pending_key = job.dedup_key or None
+        else:
+            job.status = Job.STATUS_FAILED
+            job.finished_at = timezone.now()
+        print(f"[Error] 작업 #{job.id}({job.kind}) 실행 실패: {e}")
+    else:
+        job.status = Job.STATUS_SUCCEEDED
+        job.finished_at = timezone.now()
+    finally:
+        beat.stop()
+
+    try:
+        with transaction.atomic():
+            saved = _finish(job)
+    except IntegrityError:
+        # 재시도하려는데 같은 키의 새 대기 작업이 이미 있음 -> 그 작업이 대신 실행되므로 이 작업은 실패로 끝냄
+        job.status = Job.STATUS_FAILED
+        job.finished_at = timezone.now()
+        job.pending_key = None
+        saved = _finish(job)
+    if not saved:
+        print(f"[Error] 작업 #{job.id}({job.kind})를 다른 워커가 다시 가져가서 이 실행 결과는 저장하지 않습니다.")
+    return job
@@ -1,41 +1,99 @@
 # ai/logic.py
 
-from dtaidistance import dtw_ndim
-from .evaluator_cache import get_evaluator, clear_evaluator_cache
-from .models import MotionType, MotionRecording
-from organizations.models import Employee
-from .serializers import UserRecordingSerializer
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-def run_evaluation(motion_name: str, employee: Employee, raw_sensor_data: list) -> dict:
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from .dtw_engine import dtw_distance
+from .eval_service import EvalServiceUnavailable, evaluate_remote, service_address
+from .evaluator_cache import get_evaluator
+from .models import MotionType, MotionRecording, MotionPairDistance, UserRecording
+from .motion_templates import load_templates
+from .recording_buffer import get_recording_buffer
+from .rollups import record_scores
+from .scoring import score_sensor_array, score_sensor_arrays
+from .metrics import dtw_seconds, evaluation_seconds, observe_scoring, stage_seconds
+from .context import bump_motion_types_version, context_resolver
+from organizations.models import Company
+
+def score_user_data(motion_type, user_data) -> dict:
     """
-    센서 데이터 리스트를 받아 평가를 수행하고 결과를 반환하는 핵심 함수
+    전처리된 사용자 데이터를 동작의 평가기로 채점 (DTW 단계 / 동작별 DTW 소요 시간 지표를 기록)
+    motion_type은 MotionType 또는 ai/context.py의 MotionInfo
     """
-    try:
-        motion_type = MotionType.objects.get(motion_name=motion_name)
-    except MotionType.DoesNotExist:
+    evaluator = get_evaluator(motion_type.motion_name, version=motion_type.reference_version)
+    dtw_started = time.perf_counter()
+    result = evaluator.score_preprocessed(
+        user_data,
+        motion_type.max_dtw_distance,
+        mode=motion_type.evaluation_mode,
+        k=motion_type.nearest_k,
+        engine=motion_type.dtw_engine,
+    )
+    dtw_elapsed = time.perf_counter() - dtw_started
+    stage_seconds.observe(dtw_elapsed, "dtw")
+    dtw_seconds.observe(dtw_elapsed, motion_type.motion_name)
+    return result
+
+
+def save_recording(employee_id: int, motion_type_id: int, score: float, company_id=None):
+    """
+    평가 결과 한 건을 저장 (단건 평가, 스트리밍 세션 finalize가 함께 사용)
+    지연 저장 모드이면 스풀 파일에 기록하고 바로 반환 (트랜잭션 안이면 커밋된 뒤에 기록해서, 롤백된 결과가 저장되지 않음)
+    """
+    with stage_seconds.time("persist"):
+        buffer = get_recording_buffer()
+        if buffer is not None:
+            # 지연 저장 모드: DB 저장은 백그라운드에서 모아서 처리
+            transaction.on_commit(lambda: buffer.add(employee_id, motion_type_id, score, company_id))
+            return
+        # 직원/동작 id는 이미 확인된 값이므로, Serializer 검증(직원/동작을 다시 조회) 없이 바로 저장
+        with transaction.atomic():
+            recording = UserRecording.objects.create(
+                user_id=employee_id, company_id=company_id, motion_type_id=motion_type_id, score=score
+            )
+            record_scores([recording])
+
+
+def run_evaluation(motion_name: str, employee_id: int, sensor_array, channels, company_id=None) -> dict:
+    """
+    센서 데이터 배열(프레임 수 × 채널 수)과 채널 이름을 받아 평가를 수행하고 결과를 반환하는 핵심 함수
+    동작 정보와 평가기는 프로세스 메모리 캐시에서 가져오므로, 보통은 결과 저장(+ 집계 갱신) 외에 DB 조회가 없음
+    company_id(직원의 회사)를 넘겨주면 결과를 저장할 때 직원의 회사를 다시 조회하지 않음
+    """
+    motion_type = context_resolver.motion(motion_name)
+    if motion_type is None:
         return {"error": f"'{motion_name}' 동작을 찾을 수 없습니다."}
 
+    started = time.perf_counter()
     try:
-        evaluator = get_evaluator(motion_name)
+        result = None
+        if service_address():
+            # 평가 서비스 모드: 공유 메모리를 쓰는 평가 전용 프로세스에 계산을 맡김 (ai/eval_service.py)
+            try:
+                with stage_seconds.time("eval_service"):
+                    result = evaluate_remote(motion_type, sensor_array, channels)
+            except EvalServiceUnavailable as e:
+                print(f"[Error] {e} 현재 프로세스에서 평가합니다.")
 
-        result = evaluator.evaluator_user_motion(raw_sensor_data, motion_type.max_dtw_distance)
-        
+        if result is None:
+            evaluator = get_evaluator(motion_name, version=motion_type.reference_version)
+            # 단계별 소요 시간을 따로 재기 위해 전처리와 DTW 비교를 나눠서 호출 (ai/metrics.py)
+            with stage_seconds.time("preprocess"):
+                user_data = evaluator.preprocess_user_data(sensor_array, channels=channels)
+            result = score_user_data(motion_type, user_data)
+
+        observe_scoring(motion_name, result)
         if "error" in result:
             return result
 
-        recording_data = {
-            "user": employee.id,
-            "motion_type": motion_type.id,
-            "score": result.get("score"),
-            "sensor_data_json": raw_sensor_data
-        }
-        
-        serializer = UserRecordingSerializer(data=recording_data)
-        if serializer.is_valid():
-            serializer.save()
-        else:
-            print(f"[Critical] 사용자 평가 기록 저장 실패: {serializer.errors}")
-
+        save_recording(employee_id, motion_type.id, result["score"], company_id)
+        evaluation_seconds.observe(time.perf_counter() - started, motion_name)
         return result
 
     except Exception as e:
@@ -43,47 +101,254 @@ def run_evaluation(motion_name: str, employee: Employee, raw_sensor_data: list)
         return {"error": f"평가 중 오류 발생: {str(e)}"}
 
 
+# 배치 평가용 프로세스 풀 (처음 사용할 때 한 번만 만듦)
+_batch_pool = None
+
+
+def _batch_workers() -> int:
+    return getattr(settings, "AI_BATCH_WORKERS", None) or os.cpu_count() or 1
+
+
+def _get_batch_pool():
+    global _batch_pool
+    if _batch_pool is None:
+        workers = _batch_workers()
+        # fork로 만든 자식 프로세스가 부모의 DB 연결을 건드리지 않도록 spawn 사용
+        # (자식은 Django 없이 ai/scoring.py의 순수 함수만 실행)
+        _batch_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _batch_pool
+
+
+def _score_in_parallel(tasks: list, motions: dict) -> list:
+    """
+    (원본 센서 배열, 채널 이름, 동작 이름) 작업들을 CPU 코어에 나눠서 점수 계산
+    motions: 동작 이름 -> (모범 동작들, 엔벨로프들, max_dtw, mode, k, engine)
+    같은 동작의 작업을 최대 워커 수만큼의 묶음으로 나눠서 넘기므로, 모범 동작은 항목마다가 아니라 묶음마다 한 번만 직렬화됨
+    """
+    workers = _batch_workers()
+    if len(tasks) <= 1 or workers == 1:
+        return [score_sensor_array(sensor_array, channels, *motions[name]) for sensor_array, channels, name in tasks]
+
+    indexes = {}
+    for index, (_, _, name) in enumerate(tasks):
+        indexes.setdefault(name, []).append(index)
+    chunks = []
+    for name, members in indexes.items():
+        size = -(-len(members) // workers)
+        chunks.extend((name, members[start:start + size]) for start in range(0, len(members), size))
+
+    results = [None] * len(tasks)
+    try:
+        pool = _get_batch_pool()
+        futures = [
+            pool.submit(score_sensor_arrays, [tasks[index][:2] for index in members], *motions[name])
+            for name, members in chunks
+        ]
+        for (_, members), future in zip(chunks, futures):
+            for index, result in zip(members, future.result()):
+                results[index] = result
+        return results
+    except BrokenProcessPool:
+        # 자식 프로세스가 죽은 경우 풀을 버리고 현재 프로세스에서 계산
+        global _batch_pool
+        _batch_pool = None
+        print("[Error] 배치 평가 프로세스 풀이 중단되어 현재 프로세스에서 계산합니다.")
+        return [score_sensor_array(sensor_array, channels, *motions[name]) for sensor_array, channels, name in tasks]
+
+
+def run_batch_evaluation(company: Company, items: list) -> list:
+    """
+    여러 직원의 평가 요청(EvaluationRequestSerializer로 검증된 empNo, motionName, sensorArray, channels)을 한 번에 처리
+    - 직원/동작 정보는 프로세스 메모리 캐시(ai/context.py)에서 가져옴
+    - 점수 계산은 여러 CPU 코어에서 병렬로 수행
+    - 결과는 bulk_create 한 번으로 저장
+    항목마다 {"index", "empNo", "motionName", "ok", "evaluation" 또는 "error"}를 반환
+    """
+    employees = {
+        emp_no: context_resolver.employee_id(company.id, emp_no) for emp_no in {item["empNo"] for item in items}
+    }
+    motion_types = {
+        motion_name: context_resolver.motion(motion_name) for motion_name in {item["motionName"] for item in items}
+    }
+
+    results = []
+    tasks = []
+    task_indexes = []
+    # 동작 이름 -> 평가기의 모범 동작과 평가 설정 (배치 안에서 동작마다 한 번만 프로세스 풀로 넘김)
+    motions = {}
+    for index, item in enumerate(items):
+        result = {"index": index, "empNo": item["empNo"], "motionName": item["motionName"], "ok": False}
+        results.append(result)
+
+        motion_type = motion_types.get(item["motionName"])
+        if employees[item["empNo"]] is None:
+            result["error"] = f"회사({company.name})에 해당 사원번호({item['empNo']})가 존재하지 않습니다."
+            continue
+        if motion_type is None:
+            result["error"] = f"'{item['motionName']}' 동작을 찾을 수 없습니다."
+            continue
+        try:
+            evaluator = get_evaluator(motion_type.motion_name, version=motion_type.reference_version)
+        except Exception as e:
+            print(f"[Error] Evaluation failed for {motion_type.motion_name}: {e}")
+            result["error"] = f"평가 중 오류 발생: {str(e)}"
+            continue
+
+        if motion_type.motion_name not in motions:
+            motions[motion_type.motion_name] = (
+                evaluator.reference_motion_preprocessed,
+                evaluator.reference_envelopes,
+                motion_type.max_dtw_distance,
+                motion_type.evaluation_mode,
+                motion_type.nearest_k,
+                motion_type.dtw_engine,
+            )
+        tasks.append((item["sensorArray"], item["channels"], motion_type.motion_name))
+        task_indexes.append(index)
+
+    with stage_seconds.time("batch_score"):
+        evaluations = _score_in_parallel(tasks, motions)
+
+    new_recordings = []
+    for index, evaluation in zip(task_indexes, evaluations):
+        result = results[index]
+        observe_scoring(result["motionName"], evaluation)
+        if "error" in evaluation:
+            result["error"] = evaluation["error"]
+            continue
+        motion_type = motion_types[result["motionName"]]
+        result["ok"] = True
+        result["evaluation"] = {"evaluator_motion_name": motion_type.motion_name, **evaluation}
+        new_recordings.append(UserRecording(
+            user_id=employees[result["empNo"]],
+            company_id=company.id,
+            motion_type_id=motion_type.id,
+            score=evaluation["score"],
+        ))
+
+    with stage_seconds.time("persist"):
+        buffer = get_recording_buffer()
+        if buffer is not None:
+            buffer.extend((rec.user_id, rec.motion_type_id, rec.score, rec.company_id) for rec in new_recordings)
+        else:
+            with transaction.atomic():
+                UserRecording.objects.bulk_create(new_recordings)
+                record_scores(new_recordings)
+    return results
+
+
 def update_max_dtw_for_motion(motion_type: MotionType):
     """
     특정 MotionType에 대해 max_dtw_distance를 재계산하고 저장함.
+    모범 동작 × 0점 동작 쌍의 DTW 거리는 MotionPairDistance에 저장해두고, 아직 계산하지 않은 쌍만 새로 계산함
+    (녹화가 하나 추가되면 그 녹화의 행/열만 계산)
+    templates 방식이고 최신 템플릿이 있으면, 평가할 때 비교하는 템플릿 × 0점 동작 거리로 계산함
     """
     print(f"'{motion_type.motion_name}'의 max_dtw_distance 재계산을 시작합니다.")
 
-    reference_recordings = MotionRecording.objects.filter(motion_type=motion_type, score_category="reference")
-    zero_score_recordings = MotionRecording.objects.filter(motion_type=motion_type, score_category="zero_score")
+    # 평가기가 템플릿과 비교하는데 전체 모범 동작 기준으로 보정하면, 0점 기준이 실제 비교 대상과 달라짐
+    # (템플릿은 모범 동작의 평균이라 0점 동작과의 거리도 다름)
+    templates = load_templates(motion_type.motion_name)
+    if templates:
+        if recalculate_max_dtw_from_templates(motion_type, templates) is None:
+            print("유효한 DTW 거리를 계산하지 못했습니다.")
+        return
+
+    recordings = MotionRecording.objects.filter(motion_type=motion_type)
+    reference_ids = list(recordings.filter(score_category="reference").values_list("id", flat=True))
+    zero_score_ids = list(recordings.filter(score_category="zero_score").values_list("id", flat=True))
 
-    if not reference_recordings.exists() or not zero_score_recordings.exists():
+    if not reference_ids or not zero_score_ids:
         print("모범 동작 또는 0점 동작 데이터가 부족하여 max_dtw_distance를 계산할 수 없습니다.")
         return
 
-    # numpy 배열로 변환
-    # 리스트 내포 문법
-    ref_motions = [rec.get_sensor_data_to_numpy() for rec in reference_recordings] # db에서 가져온 모범 동작 센서 데이터
-    zero_motions = [rec.get_sensor_data_to_numpy() for rec in zero_score_recordings] # db에서 가져온 빵점 동작 센서 데이터
+    # 이미 저장된 쌍은 건너뛰고, 새로 계산해야 하는 쌍만 찾기
+    known_pairs = set(
+        MotionPairDistance.objects.filter(motion_type=motion_type).values_list("reference_id", "zero_score_id")
+    )
+    missing_pairs = [
+        (ref_id, zero_id)
+        for ref_id in reference_ids
+        for zero_id in zero_score_ids
+        if (ref_id, zero_id) not in known_pairs
+    ]
 
-    max_distances = [] # 최대 dtw 거리를 담을 배열
+    if missing_pairs:
+        # 새로 계산할 쌍에 포함된 녹화만 numpy 배열로 불러옴
+        needed_ids = {rec_id for pair in missing_pairs for rec_id in pair}
+        motions = {
+            rec.id: rec.get_sensor_data_to_numpy()
+            for rec in recordings.filter(id__in=needed_ids)
+        }
 
-    for ref_motion in ref_motions:
-        for zero_motion in zero_motions:
+        new_distances = []
+        for ref_id, zero_id in missing_pairs:
+            ref_motion, zero_motion = motions[ref_id], motions[zero_id]
             if ref_motion.size == 0 or zero_motion.size == 0:
                 continue
             try:
-                distance = dtw_ndim.distance(ref_motion, zero_motion, window=10)
-                max_distances.append(distance)
+                distance = dtw_distance(ref_motion, zero_motion, engine=motion_type.dtw_engine)
             except Exception as e:
                 print(f"DTW 거리 계산 중 오류 발생: {e}")
                 continue
+            new_distances.append(MotionPairDistance(
+                motion_type=motion_type, reference_id=ref_id, zero_score_id=zero_id, distance=distance
+            ))
+        # 동시에 같은 쌍을 계산한 경우를 대비해 중복은 무시
+        MotionPairDistance.objects.bulk_create(new_distances, ignore_conflicts=True)
+        print(f"새로 계산한 DTW 쌍: {len(new_distances)}개 (저장된 쌍 {len(known_pairs)}개 재사용)")
 
-    if max_distances:
-        new_max_dtw = max(max_distances)
-        
-        # 약간의 여유(10%)를 추가하여 최대값을 설정하면, 0점 동작보다 약간 나은 동작이 0점이 되는 것을 방지할 수 있음
-        new_max_dtw *= 1.1 
-        motion_type.max_dtw_distance = new_max_dtw
-        motion_type.save()
-        print(f"'{motion_type.motion_name}'의 새로운 max_dtw_distance: {new_max_dtw}")
-
-        # 이 동작 유형에 대한 평가기 캐시를 지워서 다음 평가 시 새로운 max_dtw 값을 반영하도록 함
-        clear_evaluator_cache(motion_type.motion_name)
-    else:
+    if recalculate_max_dtw_from_matrix(motion_type) is None:
         print("유효한 DTW 거리를 계산하지 못했습니다.")
+
+
+def recalculate_max_dtw_from_matrix(motion_type: MotionType):
+    """
+    저장된 쌍별 DTW 거리 중 최대값으로 max_dtw_distance를 갱신함 (DTW 계산 없음)
+    녹화가 삭제되었을 때도 이 함수만 호출하면 됨
+    """
+    max_distance = MotionPairDistance.objects.filter(motion_type=motion_type).aggregate(
+        max_distance=Max("distance")
+    )["max_distance"]
+    if max_distance is None:
+        return None
+    return _save_max_dtw(motion_type, max_distance)
+
+
+def recalculate_max_dtw_from_templates(motion_type: MotionType, templates: list):
+    """
+    템플릿 × 0점 동작 DTW 거리 중 최대값으로 max_dtw_distance를 갱신함
+    템플릿은 template_count개뿐이므로 쌍별 거리를 저장하지 않고 매번 계산함 (템플릿이 바뀌면 모두 달라짐)
+    """
+    zero_scores = [
+        record.get_sensor_data_to_numpy()
+        for record in MotionRecording.objects.filter(motion_type=motion_type, score_category="zero_score")
+        .order_by("pk")
+        .only("pk", "sensor_data_blob", "sensor_data_json")
+        .iterator(chunk_size=100)
+    ]
+    distances = []
+    for template in templates:
+        for zero_motion in zero_scores:
+            if zero_motion.size == 0:
+                continue
+            try:
+                distances.append(dtw_distance(template, zero_motion, engine=motion_type.dtw_engine))
+            except Exception as e:
+                print(f"DTW 거리 계산 중 오류 발생: {e}")
+    if not distances:
+        return None
+    return _save_max_dtw(motion_type, max(distances))
+
+
+def _save_max_dtw(motion_type: MotionType, max_distance: float) -> float:
+    # 약간의 여유(10%)를 추가하여 최대값을 설정하면, 0점 동작보다 약간 나은 동작이 0점이 되는 것을 방지할 수 있음
+    new_max_dtw = max_distance * 1.1
+    MotionType.objects.filter(pk=motion_type.pk).update(max_dtw_distance=new_max_dtw)
+    # update()는 시그널이 없으므로, 워커들의 동작 정보 캐시(ai/context.py)는 직접 무효화
+    bump_motion_types_version()
+    motion_type.max_dtw_distance = new_max_dtw
+    print(f"'{motion_type.motion_name}'의 새로운 max_dtw_distance: {new_max_dtw}")
+    # max_dtw_distance는 평가할 때마다 MotionType에서 읽으므로 평가기 캐시를 지울 필요가 없음
+    # (모범 동작이 바뀐 경우의 캐시 무효화는 signals.py에서 처리)
+    return new_max_dtw
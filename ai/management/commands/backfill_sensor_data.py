@@ -0,0 +1,27 @@
+# ai/management/commands/backfill_sensor_data.py
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from ai.models import MotionRecording, MotionType
+from ai.sensor_codec import backfill_sensor_blobs
+
+
+class Command(BaseCommand):
+    help = "JSON으로 저장된 MotionRecording 센서 데이터를 float32 바이너리 형식으로 옮깁니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="한 번에 변환할 행 수")
+        parser.add_argument("--compress", action="store_true", help="zlib으로 압축해서 저장")
+        parser.add_argument("--drop-json", action="store_true", help="변환 후 sensor_data_json을 비워서 용량 확보")
+
+    def handle(self, *args, **options):
+        converted = backfill_sensor_blobs(
+            MotionRecording,
+            batch_size=options["batch_size"],
+            compress=options["compress"],
+            drop_json=options["drop_json"],
+        )
+        if converted:
+            # float32로 바뀐 데이터를 모든 워커의 평가기가 다시 읽도록 버전을 올림
+            MotionType.objects.update(reference_version=F("reference_version") + 1)
+        self.stdout.write(self.style.SUCCESS(f"{converted}개의 녹화 데이터를 변환했습니다."))
@@ -0,0 +1,49 @@
+# ai/management/commands/build_motion_templates.py
+from django.core.management.base import BaseCommand, CommandError
+
+from ai.models import MotionType
+from ai.motion_templates import evaluate_templates, rebuild_templates
+
+
+class Command(BaseCommand):
+    help = "templates 방식 동작의 DBA 템플릿을 만들거나, 템플릿 점수가 전체 모범 동작 점수를 얼마나 따라가는지 확인합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("motion_names", nargs="*", help="동작 이름 (기본: templates 방식인 모든 동작)")
+        parser.add_argument(
+            "--evaluate", action="store_true",
+            help="템플릿을 저장하지 않고, 모범 동작 일부를 떼어내서 템플릿/전체 점수 차이를 출력합니다.",
+        )
+        parser.add_argument("--holdout", type=float, default=0.2, help="--evaluate에서 떼어낼 모범 동작 비율 (기본 0.2)")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        motion_types = MotionType.objects.order_by("motion_name")
+        if options["motion_names"]:
+            motion_types = motion_types.filter(motion_name__in=options["motion_names"])
+            missing = set(options["motion_names"]) - {motion_type.motion_name for motion_type in motion_types}
+            if missing:
+                raise CommandError(f"없는 동작입니다: {', '.join(sorted(missing))}")
+        elif not options["evaluate"]:
+            motion_types = motion_types.filter(reference_set="templates")
+
+        for motion_type in motion_types:
+            if options["evaluate"]:
+                self.report(motion_type, evaluate_templates(motion_type, options["holdout"], options["seed"]))
+                continue
+            if motion_type.reference_set != "templates":
+                self.stdout.write(f"  {motion_type.motion_name}: templates 방식이 아니어서 건너뜁니다.")
+                continue
+            rebuild_templates(motion_type.pk)
+
+    def report(self, motion_type, result):
+        if "error" in result:
+            self.stdout.write(f"  {motion_type.motion_name}: {result['error']}")
+            return
+        correlation = "-" if result["correlation"] is None else f"{result['correlation']:.3f}"
+        self.stdout.write(
+            f"  {motion_type.motion_name}: 모범 동작 {result['references']}개 -> 템플릿 {result['templates']}개, "
+            f"평가 {result['queries']}건 | 점수 차이 평균 {result['mean_abs_diff']:.2f} / 최대 {result['max_abs_diff']:.2f}, "
+            f"평균 편향 {result['mean_bias']:+.2f}, 상관계수 {correlation} | "
+            f"비교 시간 {result['full_seconds'] * 1000:.0f}ms -> {result['template_seconds'] * 1000:.0f}ms"
+        )
@@ -0,0 +1,30 @@
+# ai/management/commands/export_reference_snapshots.py
+from django.core.management.base import BaseCommand
+
+from ai.reference_snapshot import export_snapshots, legacy_json_recordings, snapshot_dir
+
+
+class Command(BaseCommand):
+    help = "동작별 모범 동작 데이터를 평가기가 memmap으로 읽는 스냅샷 파일로 내보냅니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("motion_names", nargs="*", help="내보낼 동작 이름 (기본: 모든 동작)")
+        parser.add_argument("--dir", default=None, help="스냅샷 디렉터리 (기본: AI_REFERENCE_SNAPSHOT_DIR)")
+        parser.add_argument("--force", action="store_true", help="최신 스냅샷도 다시 만듭니다.")
+
+    def handle(self, *args, **options):
+        legacy = legacy_json_recordings(options["motion_names"])
+        if legacy:
+            self.stdout.write(self.style.WARNING(
+                f"바이너리로 옮기지 않은 모범 동작 {legacy}개는 스냅샷에 float32로 저장되어 DB에서 읽을 때와 점수가 "
+                f"조금 다를 수 있습니다. 먼저 python manage.py backfill_sensor_data 를 실행하세요."
+            ))
+        result = export_snapshots(options["motion_names"], force=options["force"], directory=options["dir"])
+        for motion_name in result["built"]:
+            self.stdout.write(f"  {motion_name}: 새로 만듦")
+        for name in result["removed"]:
+            self.stdout.write(f"  {name}: 삭제된 동작의 스냅샷 삭제")
+        self.stdout.write(self.style.SUCCESS(
+            f"{snapshot_dir(options['dir'])}: {len(result['built'])}개 생성, "
+            f"{len(result['skipped'])}개 최신, {len(result['removed'])}개 삭제"
+        ))
@@ -0,0 +1,12 @@
+# ai/management/commands/purge_evaluation_sessions.py
+from django.core.management.base import BaseCommand
+
+from ai.sessions import purge_expired_sessions
+
+
+class Command(BaseCommand):
+    help = "만료된 스트리밍 평가 세션과 오래된 완료 세션을 삭제합니다."
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_sessions()
+        self.stdout.write(self.style.SUCCESS(f"{deleted}개의 평가 세션을 삭제했습니다."))
@@ -0,0 +1,26 @@
+# ai/management/commands/rebuild_score_rollups.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai.rollups import rebuild_rollups
+from organizations.models import Company
+
+
+class Command(BaseCommand):
+    help = "평가 결과 집계(회사 × 동작 × 일/주)를 지우고 원본 평가 기록에서 다시 계산합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--company", default=None, help="이 사업자등록번호의 회사만 다시 계산 (기본: 모든 회사)")
+
+    def handle(self, *args, **options):
+        company_id = None
+        if options["company"]:
+            company_id = Company.objects.filter(biz_no=options["company"]).values_list("pk", flat=True).first()
+            if company_id is None:
+                raise CommandError(f"없는 회사입니다: {options['company']}")
+        started = time.perf_counter()
+        created = rebuild_rollups(company_id)
+        self.stdout.write(self.style.SUCCESS(
+            f"집계 {created}행을 다시 만들었습니다 ({time.perf_counter() - started:.1f}초)."
+        ))
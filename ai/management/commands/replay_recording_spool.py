@@ -0,0 +1,15 @@
+# ai/management/commands/replay_recording_spool.py
+from django.core.management.base import BaseCommand
+
+from ai.recording_buffer import replay_spool_dir
+
+
+class Command(BaseCommand):
+    help = "지연 저장 모드에서 DB에 저장되지 못하고 스풀 파일에 남은 평가 기록을 저장합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--spool-dir", default=None, help="스풀 디렉터리 (기본: AI_RECORDING_SPOOL_DIR)")
+
+    def handle(self, *args, **options):
+        replayed = replay_spool_dir(options["spool_dir"])
+        self.stdout.write(self.style.SUCCESS(f"{replayed}건의 평가 기록을 저장했습니다."))
@@ -0,0 +1,41 @@
+# ai/management/commands/run_ai_worker.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ai.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = "DB 작업 큐(Job)에서 AI 작업을 가져와 실행하는 워커를 시작합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="대기 작업이 없을 때 다시 확인하는 간격(초)")
+        parser.add_argument("--once", action="store_true", help="대기 중인 작업을 모두 처리하면 종료")
+        parser.add_argument("--max-jobs", type=int, default=0, help="이 개수만큼 처리하면 종료 (0이면 제한 없음)")
+
+    def handle(self, *args, **options):
+        processed = 0
+        self.stdout.write("AI 작업 워커를 시작합니다.")
+        try:
+            while True:
+                close_old_connections()
+                job = claim_next_job()
+                if job is None:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                started = time.perf_counter()
+                job = run_job(job)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"작업 #{job.id} ({job.kind}) -> {job.status} [{elapsed:.2f}s]")
+
+                processed += 1
+                if options["max_jobs"] and processed >= options["max_jobs"]:
+                    break
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"워커 종료: {processed}개 작업 처리"))
@@ -0,0 +1,46 @@
+# ai/management/commands/run_eval_service.py
+import os
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ai.eval_service import DEFAULT_NODE_PROCESSES, DEFAULT_TIMEOUT, EvaluationService, service_address
+
+
+class Command(BaseCommand):
+    help = "모범 동작을 공유 메모리에 올려두고 여러 프로세스에서 평가하는 평가 서비스를 시작합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=0, help="평가 프로세스 수 (기본: AI_EVAL_SERVICE_WORKERS 또는 CPU 코어 수)")
+        parser.add_argument(
+            "--node-processes", type=int, default=0,
+            help=f"한 동작을 나눠 처리하는 노드당 평가 프로세스 수 (기본: AI_EVAL_SERVICE_NODE_PROCESSES 또는 {DEFAULT_NODE_PROCESSES})",
+        )
+        parser.add_argument("--address", default=None, help="유닉스 소켓 경로 (기본: AI_EVAL_SERVICE_ADDRESS)")
+        parser.add_argument("--timeout", type=float, default=0, help="평가 한 건의 최대 시간(초) (기본: AI_EVAL_SERVICE_TIMEOUT 또는 30)")
+
+    def handle(self, *args, **options):
+        address = options["address"] or service_address()
+        if not address:
+            raise CommandError("--address 또는 AI_EVAL_SERVICE_ADDRESS 설정이 필요합니다.")
+        workers = options["workers"] or getattr(settings, "AI_EVAL_SERVICE_WORKERS", None) or os.cpu_count() or 1
+        service = EvaluationService(
+            workers=workers,
+            address=address,
+            timeout=options["timeout"] or getattr(settings, "AI_EVAL_SERVICE_TIMEOUT", DEFAULT_TIMEOUT),
+            node_processes=options["node_processes"]
+            or getattr(settings, "AI_EVAL_SERVICE_NODE_PROCESSES", DEFAULT_NODE_PROCESSES),
+        )
+
+        def stop(signum, frame):
+            raise KeyboardInterrupt
+
+        signal.signal(signal.SIGTERM, stop)
+        try:
+            service.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.close()
+        self.stdout.write(self.style.SUCCESS(f"평가 서비스 종료: {service.stats()['jobs']}"))
@@ -0,0 +1,381 @@
+# ai/metrics.py
+# 평가 요청의 단계별 소요 시간, 캐시 통계를 모아서 Prometheus 텍스트 형식으로 내보내는 계측 모듈
+#
+# - 값은 프로세스 메모리에 쌓고(요청 경로에서는 잠금 + 덧셈뿐), 백그라운드 스레드가
+#   AI_METRICS_FLUSH_INTERVAL(초)마다 AI_METRICS_DIR에 프로세스별 파일(JSON)로 저장함
+# - GET /api/ai/metrics/ 는 자기 프로세스의 값과 다른 워커 프로세스들의 파일을 합쳐서 응답
+#   (어느 워커가 요청을 받아도 서버 전체의 합계가 나옴)
+# - 카운터/히스토그램은 종료된 프로세스의 마지막 값도 합계에 포함하고 (합계가 줄어들지 않도록),
+#   게이지(캐시 크기 등)는 살아 있는 프로세스 값만 더함
+# - 종료된 프로세스의 파일은 합칠 때 retired.json(종료된 프로세스들의 누적 합계)에 더한 뒤 지우므로,
+#   워커가 재시작을 반복해도 파일이 쌓이지 않음
+# - 배포할 때 AI_METRICS_DIR을 비워주면 카운터가 0부터 다시 시작함 (Prometheus는 리셋으로 처리)
+
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경: 파일 잠금 없이 동작 (프로세스 하나만 쓴다고 가정)
+    fcntl = None
+
+DEFAULT_FLUSH_INTERVAL = 5.0
+# 종료된 프로세스들의 카운터/히스토그램 합계 파일
+RETIRED_FILE = "retired.json"
+# 초 단위 지연 시간용 버킷 (1ms ~ 10s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        # 라벨 값 튜플 -> 누적 값
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+        registry.touch()
+
+    def samples(self) -> list:
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._values.items()]
+
+    @staticmethod
+    def merge(total, value):
+        return value if total is None else total + value
+
+    def render(self, labels, value) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # 라벨 값 튜플 -> [버킷별 개수..., 합계, 개수] (버킷 개수는 누적이 아닌 구간별 개수)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+        registry.touch()
+
+    def time(self, *labels) -> _Timer:
+        """with 블록의 실행 시간(초)을 기록"""
+        return _Timer(self, labels)
+
+    def samples(self) -> list:
+        with self._lock:
+            return [[list(labels), list(state)] for labels, state in self._values.items()]
+
+    @staticmethod
+    def merge(total, value):
+        return list(value) if total is None else [a + b for a, b in zip(total, value)]
+
+    def render(self, labels, state) -> list:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), state[:-2]):
+            cumulative += count
+            le = f'le="{_format_value(float(bound)) if bound != "+Inf" else bound}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(state[-2])}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {state[-1]}")
+        return lines
+
+
+class CallbackMetric:
+    """캐시 통계처럼 다른 객체가 이미 세고 있는 값을 내보낼 때 사용 (저장/응답 시점에 callback을 호출)"""
+
+    def __init__(self, name: str, kind: str, help_text: str, callback):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.labelnames = ()
+        self.callback = callback
+
+    def samples(self) -> list:
+        try:
+            return [[[], self.callback()]]
+        except Exception as e:
+            print(f"[Error] 지표 {self.name} 수집 실패: {e}")
+            return []
+
+    merge = staticmethod(Counter.merge)
+    render = Counter.render
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._token = f"{os.getpid()}-{uuid.uuid4().hex}"
+        self._thread = None
+        self._thread_pid = None
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def callback(self, name: str, kind: str, help_text: str, callback) -> CallbackMetric:
+        return self.register(CallbackMetric(name, kind, help_text, callback))
+
+    def metrics_dir(self):
+        directory = getattr(settings, "AI_METRICS_DIR", None)
+        return Path(directory) if directory else None
+
+    def touch(self):
+        # 값이 처음 기록될 때 (fork된 워커라면 그 워커에서 처음 기록될 때) 저장 스레드를 시작
+        if self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+            self._token = f"{os.getpid()}-{uuid.uuid4().hex}"
+            if self.metrics_dir() is None:
+                return
+            self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.write)
+
+    def _run(self):
+        interval = getattr(settings, "AI_METRICS_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)
+        while True:
+            time.sleep(interval)
+            self.write()
+
+    def collect(self) -> dict:
+        """이 프로세스의 값: {지표 이름: [[라벨 값들], 값], ...}"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.samples() for metric in metrics}
+
+    def write(self):
+        """이 프로세스의 값을 AI_METRICS_DIR/<pid>-<token>.json 으로 저장"""
+        directory = self.metrics_dir()
+        if directory is None:
+            return
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"{self._token}.json"
+            temp_path = directory / f".{self._token}.tmp"
+            temp_path.write_text(json.dumps({"pid": os.getpid(), "metrics": self.collect()}), encoding="utf-8")
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"[Error] 지표 파일 저장 실패: {e}")
+
+    def _other_processes(self):
+        directory = self.metrics_dir()
+        if directory is None or not directory.is_dir():
+            return
+        dead = []
+        for path in directory.glob("*.json"):
+            if path.stem == self._token or path.name == RETIRED_FILE:
+                continue
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                # 다른 프로세스가 바꿔치기하는 중이거나 깨진 파일
+                continue
+            if _pid_alive(data.get("pid")):
+                yield True, data.get("metrics", {})
+            else:
+                dead.append(path)
+        try:
+            yield False, self._retire(directory, dead)
+        except Exception as e:
+            print(f"[Error] 종료된 프로세스 지표 정리 실패: {e}")
+
+    def _retire(self, directory: Path, paths: list) -> dict:
+        """
+        종료된 프로세스 파일들의 카운터/히스토그램 값을 retired.json에 더하고 파일을 지운 뒤, 누적 합계를 반환
+        여러 워커가 동시에 정리해도 한 번만 더하도록 파일 잠금 안에서 처리하고,
+        합계를 저장한 뒤 지우기 전에 멈춘 경우를 위해 이미 더한 파일 이름(merged)도 함께 저장함
+        """
+        retired_path = directory / RETIRED_FILE
+        with open(directory / ".retired.lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                state = json.loads(retired_path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                state = {"metrics": {}, "merged": []}
+            if not paths:
+                return state["metrics"]
+
+            with self._lock:
+                metrics = {
+                    metric.name: metric for metric in self._metrics.values() if metric.kind != "gauge"
+                }
+            merged = set(state["merged"])
+            retiring = []
+            for path in paths:
+                if path.stem in merged:
+                    retiring.append(path)
+                    continue
+                try:
+                    values = json.loads(path.read_text(encoding="utf-8")).get("metrics", {})
+                except FileNotFoundError:
+                    # 다른 워커가 먼저 정리함
+                    continue
+                except ValueError:
+                    values = {}
+                for name, samples in values.items():
+                    metric = metrics.get(name)
+                    if metric is None:
+                        continue
+                    totals = {tuple(labels): value for labels, value in state["metrics"].get(name, [])}
+                    for labels, value in samples:
+                        key = tuple(labels)
+                        totals[key] = metric.merge(totals.get(key), value)
+                    state["metrics"][name] = [[list(labels), value] for labels, value in totals.items()]
+                merged.add(path.stem)
+                retiring.append(path)
+
+            # 지난번에 지운 파일 이름은 더 이상 필요 없음
+            state["merged"] = sorted(token for token in merged if (directory / f"{token}.json").exists())
+            temp_path = directory / f".{RETIRED_FILE}.tmp"
+            temp_path.write_text(json.dumps(state), encoding="utf-8")
+            os.replace(temp_path, retired_path)
+            for path in retiring:
+                path.unlink(missing_ok=True)
+            return state["metrics"]
+
+    def render(self) -> str:
+        """모든 워커 프로세스의 값을 합쳐서 Prometheus 텍스트 형식으로 반환"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        totals = {metric.name: {} for metric in metrics}
+        sources = [(True, self.collect())]
+        sources.extend(self._other_processes())
+        for alive, values in sources:
+            for metric in metrics:
+                if metric.kind == "gauge" and not alive:
+                    continue
+                merged = totals[metric.name]
+                for labels, value in values.get(metric.name, []):
+                    key = tuple(labels)
+                    merged[key] = metric.merge(merged.get(key), value)
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, value in sorted(totals[metric.name].items()):
+                lines.extend(metric.render(labels, value))
+        return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+registry = MetricsRegistry()
+
+# 평가 요청 단계별 소요 시간
+# auth: API 키 확인, parse: 본문 파싱 + 검증, preprocess: 전처리, dtw: DTW 비교,
+# eval_service: 평가 서비스 왕복(전처리 + DTW), batch_score: 배치 평가 점수 계산, persist: 결과 저장
+stage_seconds = registry.histogram(
+    "glife_request_stage_seconds", "평가 요청 단계별 소요 시간(초)", ["stage"]
+)
+evaluation_seconds = registry.histogram(
+    "glife_evaluation_seconds", "동작별 평가 한 건의 소요 시간(초, 전처리 + DTW + 저장)", ["motion"]
+)
+dtw_seconds = registry.histogram(
+    "glife_dtw_seconds", "동작별 DTW 비교 소요 시간(초)", ["motion"]
+)
+dtw_comparisons = registry.counter(
+    "glife_dtw_comparisons_total",
+    "동작별 모범 동작 비교 수 (computed: DTW 계산, pruned: LB_Keogh로 건너뜀, abandoned: 중간에 멈춤)",
+    ["motion", "outcome"],
+)
+evaluations = registry.counter(
+    "glife_evaluations_total", "동작별 평가 건수", ["motion", "result"]
+)
+
+
+def observe_scoring(motion_name: str, result: dict):
+    """점수 계산 결과(ai/scoring.py)에 들어 있는 DTW 비교 횟수를 기록"""
+    if "error" in result:
+        evaluations.inc(1, motion_name, "error")
+        return
+    evaluations.inc(1, motion_name, "ok")
+    for outcome, key in (("computed", "dtw_calls"), ("pruned", "dtw_pruned"), ("abandoned", "dtw_abandoned")):
+        if result.get(key):
+            dtw_comparisons.inc(result[key], motion_name, outcome)
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='motiontype',
+            name='evaluation_mode',
+            field=models.CharField(choices=[('average', '전체 평균'), ('nearest_k', '가까운 k개 평균')], default='average', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='motiontype',
+            name='nearest_k',
+            field=models.PositiveSmallIntegerField(default=3, help_text='nearest_k 방식에서 사용할 모범 동작 개수'),
+        ),
+    ]
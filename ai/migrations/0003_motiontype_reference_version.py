@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0002_motiontype_evaluation_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='motiontype',
+            name='reference_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:44
+
+from django.db import migrations, models
+
+
+def backfill_blobs(apps, schema_editor):
+    # 기존 JSON 데이터는 그대로 두고 바이너리 컬럼만 채움 (JSON 정리는 backfill_sensor_data --drop-json)
+    from ai.sensor_codec import backfill_sensor_blobs
+    backfill_sensor_blobs(apps.get_model('ai', 'MotionRecording'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0003_motiontype_reference_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='motionrecording',
+            name='sensor_data_blob',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='motionrecording',
+            name='sensor_data_json',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_blobs, migrations.RunPython.noop),
+    ]
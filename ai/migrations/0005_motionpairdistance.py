@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0004_motionrecording_sensor_data_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MotionPairDistance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distance', models.FloatField()),
+                ('motion_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pair_distances', to='ai.motiontype')),
+                ('reference', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ai.motionrecording')),
+                ('zero_score', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ai.motionrecording')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('reference', 'zero_score'), name='uq_ai_pair_distance_recordings')],
+            },
+        ),
+    ]
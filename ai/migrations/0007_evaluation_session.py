@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:51
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0006_job'),
+        ('organizations', '0002_sync_employee_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EvaluationSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('open', '진행 중'), ('finalized', '완료')], default='open', max_length=20)),
+                ('next_seq', models.PositiveIntegerField(default=0)),
+                ('channels', models.JSONField(blank=True, default=list)),
+                ('frames_received', models.PositiveIntegerField(default=0)),
+                ('frames_emitted', models.PositiveIntegerField(default=0)),
+                ('tail', models.BinaryField(blank=True, null=True)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('device', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='evaluation_sessions', to='ai.sensordevice')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='evaluation_sessions', to='organizations.employee')),
+                ('motion_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='evaluation_sessions', to='ai.motiontype')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EvaluationSessionChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveIntegerField()),
+                ('frames', models.PositiveIntegerField()),
+                ('data', models.BinaryField()),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='ai.evaluationsession')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('session', 'seq'), name='uq_ai_session_chunk_seq')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0007_evaluation_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userrecording',
+            name='spool_id',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='userrecording',
+            name='recorded_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
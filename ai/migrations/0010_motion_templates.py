@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0009_cacheversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='motiontype',
+            name='reference_set',
+            field=models.CharField(choices=[('all', '전체 모범 동작'), ('templates', 'DBA 템플릿')], default='all', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='motiontype',
+            name='template_count',
+            field=models.PositiveSmallIntegerField(default=4, help_text='templates 방식에서 만들 템플릿 개수'),
+        ),
+        migrations.CreateModel(
+            name='MotionTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sensor_data_blob', models.BinaryField()),
+                ('data_frames', models.PositiveIntegerField()),
+                ('member_count', models.PositiveIntegerField(help_text='이 템플릿으로 묶인 모범 동작 수')),
+                ('reference_version', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('motion_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='templates', to='ai.motiontype')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0010_motion_templates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='motiontype',
+            name='dtw_engine',
+            field=models.CharField(choices=[('exact', '정확한 DTW'), ('coarse_to_fine', '저해상도 정렬 후 보정')], default='exact', max_length=20),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0011_motiontype_dtw_engine'),
+        ('organizations', '0002_sync_employee_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', '일'), ('week', '주')], max_length=10)),
+                ('bucket_start', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0.0)),
+                ('score_min', models.FloatField(blank=True, null=True)),
+                ('score_max', models.FloatField(blank=True, null=True)),
+                ('pass_count', models.PositiveIntegerField(default=0)),
+                ('histogram', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_rollups', to='organizations.company')),
+                ('motion_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_rollups', to='ai.motiontype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('company', 'period', 'bucket_start', 'motion_type'), name='uq_ai_score_rollup_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_companies(apps, schema_editor):
+    # 기존 평가 기록의 회사를 직원의 회사로 채움 (UPDATE 한 번)
+    UserRecording = apps.get_model('ai', 'UserRecording')
+    Employee = apps.get_model('organizations', 'Employee')
+    UserRecording.objects.filter(company__isnull=True).update(
+        company_id=Subquery(Employee.objects.filter(pk=OuterRef('user_id')).values('company_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0012_score_rollups'),
+        ('organizations', '0002_sync_employee_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userrecording',
+            name='company',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='motion_recordings', to='organizations.company'),
+        ),
+        # 인덱스를 만들기 전에 채워야 인덱스를 한 번만 만듦
+        migrations.RunPython(backfill_companies, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='userrecording',
+            index=models.Index(fields=['company', 'recorded_at', 'id'], name='ai_rec_company_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userrecording',
+            index=models.Index(fields=['user', 'recorded_at', 'id'], name='ai_rec_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userrecording',
+            index=models.Index(fields=['user', 'motion_type', 'recorded_at', 'id'], name='ai_rec_user_motion_time_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:12
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_lease_fields(apps, schema_editor):
+    # 대기 작업의 pending_key는 키마다 가장 먼저 등록된 작업에만 채움 (이전에 경쟁으로 중복 등록된 작업은 그대로 실행됨)
+    Job = apps.get_model('ai', 'Job')
+    seen = set()
+    for job in Job.objects.filter(status='pending').exclude(dedup_key='').order_by('id').only('id', 'dedup_key'):
+        if job.dedup_key not in seen:
+            seen.add(job.dedup_key)
+            Job.objects.filter(pk=job.pk).update(pending_key=job.dedup_key)
+    Job.objects.filter(status='running').update(heartbeat_at=F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0013_userrecording_history_indexes'),
+        ('organizations', '0002_sync_employee_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='pending_key',
+            field=models.CharField(blank=True, max_length=200, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='requested_by',
+            field=models.ManyToManyField(blank=True, related_name='+', to='organizations.company'),
+        ),
+        migrations.RunPython(backfill_lease_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:15
+
+from django.db import migrations, models
+
+BINS = 10
+
+
+def copy_histograms(apps, schema_editor):
+    # 기존 JSON 배열 분포를 칸별 컬럼으로 옮김
+    ScoreRollup = apps.get_model('ai', 'ScoreRollup')
+    fields = [f'bin_{index}' for index in range(BINS)]
+    batch = []
+    for rollup in ScoreRollup.objects.only('id', 'histogram').iterator(chunk_size=2000):
+        histogram = list(rollup.histogram or []) + [0] * BINS
+        for field, value in zip(fields, histogram):
+            setattr(rollup, field, value)
+        batch.append(rollup)
+        if len(batch) >= 2000:
+            ScoreRollup.objects.bulk_update(batch, fields)
+            batch = []
+    ScoreRollup.objects.bulk_update(batch, fields)
+
+
+def copy_bins_back(apps, schema_editor):
+    ScoreRollup = apps.get_model('ai', 'ScoreRollup')
+    for rollup in ScoreRollup.objects.iterator(chunk_size=2000):
+        rollup.histogram = [getattr(rollup, f'bin_{index}') for index in range(BINS)]
+        rollup.save(update_fields=['histogram'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0014_job_ownership_and_heartbeat'),
+    ]
+
+    operations = [
+        *[
+            migrations.AddField(
+                model_name='scorerollup',
+                name=f'bin_{index}',
+                field=models.PositiveIntegerField(default=0),
+            )
+            for index in range(BINS)
+        ],
+        migrations.RunPython(copy_histograms, copy_bins_back),
+        migrations.RemoveField(
+            model_name='scorerollup',
+            name='histogram',
+        ),
+    ]
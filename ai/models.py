@@ -1,6 +1,7 @@
 # ai/models.py
 
 from django.db import models
+from django.utils import timezone
 import uuid
 import secrets
 from organizations.models import Company, Employee # organizations 앱에서 Company와 Employee 모델을 가져옴
@@ -47,6 +48,31 @@ class MotionType(models.Model):
     description = models.TextField(blank=True)
     # 개선 사항: 미리 계산된 max_dtw_distance 값을 저장할 필드
     max_dtw_distance = models.FloatField(default=1000.0, help_text="점수 정규화를 위한 최대 DTW 거리")
+    # 평가 방식: 모든 모범 동작과의 평균(average) 또는 가장 가까운 k개 모범 동작과의 평균(nearest_k)
+    # nearest_k 방식은 LB_Keogh 하한으로 결과에 영향을 줄 수 없는 DTW 계산을 건너뛸 수 있음
+    evaluation_mode = models.CharField(
+        max_length=20,
+        choices=[("average", "전체 평균"), ("nearest_k", "가까운 k개 평균")],
+        default="average",
+    )
+    nearest_k = models.PositiveSmallIntegerField(default=3, help_text="nearest_k 방식에서 사용할 모범 동작 개수")
+    # DTW 계산 방식 (ai/dtw_engine.py): 정확한 DTW(exact) 또는 저해상도로 먼저 정렬하고 그 주변만 계산(coarse_to_fine)
+    # coarse_to_fine은 긴 녹화(수천 프레임)에서 빠르고, 거리는 exact와 같거나 조금 큼
+    dtw_engine = models.CharField(
+        max_length=20,
+        choices=[("exact", "정확한 DTW"), ("coarse_to_fine", "저해상도 정렬 후 보정")],
+        default="exact",
+    )
+    # 비교할 모범 동작 집합: 모든 모범 동작(all) 또는 모범 동작을 묶어서 만든 DBA 템플릿(templates)
+    # templates 방식은 모범 동작 N개 대신 template_count개 템플릿과만 비교하므로, 모범 동작이 많은 동작에서 빨라짐
+    reference_set = models.CharField(
+        max_length=20,
+        choices=[("all", "전체 모범 동작"), ("templates", "DBA 템플릿")],
+        default="all",
+    )
+    template_count = models.PositiveSmallIntegerField(default=4, help_text="templates 방식에서 만들 템플릿 개수")
+    # 모범 동작 데이터가 바뀔 때마다 1씩 증가 -> 워커별 평가기 캐시가 오래된 데이터를 쓰지 않도록 비교용으로 사용
+    reference_version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.motion_name
@@ -59,17 +85,64 @@ class MotionRecording(models.Model):
     recorded_at = models.DateTimeField(auto_now_add=True)
     data_frames = models.IntegerField()
     score_category = models.CharField(max_length=20, choices=[("reference", "모범 동작"), ("zero_score", "0점 동작")])
-    sensor_data_json = models.JSONField()
+    # 예전 형식: 전처리된 센서 데이터를 JSON 리스트로 저장 (backfill_sensor_data 명령으로 바이너리로 옮길 수 있음)
+    sensor_data_json = models.JSONField(null=True, blank=True)
+    # 새 형식: float32 배열 + 모양/채널 이름 메타데이터 (ai/sensor_codec.py 참고)
+    sensor_data_blob = models.BinaryField(null=True, blank=True)
 
-    # json 형태의 원본 센서 데이터를 numpy 배열 형식의 데이터로 반환
+    def set_sensor_data(self, data, channels=None, compress: bool = False):
+        """전처리된 numpy 배열을 바이너리 형식으로 저장"""
+        from .sensor_codec import encode
+        self.sensor_data_blob = encode(data, channels, compress=compress)
+        self.sensor_data_json = None
+
+    # 저장된 센서 데이터를 numpy 배열 형식의 데이터로 반환
     def get_sensor_data_to_numpy(self):
         import numpy as np
-        import pandas as pd
+        if self.sensor_data_blob:
+            from .sensor_codec import decode
+            data, _ = decode(self.sensor_data_blob)  # 복사/파싱 없이 np.frombuffer로 바로 읽음
+            return data
         if self.sensor_data_json:
-            df = pd.DataFrame(self.sensor_data_json)
-            return df.values # dataframe to numpy
+            return np.asarray(self.sensor_data_json, dtype=np.float64)
         return np.array([])
 
+class MotionPairDistance(models.Model):
+    """
+    모범 동작 녹화 × 0점 동작 녹화 한 쌍의 DTW 거리
+    max_dtw_distance를 재계산할 때 새 녹화와 관련된 쌍만 계산하도록 결과를 보관하는 행렬
+    녹화 데이터가 삭제되면 CASCADE로 함께 삭제됨
+    """
+    motion_type = models.ForeignKey(MotionType, on_delete=models.CASCADE, related_name="pair_distances")
+    reference = models.ForeignKey(MotionRecording, on_delete=models.CASCADE, related_name="+")
+    zero_score = models.ForeignKey(MotionRecording, on_delete=models.CASCADE, related_name="+")
+    distance = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["reference", "zero_score"], name="uq_ai_pair_distance_recordings")
+        ]
+
+    def __str__(self):
+        return f"{self.reference_id} × {self.zero_score_id}: {self.distance}"
+
+class MotionTemplate(models.Model):
+    """
+    모범 동작들을 군집으로 묶고, 군집마다 DBA(DTW Barycenter Averaging)로 만든 평균 동작 (ai/motion_templates.py 참고)
+    MotionType.reference_set이 templates이면 평가 시 모범 동작 대신 이 템플릿들과 비교함
+    """
+    motion_type = models.ForeignKey(MotionType, on_delete=models.CASCADE, related_name="templates")
+    # MotionRecording.sensor_data_blob과 같은 형식 (ai/sensor_codec.py)
+    sensor_data_blob = models.BinaryField()
+    data_frames = models.PositiveIntegerField()
+    member_count = models.PositiveIntegerField(help_text="이 템플릿으로 묶인 모범 동작 수")
+    # 템플릿을 만들 때의 MotionType.reference_version (다르면 모범 동작이 바뀐 것이므로 사용하지 않음)
+    reference_version = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.motion_type_id} 템플릿 #{self.pk} ({self.member_count}개, v{self.reference_version})"
+
 # 사용자 평가 결과 저장 모델
 class UserRecording(models.Model):
     """
@@ -77,9 +150,185 @@ class UserRecording(models.Model):
     """
     # 개선 사항: user 필드를 Django 기본 User가 아닌 Employee 모델로 변경
     user = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="motion_recordings")
+    # 직원의 회사 (회사 전체 평가 기록을 최신순으로 조회할 때 직원 테이블 조인 없이 인덱스만 읽도록 함께 저장)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="motion_recordings", null=True, blank=True)
     motion_type = models.ForeignKey(MotionType, on_delete=models.CASCADE)
     score = models.FloatField()
-    recorded_at = models.DateTimeField(auto_now_add=True)
+    # 지연 저장(ai/recording_buffer.py) 시 평가한 시각을 그대로 남기기 위해 auto_now_add 대신 기본값 사용
+    recorded_at = models.DateTimeField(default=timezone.now)
+    # 지연 저장 시 스풀 파일의 결과마다 붙이는 ID (같은 스풀 파일을 다시 저장해도 중복되지 않도록)
+    spool_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+
+    class Meta:
+        # 평가 기록 조회 API(GET /api/ai/history/)의 키셋 페이지네이션용 인덱스: (조건 필드, recorded_at, id) 순서
+        indexes = [
+            models.Index(fields=["company", "recorded_at", "id"], name="ai_rec_company_time_idx"),
+            models.Index(fields=["user", "recorded_at", "id"], name="ai_rec_user_time_idx"),
+            models.Index(fields=["user", "motion_type", "recorded_at", "id"], name="ai_rec_user_motion_time_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        """회사를 지정하지 않았으면 직원의 회사로 채워서 저장 (bulk_create는 호출하는 쪽에서 채워야 함)"""
+        if self.company_id is None and self.user_id is not None:
+            self.company_id = Employee.objects.filter(pk=self.user_id).values_list("company_id", flat=True).first()
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.user.name} - {self.motion_type.motion_name} ({self.score})"
+
+# 평가 결과 집계 모델 (회사 × 동작 × 일/주 단위)
+class ScoreRollup(models.Model):
+    """
+    UserRecording을 회사, 동작, 기간(일/주)별로 미리 합쳐둔 집계 (ai/rollups.py 참고)
+    평가 결과를 저장할 때 같은 트랜잭션 안에서 갱신하므로, 추이/합격률 조회 시 원본 기록을 훑지 않아도 됨
+    python manage.py rebuild_score_rollups 로 원본 기록에서 다시 계산할 수 있음
+    """
+    PERIOD_DAY = "day"
+    PERIOD_WEEK = "week"
+    PERIOD_CHOICES = [(PERIOD_DAY, "일"), (PERIOD_WEEK, "주")]
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="score_rollups")
+    motion_type = models.ForeignKey(MotionType, on_delete=models.CASCADE, related_name="score_rollups")
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    # 기간의 시작 날짜 (주 단위는 월요일, TIME_ZONE 기준)
+    bucket_start = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0.0)
+    score_min = models.FloatField(null=True, blank=True)
+    score_max = models.FloatField(null=True, blank=True)
+    # AI_PASS_SCORE 이상인 평가 수 (기준을 바꾸면 rebuild_score_rollups로 다시 계산)
+    pass_count = models.PositiveIntegerField(default=0)
+    # 10점 단위 점수 분포 0~10, 10~20, ..., 90~100 (100점은 마지막 칸)
+    # 평가를 저장할 때 UPDATE 한 번으로 더할 수 있도록 JSON 배열이 아니라 칸마다 정수 컬럼으로 둠
+    bin_0 = models.PositiveIntegerField(default=0)
+    bin_1 = models.PositiveIntegerField(default=0)
+    bin_2 = models.PositiveIntegerField(default=0)
+    bin_3 = models.PositiveIntegerField(default=0)
+    bin_4 = models.PositiveIntegerField(default=0)
+    bin_5 = models.PositiveIntegerField(default=0)
+    bin_6 = models.PositiveIntegerField(default=0)
+    bin_7 = models.PositiveIntegerField(default=0)
+    bin_8 = models.PositiveIntegerField(default=0)
+    bin_9 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company", "period", "bucket_start", "motion_type"], name="uq_ai_score_rollup_bucket"
+            )
+        ]
+
+    @property
+    def histogram(self) -> list:
+        return [getattr(self, f"bin_{index}") for index in range(10)]
+
+    def __str__(self):
+        return f"{self.company_id} - {self.motion_type_id} {self.period} {self.bucket_start} ({self.count})"
+
+# 스트리밍 평가 세션 모델
+class EvaluationSession(models.Model):
+    """
+    Unity가 동작을 하는 동안 센서 데이터를 조각(chunk)으로 나눠 보내는 평가 세션.
+    조각이 도착할 때마다 전처리해두고, finalize 시에는 남은 끝부분 전처리와 DTW 비교만 수행 (ai/sessions.py 참고)
+    """
+    STATUS_OPEN = "open"
+    STATUS_FINALIZED = "finalized"
+    STATUS_CHOICES = [(STATUS_OPEN, "진행 중"), (STATUS_FINALIZED, "완료")]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    device = models.ForeignKey(SensorDevice, on_delete=models.CASCADE, related_name="evaluation_sessions")
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="evaluation_sessions")
+    motion_type = models.ForeignKey(MotionType, on_delete=models.CASCADE, related_name="evaluation_sessions")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_OPEN)
+    # 다음에 받아야 할 조각 번호 (재전송된 조각을 구분하기 위함)
+    next_seq = models.PositiveIntegerField(default=0)
+    # 스트리밍 전처리 상태: 채널 이름, 받은/전처리한 프레임 수, 마지막 11프레임의 원본 값(float64 바이트)
+    channels = models.JSONField(default=list, blank=True)
+    frames_received = models.PositiveIntegerField(default=0)
+    frames_emitted = models.PositiveIntegerField(default=0)
+    tail = models.BinaryField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.motion_type_id} ({self.status})"
+
+
+class EvaluationSessionChunk(models.Model):
+    """
+    세션 조각별 전처리가 끝난 프레임 (float64 바이트, 프레임 수 × 채널 수)
+    """
+    session = models.ForeignKey(EvaluationSession, on_delete=models.CASCADE, related_name="chunks")
+    seq = models.PositiveIntegerField()
+    frames = models.PositiveIntegerField()
+    data = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["session", "seq"], name="uq_ai_session_chunk_seq")
+        ]
+
+
+# 백그라운드 작업 큐 모델 (별도 브로커 없이 DB 테이블을 큐로 사용)
+class Job(models.Model):
+    """
+    max_dtw_distance 재계산처럼 오래 걸리는 AI 작업을 요청과 분리해서 실행하기 위한 작업 기록.
+    manage.py run_ai_worker가 pending 상태의 작업을 가져가서 실행함 (ai/jobs.py 참고)
+    """
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "대기"),
+        (STATUS_RUNNING, "실행 중"),
+        (STATUS_SUCCEEDED, "완료"),
+        (STATUS_FAILED, "실패"),
+    ]
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    # 같은 dedup_key를 가진 대기 중인 작업이 있으면 새로 만들지 않고 합침
+    dedup_key = models.CharField(max_length=200, blank=True, db_index=True)
+    # 대기(pending) 중인 동안만 dedup_key와 같은 값, 그 외에는 NULL.
+    # 유일 인덱스라서 동시에 등록해도 같은 키의 대기 작업은 하나만 생김 (MySQL은 조건부 유일 제약을 지원하지 않음)
+    pending_key = models.CharField(max_length=200, null=True, blank=True, unique=True)
+    # 작업을 등록한 회사들 (API로는 이 회사들만 작업 상태를 조회할 수 있음, 시그널로 등록된 작업은 비어 있음)
+    requested_by = models.ManyToManyField(Company, blank=True, related_name="+")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+    # 재시도 시 이 시각 이후에만 다시 실행
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # 실행 중인 워커가 주기적으로 갱신. 이 값이 JOB_LEASE보다 오래되면 워커가 죽은 것으로 봄
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="ai_job_status_run_after_idx"),
+        ]
+        ordering = ["-created_at", "-id"]
+
+    def __str__(self):
+        return f"[{self.kind}] #{self.id} ({self.status})"
+
+
+# 프로세스별 메모리 캐시 무효화용 버전 카운터 (ai/cache_versions.py 참고)
+class CacheVersion(models.Model):
+    """
+    캐시 이름(key)별 버전. 캐시 대상 데이터가 바뀌면 같은 트랜잭션 안에서 버전을 올리고,
+    각 워커 프로세스는 주기적으로 버전을 확인해서 바뀐 캐시를 비움
+    """
+    key = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"{self.user.name} - {self.motion_type.motion_name} ({self.score})"
\ No newline at end of file
+        return f"{self.key} (v{self.version})"
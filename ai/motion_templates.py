@@ -0,0 +1,171 @@
+# ai/motion_templates.py
+# 모범 동작이 많은 동작(MotionType)을 위한 DBA 템플릿 만들기/불러오기/검증
+#
+# reference_set이 templates인 동작은 평가할 때 모범 동작 N개 대신 template_count개 템플릿과만 비교함
+# - 템플릿은 작업 큐(ai/jobs.py)에서 만듦: 모범 동작이 바뀌어 reference_version이 올라가면 자동으로 다시 만들 작업이 등록됨
+# - 만든 템플릿은 reference_version을 한 번 더 올린 값으로 저장 -> 모든 워커의 평가기 캐시가 템플릿으로 바뀜
+# - 템플릿이 아직 없거나 오래되었으면(버전이 다르면) 평가기는 모든 모범 동작을 그대로 사용함
+# - 템플릿을 저장하면 max_dtw_distance를 템플릿 × 0점 동작 거리로 다시 보정하는 작업도 등록함 (ai/logic.py)
+# - evaluate_templates: 모범 동작 일부를 떼어내서, 템플릿 점수가 전체 모범 동작 점수와 얼마나 같은지 확인
+
+import random
+import time
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F
+
+from .context import bump_motion_types_version
+from .dba import build_templates
+from .dtw_engine import envelope
+from .jobs import enqueue_recalibration
+from .models import MotionRecording, MotionTemplate, MotionType
+from .scoring import score_motion
+from .sensor_codec import decode, encode
+
+
+def load_templates(motion_name: str, reference_version=None) -> list:
+    """
+    평가에 쓸 템플릿 배열 리스트. templates 방식이 아니거나 최신 템플릿이 없으면 빈 리스트
+    reference_version을 넘겨주지 않으면 DB의 MotionType.reference_version과 비교함
+    """
+    queryset = MotionTemplate.objects.filter(
+        motion_type__motion_name=motion_name, motion_type__reference_set="templates"
+    )
+    if reference_version is None:
+        queryset = queryset.filter(reference_version=F("motion_type__reference_version"))
+    else:
+        queryset = queryset.filter(reference_version=reference_version)
+    return [decode(blob)[0] for blob in queryset.order_by("pk").values_list("sensor_data_blob", flat=True)]
+
+
+def _load_recordings(motion_type_id: int, score_category: str) -> tuple:
+    """(배열 리스트, 채널 이름 리스트)"""
+    arrays, channels = [], []
+    queryset = (
+        MotionRecording.objects.filter(motion_type_id=motion_type_id, score_category=score_category)
+        .order_by("pk")
+        .only("pk", "sensor_data_blob", "sensor_data_json")
+    )
+    for record in queryset.iterator(chunk_size=100):
+        if record.sensor_data_blob and not channels:
+            channels = decode(record.sensor_data_blob)[1]
+        data = record.get_sensor_data_to_numpy()
+        if data.ndim == 2 and data.size > 0:
+            arrays.append(data)
+    return arrays, channels
+
+
+def rebuild_templates(motion_type_id: int) -> int:
+    """
+    동작의 템플릿을 새로 만들고 저장한 템플릿 수를 반환
+    만드는 동안 모범 동작이 바뀌었으면 저장하지 않고 -1을 반환 (버전을 올린 쪽이 새 작업을 등록해 둠)
+    """
+    # 버전을 먼저 읽어야, 그 사이 모범 동작이 바뀐 것을 저장 직전에 알아챌 수 있음
+    row = (
+        MotionType.objects.filter(pk=motion_type_id)
+        .values_list("reference_version", "template_count", "reference_set")
+        .first()
+    )
+    # 그 사이 동작이 삭제되었거나 all 방식으로 바뀐 경우 할 일이 없음
+    if row is None or row[2] != "templates":
+        return 0
+    version, template_count, _ = row
+    references, channels = _load_recordings(motion_type_id, "reference")
+    templates = build_templates(references, max(1, template_count))
+
+    with transaction.atomic():
+        motion_type = MotionType.objects.select_for_update().filter(pk=motion_type_id).first()
+        if motion_type is None or motion_type.reference_version != version:
+            print(f"[Error] 동작 {motion_type_id}의 모범 동작이 템플릿을 만드는 중에 바뀌어 저장하지 않았습니다.")
+            return -1
+        # 버전을 올려서 모든 워커의 평가기 캐시가 새 템플릿으로 다시 만들어지도록 함
+        new_version = version + 1
+        MotionType.objects.filter(pk=motion_type_id).update(reference_version=new_version)
+        MotionTemplate.objects.filter(motion_type_id=motion_type_id).delete()
+        MotionTemplate.objects.bulk_create(
+            MotionTemplate(
+                motion_type_id=motion_type_id,
+                sensor_data_blob=encode(template, channels if len(channels) == template.shape[1] else None),
+                data_frames=template.shape[0],
+                member_count=len(members),
+                reference_version=new_version,
+            )
+            for template, members in templates
+        )
+        bump_motion_types_version()
+        # 평가기가 비교할 대상이 바뀌었으므로 0점 기준(max_dtw_distance)도 템플릿 기준으로 다시 보정
+        enqueue_recalibration(motion_type)
+    print(f"동작 {motion_type_id}: 모범 동작 {len(references)}개로 템플릿 {len(templates)}개를 만들었습니다.")
+    return len(templates)
+
+
+def compare_scores(references: list, queries: list, template_count: int, max_dtw_distance: float,
+                   mode: str = "average", k: int = 3, engine: str = "exact") -> dict:
+    """
+    references로 템플릿을 만들고, queries 각각을 (전체 references)와 (템플릿)으로 평가해서 점수 차이와 소요 시간을 비교
+    DB에 의존하지 않으므로 벤치마크에서도 사용함
+    """
+    started = time.perf_counter()
+    templates = [template for template, _ in build_templates(references, template_count)]
+    build_seconds = time.perf_counter() - started
+
+    candidates = {
+        "full": (references, [envelope(data) for data in references]),
+        "templates": (templates, [envelope(data) for data in templates]),
+    }
+    scores = {name: [] for name in candidates}
+    seconds = {name: 0.0 for name in candidates}
+    for query in queries:
+        for name, (arrays, envelopes) in candidates.items():
+            started = time.perf_counter()
+            result = score_motion(query, arrays, envelopes, max_dtw_distance, mode=mode, k=k, engine=engine)
+            seconds[name] += time.perf_counter() - started
+            if "error" in result:
+                raise ValueError(result["error"])
+            scores[name].append(result["score"])
+
+    full, approx = np.array(scores["full"]), np.array(scores["templates"])
+    differences = np.abs(approx - full)
+    correlation = None
+    if len(queries) > 1 and full.std() > 0 and approx.std() > 0:
+        correlation = float(np.corrcoef(full, approx)[0, 1])
+    return {
+        "references": len(references),
+        "templates": len(templates),
+        "queries": len(queries),
+        "mean_abs_diff": float(differences.mean()) if len(queries) else 0.0,
+        "max_abs_diff": float(differences.max()) if len(queries) else 0.0,
+        "mean_bias": float((approx - full).mean()) if len(queries) else 0.0,
+        "correlation": correlation,
+        "build_seconds": build_seconds,
+        "full_seconds": seconds["full"],
+        "template_seconds": seconds["templates"],
+        "speedup": seconds["full"] / seconds["templates"] if seconds["templates"] else None,
+    }
+
+
+def evaluate_templates(motion_type: MotionType, holdout: float = 0.2, seed: int = 0) -> dict:
+    """
+    모범 동작 중 holdout 비율만큼을 떼어내고, 나머지로 만든 템플릿 점수가 전체 모범 동작 점수를 얼마나 따라가는지 확인
+    떼어낸 모범 동작(좋은 동작)과 0점 동작(실패한 동작)을 모두 평가 대상으로 사용 (DB의 템플릿은 바꾸지 않음)
+    """
+    references, _ = _load_recordings(motion_type.pk, "reference")
+    zero_scores, _ = _load_recordings(motion_type.pk, "zero_score")
+    if len(references) < 2:
+        return {"error": "모범 동작이 2개 이상 있어야 검증할 수 있습니다."}
+
+    order = list(range(len(references)))
+    random.Random(seed).shuffle(order)
+    held_out = max(1, int(round(len(references) * holdout)))
+    queries = [references[index] for index in order[:held_out]] + zero_scores
+    training = [references[index] for index in order[held_out:]]
+    return compare_scores(
+        training,
+        queries,
+        motion_type.template_count,
+        motion_type.max_dtw_distance,
+        mode=motion_type.evaluation_mode,
+        k=motion_type.nearest_k,
+        engine=motion_type.dtw_engine,
+    )
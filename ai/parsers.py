@@ -0,0 +1,13 @@
+# ai/parsers.py
+from rest_framework.parsers import BaseParser
+
+
+class SensorBinaryParser(BaseParser):
+    """
+    application/octet-stream 본문을 그대로 bytes로 넘겨주는 파서
+    본문 형식은 ai/sensor_codec.py의 바이너리 포맷 (헤더 + float32 리틀엔디언 배열)
+    """
+    media_type = "application/octet-stream"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream.read() if stream is not None else b""
@@ -1,6 +1,10 @@
 # ai/permissions.py
+import hmac
+
+from django.conf import settings
 from rest_framework.permissions import BasePermission
-from .models import SensorDevice
+from .auth_cache import api_key_cache
+from .metrics import stage_seconds
 
 class HasValidAPIKey(BasePermission):
     """
@@ -16,16 +20,16 @@ class HasValidAPIKey(BasePermission):
             return False
 
         # 해당 API 키를 가진 활성화된 SensorDevice가 존재하는지 확인
-        try:
-            # select_related: SensorDevice를 찾을 건데, 연결된 company 정보도 바로 쓸 거니까, 한 번에 두 테이블을 합쳐서 달라고 하는 것과 같음
-            # SensorDevice 객체에 접근하는 것은 O(1)이나, company(외래키)를 사용할 때는 O(N)만큼의 시간 복잡도가 발생함(조인)
-            device = SensorDevice.objects.select_related('company').get(api_key=api_key, is_active=True)
-            # view나 request 객체에 device와 company 정보를 추가해두면 다음 단계에서 유용하게 사용 가능
-            request.device = device
-            request.company = device.company
-        except SensorDevice.DoesNotExist:
+        # 요청마다 DB를 조회하지 않도록 프로세스 메모리 캐시(ai/auth_cache.py)를 먼저 확인함
+        # (캐시에 없을 때는 select_related('company')로 SensorDevice와 회사 정보를 한 번에 조회)
+        with stage_seconds.time("auth"):
+            device = api_key_cache.get_device(api_key)
+        if device is None:
             return False
-        
+
+        # view나 request 객체에 device와 company 정보를 추가해두면 다음 단계에서 유용하게 사용 가능
+        request.device = device
+        request.company = device.company
         return True
 
 
@@ -34,4 +38,18 @@ class IsCompanySession(BasePermission):
     요청자가 인증된 회사 계정(JWT 로그인)인지 확인
     """
     def has_permission(self, request, view):
-        return bool(request.user and request.user.is_authenticated)
\ No newline at end of file
+        return bool(request.user and request.user.is_authenticated)
+
+
+class HasMetricsToken(BasePermission):
+    """
+    Authorization: Bearer <AI_METRICS_TOKEN> 헤더가 일치해야 지표를 볼 수 있음
+    토큰을 설정하지 않으면 거부함. 내부망의 Prometheus가 인증 없이 수집해야 하면 AI_METRICS_ALLOW_ANONYMOUS를 켬
+    """
+    message = "지표 조회 토큰이 올바르지 않습니다."
+
+    def has_permission(self, request, view):
+        token = getattr(settings, "AI_METRICS_TOKEN", None)
+        if not token:
+            return bool(getattr(settings, "AI_METRICS_ALLOW_ANONYMOUS", False))
+        return hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
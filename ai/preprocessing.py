@@ -0,0 +1,218 @@
+# ai/preprocessing.py
+# pandas/scipy 없이 numpy만으로 센서 데이터를 전처리하는 엔진
+#
+# 기존 방식(pandas DataFrame → 컬럼별 savgol_filter → 컬럼별 정규화)과 같은 결과를 내되,
+#   1. 프레임 딕셔너리 리스트를 (프레임 수 × 채널 수) 배열로 한 번만 변환하고
+#   2. 윈도우 길이별로 미리 계산한 Savitzky–Golay 계수로 모든 채널을 한 번에 필터링하고
+#   3. 채널별 (offset, scale) 벡터로 브로드캐스트 정규화를 한 번에 수행한다.
+# scipy.signal.savgol_filter(mode="interp")와의 차이는 부동소수점 반올림 수준(1e-9 이내)이다.
+
+from functools import lru_cache
+from itertools import chain
+from operator import itemgetter
+
+import numpy as np
+
+# Savitzky–Golay 필터 설정 (기존 코드와 동일: 최대 11프레임, 3차 다항식)
+SAVGOL_MAX_WINDOW = 11
+SAVGOL_POLYORDER = 3
+
+# 센서 이름에 포함된 키워드별 (최소값, 최대값) 범위
+# 다른 센서가 추가되면 여기에 범위를 추가!
+SENSOR_RANGES = (
+    ("flex", 0.0, 100.0),
+    ("gyro", -30.0, 30.0),
+)
+
+
+def resolve_window_length(num_frames: int) -> int:
+    """
+    데이터 길이에 맞는 필터 윈도우 길이(홀수)를 반환
+    데이터 길이가 필터 윈도우 길이보다 짧으면 오류가 나므로, 최소값을 보장
+    """
+    window_length = min(num_frames - (num_frames % 2 == 0), SAVGOL_MAX_WINDOW)
+    return max(window_length, 3)
+
+
+@lru_cache(maxsize=None)
+def savgol_projection(window_length: int, polyorder: int = SAVGOL_POLYORDER) -> np.ndarray:
+    """
+    윈도우 길이별 Savitzky–Golay 투영 행렬(window_length × window_length)을 계산해서 캐시함
+    - 가운데 행: 내부 프레임에 쓰는 일반적인 savgol 계수
+    - 위/아래 행: 양 끝 프레임에 쓰는 다항식 보간 계수 (scipy의 mode="interp"와 동일)
+    """
+    if polyorder >= window_length:
+        raise ValueError("polyorder는 window_length보다 작아야 합니다.")
+
+    positions = np.arange(window_length, dtype=np.float64)
+    vandermonde = np.vander(positions, polyorder + 1, increasing=True)
+    # 최소제곱 다항식 적합 후 같은 위치에서 다시 평가하는 행렬 (hat matrix)
+    projection = vandermonde @ np.linalg.pinv(vandermonde)
+    projection.setflags(write=False)
+    return projection
+
+
+def savgol_smooth(data: np.ndarray, window_length: int, polyorder: int = SAVGOL_POLYORDER) -> np.ndarray:
+    """
+    (프레임 수 × 채널 수) 배열의 모든 채널에 Savitzky–Golay 필터를 한 번에 적용
+    """
+    num_frames = data.shape[0]
+    if window_length > num_frames:
+        raise ValueError("window_length는 데이터 길이보다 클 수 없습니다.")
+
+    projection = savgol_projection(window_length, polyorder).astype(data.dtype, copy=False)
+    half = window_length // 2
+    smoothed = np.empty_like(data)
+
+    # 내부 프레임: 가운데 행 계수로 슬라이딩 윈도우 가중합
+    windows = np.lib.stride_tricks.sliding_window_view(data, window_length, axis=0)  # (n - w + 1, 채널, w)
+    smoothed[half:num_frames - half] = windows @ projection[half]
+
+    # 양 끝 프레임: 첫/마지막 윈도우에 다항식을 맞춰서 보간
+    smoothed[:half] = projection[:half] @ data[:window_length]
+    smoothed[num_frames - half:] = projection[half + 1:] @ data[num_frames - window_length:]
+    return smoothed
+
+
+def channel_affine(channels) -> tuple:
+    """
+    채널 이름 목록에 대한 정규화용 (offset, scale) 벡터를 반환
+    (현재 센서 값 - 센서의 최소 값) / 센서의 전체 범위 == (값 - offset) * scale
+    """
+    offsets = np.empty(len(channels), dtype=np.float64)
+    scales = np.empty(len(channels), dtype=np.float64)
+    for i, channel in enumerate(channels):
+        for keyword, s_min, s_max in SENSOR_RANGES:
+            if keyword in channel:
+                offsets[i] = s_min
+                scales[i] = 1.0 / (s_max - s_min)
+                break
+        else:
+            raise ValueError(f"'{channel}' 센서의 값 범위가 정의되어 있지 않습니다.")
+    return offsets, scales
+
+
+def frames_to_array(raw_data_dicts, channels=None, dtype=np.float64) -> tuple:
+    """
+    프레임 딕셔너리 리스트를 (프레임 수 × 채널 수)의 연속된 numpy 배열로 한 번에 변환
+    채널 순서는 첫 프레임의 키 순서를 따름
+    """
+    if channels is None:
+        channels = tuple(raw_data_dicts[0].keys())
+    getter = itemgetter(*channels)
+    values = map(getter, raw_data_dicts)
+    if len(channels) > 1:
+        # itemgetter가 프레임마다 튜플을 돌려주므로, 하나의 흐름으로 이어 붙여서 한 번에 변환
+        values = chain.from_iterable(values)
+    try:
+        flat = np.fromiter(values, dtype=dtype, count=len(raw_data_dicts) * len(channels))
+    except KeyError as e:
+        raise ValueError(f"일부 프레임에 {e} 센서 값이 없습니다.") from e
+    return flat.reshape(len(raw_data_dicts), len(channels)), tuple(channels)
+
+
+def preprocess_array(data: np.ndarray, channels, dtype=np.float64) -> np.ndarray:
+    """
+    이미 배열로 변환된 (프레임 수 × 채널 수) 센서 데이터를 필터링 + 정규화
+    """
+    data = np.ascontiguousarray(data, dtype=dtype)
+    if data.ndim != 2 or data.shape[0] == 0:
+        return np.array([])
+
+    window_length = resolve_window_length(data.shape[0])
+    smoothed = savgol_smooth(data, window_length)
+
+    offsets, scales = channel_affine(channels)
+    smoothed -= offsets.astype(dtype, copy=False)
+    smoothed *= scales.astype(dtype, copy=False)
+    return smoothed
+
+
+def preprocess_frames(raw_data_dicts, dtype=np.float64) -> np.ndarray:
+    """
+    클라이언트로부터 받은 센서 데이터(딕셔너리 리스트)를 전처리해서 numpy 배열로 반환
+    """
+    if not raw_data_dicts:
+        return np.array([])
+    data, channels = frames_to_array(raw_data_dicts, dtype=dtype)
+    return preprocess_array(data, channels, dtype=dtype)
+
+
+class StreamingPreprocessor:
+    """
+    프레임이 조각(chunk)으로 나뉘어 들어올 때 도착하는 대로 전처리하는 도구
+    전체 데이터를 한 번에 preprocess_frames로 처리한 결과와 같은 값을 만든다.
+
+    프레임이 SAVGOL_MAX_WINDOW(11)개 이상이면 윈도우 길이가 항상 11로 고정되므로,
+    - 앞쪽 5프레임: 처음 11프레임이 모이면 바로 계산
+    - 가운데 프레임: 앞뒤 5프레임씩 도착하면 바로 계산
+    - 마지막 5프레임: 끝을 알아야 하므로 finish()에서 계산
+    다음 조각을 위해 마지막 11프레임의 원본 값(tail)만 남겨둔다.
+    """
+
+    def __init__(self, channels=None, tail=None, frames_received: int = 0, frames_emitted: int = 0, dtype=np.float64):
+        self.channels = tuple(channels) if channels else None
+        self.dtype = dtype
+        self.tail = tail
+        self.frames_received = frames_received
+        self.frames_emitted = frames_emitted
+        if self.channels is not None:
+            self._offsets, self._scales = channel_affine(self.channels)
+
+    def _normalize(self, smoothed: np.ndarray) -> np.ndarray:
+        smoothed -= self._offsets.astype(self.dtype, copy=False)
+        smoothed *= self._scales.astype(self.dtype, copy=False)
+        return smoothed
+
+    def push(self, raw_data_dicts) -> np.ndarray:
+        """프레임 조각을 추가하고, 이번에 계산이 끝난 프레임들의 전처리 결과를 반환"""
+        window = SAVGOL_MAX_WINDOW
+        half = window // 2
+        if not raw_data_dicts:
+            return np.empty((0, len(self.channels or ())), dtype=self.dtype)
+
+        if self.channels is None:
+            data, channels = frames_to_array(raw_data_dicts, dtype=self.dtype)
+            # 알 수 없는 센서는 첫 조각에서 바로 오류로 알려줌
+            self._offsets, self._scales = channel_affine(channels)
+            self.channels = channels
+        else:
+            data, _ = frames_to_array(raw_data_dicts, channels=self.channels, dtype=self.dtype)
+
+        combined = data if self.tail is None else np.concatenate([self.tail, data])
+        # combined[0]의 전체 프레임 기준 위치
+        start = self.frames_received - (0 if self.tail is None else len(self.tail))
+        self.frames_received += len(data)
+        total = self.frames_received
+
+        outputs = []
+        if total >= window:
+            projection = savgol_projection(window).astype(self.dtype, copy=False)
+            if self.frames_emitted == 0:
+                # 11프레임이 처음 모인 시점: 앞쪽 가장자리 프레임 (이때 combined는 0번 프레임부터 들어 있음)
+                outputs.append(projection[:half] @ combined[:window])
+                self.frames_emitted = half
+            last_ready = total - half - 1
+            if last_ready >= self.frames_emitted:
+                segment = combined[self.frames_emitted - half - start:]
+                windows = np.lib.stride_tricks.sliding_window_view(segment, window, axis=0)
+                outputs.append(windows @ projection[half])
+                self.frames_emitted = last_ready + 1
+
+        self.tail = np.ascontiguousarray(combined[-window:])
+        if not outputs:
+            return np.empty((0, len(self.channels)), dtype=self.dtype)
+        return self._normalize(np.concatenate(outputs))
+
+    def finish(self) -> np.ndarray:
+        """마지막 조각까지 받은 뒤, 아직 계산하지 않은 끝부분 프레임의 전처리 결과를 반환"""
+        window = SAVGOL_MAX_WINDOW
+        half = window // 2
+        if self.frames_received == 0:
+            return np.array([])
+        if self.frames_received < window:
+            # 전체 길이가 짧으면 윈도우 길이가 달라지므로, 남아 있는 전체 원본으로 한 번에 계산
+            return preprocess_array(self.tail, self.channels, dtype=self.dtype)
+        projection = savgol_projection(window).astype(self.dtype, copy=False)
+        self.frames_emitted = self.frames_received
+        return self._normalize(projection[half + 1:] @ self.tail[-window:])
@@ -0,0 +1,380 @@
+# ai/recording_buffer.py
+# 평가 결과(UserRecording) 지연 저장(write-behind)
+#
+# AI_RECORDING_WRITE_BEHIND=True이면 평가 요청은 결과를 DB에 바로 INSERT하지 않고
+#   1. 로컬 스풀 파일(JSON Lines)에 한 줄 추가한 뒤 (프로세스가 죽어도 점수가 남도록)
+#   2. 메모리 버퍼에 쌓아두고 바로 응답함
+# 백그라운드 스레드가 버퍼가 차거나(AI_RECORDING_BUFFER_SIZE) 일정 시간이 지나면(AI_RECORDING_FLUSH_INTERVAL)
+# bulk_create 한 번으로 저장하고, 저장이 끝난 스풀 파일을 지움. 워커 종료 시(atexit)에도 남은 결과를 저장함
+#
+# - 스풀 파일은 프로세스마다 따로 만들고, 쓰는 동안 flock으로 잠가둠
+#   -> 잠기지 않은 스풀 파일은 죽은 프로세스가 남긴 것이므로 워커가 시작할 때(back/wsgi.py, back/asgi.py) 다시 저장(replay)
+# - DB 저장에 실패한 스풀 파일은 지우지 않고 다음 flush 때 다시 시도
+# - 각 결과에 spool_id(UUID)를 붙여 저장하므로, 같은 스풀 파일을 두 번 저장해도 중복 행이 생기지 않음
+# - 결과를 저장하는 트랜잭션에서 회사 × 동작 × 일/주 집계(ScoreRollup)도 함께 갱신함 (ai/rollups.py)
+# - 버퍼 대기 건수, 스풀 파일 크기, 저장 실패 수 등은 GET /api/ai/metrics/ 로 내보냄 (ai/metrics.py)
+
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from organizations.models import Employee
+from .metrics import registry
+from .models import UserRecording
+from .rollups import record_scores
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경: 파일 잠금 없이 동작 (프로세스 하나만 쓴다고 가정)
+    fcntl = None
+
+DEFAULT_BUFFER_SIZE = 200
+DEFAULT_FLUSH_INTERVAL = 1.0
+# 버퍼가 이 배수만큼 밀리면 (DB가 느려서 백그라운드 저장이 따라가지 못하면) 요청 스레드에서 직접 저장
+BACKPRESSURE_FACTOR = 4
+
+
+def _default_spool_dir() -> Path:
+    return Path(settings.BASE_DIR) / "var" / "recording_spool"
+
+
+def _read_spool(path) -> list:
+    records = []
+    try:
+        with open(path, encoding="utf-8") as spool:
+            for line in spool:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # 쓰는 도중 프로세스가 죽어 잘린 마지막 줄
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def _insert(records: list) -> int:
+    """스풀 결과를 저장하고 집계(ai/rollups.py)에 더함. 이미 저장된 spool_id는 건너뛰고, 새로 저장한 건수를 반환"""
+    if not records:
+        return 0
+    recordings = [
+        UserRecording(
+            spool_id=uuid.UUID(record["spool_id"]),
+            user_id=record["user_id"],
+            # 예전 스풀 파일에는 회사가 없으므로 아래에서 직원의 회사로 채움
+            company_id=record.get("company_id"),
+            motion_type_id=record["motion_type_id"],
+            score=record["score"],
+            recorded_at=datetime.fromisoformat(record["recorded_at"]),
+        )
+        for record in records
+    ]
+    with transaction.atomic():
+        # replay가 중복되어도 집계에 두 번 더하지 않도록, 이미 저장된 결과를 먼저 걸러냄
+        saved = set()
+        for start in range(0, len(recordings), 500):
+            saved.update(
+                UserRecording.objects.filter(
+                    spool_id__in=[recording.spool_id for recording in recordings[start:start + 500]]
+                ).values_list("spool_id", flat=True)
+            )
+        recordings = [recording for recording in recordings if recording.spool_id not in saved]
+        unknown = {recording.user_id for recording in recordings if recording.company_id is None}
+        if unknown:
+            companies = dict(Employee.objects.filter(pk__in=unknown).values_list("pk", "company_id"))
+            for recording in recordings:
+                if recording.company_id is None:
+                    recording.company_id = companies.get(recording.user_id)
+        UserRecording.objects.bulk_create(
+            recordings,
+            batch_size=500,
+            # 같은 스풀 파일은 flock으로 한 프로세스만 저장하지만, 혹시 겹쳐도 중복 행이 생기지 않도록 함
+            ignore_conflicts=True,
+        )
+        record_scores(recordings)
+    return len(recordings)
+
+
+class _SpoolSegment:
+    """스풀 파일 하나 (지울 때까지 열어두고 잠가둠)"""
+
+    def __init__(self, directory: Path):
+        name = f"{os.getpid()}-{uuid.uuid4().hex}"
+        # 잠그기 전에 다른 프로세스의 replay가 가져가지 않도록, 잠근 뒤에 .jsonl 이름으로 바꿈
+        temp_path = directory / f"{name}.tmp"
+        self.path = directory / f"{name}.jsonl"
+        self.file = open(temp_path, "a", encoding="utf-8")
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        os.replace(temp_path, self.path)
+        self.count = 0
+
+    def append(self, records: list, fsync: bool):
+        self.file.write("".join(json.dumps(record) + "\n" for record in records))
+        self.file.flush()
+        if fsync:
+            os.fsync(self.file.fileno())
+        self.count += len(records)
+
+    def remove(self):
+        if fcntl is not None:
+            # 잠금을 쥔 채로 지워서, 그 사이 다른 프로세스가 replay하지 않도록 함
+            self.path.unlink(missing_ok=True)
+            self.file.close()
+        else:
+            self.file.close()
+            self.path.unlink(missing_ok=True)
+
+    def release(self):
+        # 파일은 남겨두고 잠금만 풂 (다음 시작 때 replay)
+        self.file.close()
+
+
+class RecordingBuffer:
+    def __init__(self, spool_dir, max_size: int = DEFAULT_BUFFER_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, fsync: bool = False):
+        self.spool_dir = Path(spool_dir)
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._pending = []
+        self._segment = None
+        # DB 저장에 실패해서 다시 시도해야 하는 스풀 파일들
+        self._retry_segments = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+        # 통계
+        self.flushed = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def start(self):
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self._segment = _SpoolSegment(self.spool_dir)
+        self._thread = threading.Thread(target=self._run, name="recording-buffer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, user_id, motion_type_id, score: float, company_id=None):
+        self.extend([(user_id, motion_type_id, score, company_id)])
+
+    def extend(self, rows):
+        """(user_id, motion_type_id, score, company_id) 목록을 스풀 파일과 버퍼에 추가 (company_id는 None이어도 됨)"""
+        recorded_at = timezone.now().isoformat()
+        records = [
+            {
+                "spool_id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "company_id": company_id,
+                "motion_type_id": motion_type_id,
+                "score": float(score),
+                "recorded_at": recorded_at,
+            }
+            for user_id, motion_type_id, score, company_id in rows
+        ]
+        if not records:
+            return
+        with self._lock:
+            self._segment.append(records, self.fsync)
+            self._pending.extend(records)
+            depth = len(self._pending)
+        if depth >= self.max_size * BACKPRESSURE_FACTOR:
+            self.flush()
+        elif depth >= self.max_size:
+            self._wakeup.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._closed:
+                break
+            self.flush()
+
+    def flush(self) -> int:
+        """버퍼에 쌓인 결과(와 이전에 실패한 스풀 파일)를 DB에 저장하고, 저장한 건수를 반환"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                retry, self._retry_segments = self._retry_segments, []
+                segments = list(retry)
+                if self._segment.count:
+                    segments.append(self._segment)
+                    self._segment = _SpoolSegment(self.spool_dir)
+            if not segments:
+                return 0
+
+            records = batch + [record for segment in retry for record in _read_spool(segment.path)]
+            started = time.perf_counter()
+            try:
+                close_old_connections()
+                _insert(records)
+            except Exception as e:
+                with self._lock:
+                    self._retry_segments[:0] = segments
+                self.flush_failures += 1
+                print(f"[Error] 평가 기록 {len(records)}건 저장 실패 (스풀 파일에 보관 후 다시 시도): {e}")
+                return 0
+
+            for segment in segments:
+                segment.remove()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            flush_seconds.observe(elapsed_ms / 1000)
+            self.flushed += len(records)
+            self.flushes += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            return len(records)
+
+    def close(self):
+        """남은 결과를 저장하고 백그라운드 스레드를 멈춤 (워커 종료 시 atexit으로 호출)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+        with self._lock:
+            for segment in self._retry_segments:
+                segment.release()
+            if self._segment.count:
+                self._segment.release()
+            else:
+                self._segment.remove()
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> dict:
+        with self._lock:
+            segments = list(self._retry_segments)
+            if self._segment is not None:
+                segments.append(self._segment)
+            depth = len(self._pending)
+        spool_bytes = 0
+        for segment in segments:
+            try:
+                spool_bytes += segment.path.stat().st_size
+            except FileNotFoundError:
+                continue
+        return {
+            "depth": depth,
+            "retry_segments": len(segments) - (self._segment is not None),
+            "spool_bytes": spool_bytes,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+
+def replay_spool_dir(spool_dir=None, exclude=()) -> int:
+    """
+    스풀 디렉터리에서 다른 프로세스가 쓰고 있지 않은(잠기지 않은) 스풀 파일을 DB에 저장하고 지움
+    저장한 건수를 반환
+    """
+    spool_dir = Path(spool_dir or getattr(settings, "AI_RECORDING_SPOOL_DIR", None) or _default_spool_dir())
+    if not spool_dir.is_dir():
+        return 0
+    replayed = 0
+    for path in sorted(spool_dir.glob("*.jsonl")):
+        if path in exclude:
+            continue
+        try:
+            spool = open(path, "r+", encoding="utf-8")
+        except FileNotFoundError:
+            continue
+        with spool:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(spool, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # 살아 있는 프로세스가 쓰는 중
+                    continue
+            records = _read_spool(path)
+            try:
+                _insert(records)
+            except Exception as e:
+                print(f"[Error] 스풀 파일 {path.name} 복구 실패: {e}")
+                continue
+            path.unlink(missing_ok=True)
+            replayed += len(records)
+            replayed_records.inc(len(records))
+    if replayed:
+        print(f"스풀 파일에 남아 있던 평가 기록 {replayed}건을 저장했습니다.")
+    return replayed
+
+
+def replay_orphaned_spool() -> int:
+    """
+    죽은 워커가 남긴 스풀 파일을 저장 (AI_RECORDING_WRITE_BEHIND 설정이 켜져 있으면 back/wsgi.py, back/asgi.py에서 호출)
+    DB에 저장하지 못한 파일(마이그레이션 전 등)은 그대로 남겨두고 다음 시작 때 다시 시도함
+    """
+    from django.db import connections
+
+    replayed = replay_spool_dir()
+    # gunicorn --preload처럼 이 프로세스가 fork될 수 있으므로, 열어둔 DB 연결은 닫아둠
+    connections.close_all()
+    return replayed
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def _buffer_stat(key: str):
+    # 지연 저장 모드가 꺼져 있거나 아직 버퍼를 만들지 않았으면 0
+    return _buffer.stats()[key] if _buffer is not None else 0
+
+
+# GET /api/ai/metrics/ 로 내보내는 지연 저장 지표 (ai/metrics.py)
+flush_seconds = registry.histogram("glife_recording_flush_seconds", "평가 기록 bulk 저장(flush) 소요 시간")
+registry.callback("glife_recording_buffer_depth", "gauge", "DB 저장을 기다리는 평가 기록 수", lambda: _buffer_stat("depth"))
+registry.callback(
+    "glife_recording_spool_bytes", "gauge", "아직 지우지 않은 스풀 파일 크기(바이트)", lambda: _buffer_stat("spool_bytes")
+)
+registry.callback(
+    "glife_recording_retry_segments", "gauge", "DB 저장에 실패해서 다시 시도할 스풀 파일 수",
+    lambda: _buffer_stat("retry_segments"),
+)
+registry.callback("glife_recording_flushed_total", "counter", "DB에 저장한 평가 기록 수", lambda: _buffer_stat("flushed"))
+registry.callback(
+    "glife_recording_flush_failures_total", "counter", "DB 저장(flush) 실패 수", lambda: _buffer_stat("flush_failures")
+)
+replayed_records = registry.counter("glife_recording_replayed_total", "남은 스풀 파일에서 복구한 평가 기록 수")
+
+
+def get_recording_buffer():
+    """지연 저장 모드가 켜져 있으면 이 프로세스의 RecordingBuffer를, 아니면 None을 반환"""
+    global _buffer
+    if not getattr(settings, "AI_RECORDING_WRITE_BEHIND", False):
+        return None
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                buffer = RecordingBuffer(
+                    getattr(settings, "AI_RECORDING_SPOOL_DIR", None) or _default_spool_dir(),
+                    max_size=getattr(settings, "AI_RECORDING_BUFFER_SIZE", DEFAULT_BUFFER_SIZE),
+                    flush_interval=getattr(settings, "AI_RECORDING_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL),
+                    fsync=getattr(settings, "AI_RECORDING_SPOOL_FSYNC", False),
+                )
+                buffer.start()
+                _buffer = buffer
+    return _buffer
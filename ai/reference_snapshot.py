@@ -0,0 +1,276 @@
+# ai/reference_snapshot.py
+# 동작(MotionType)별 모범 동작 데이터를 파일 하나로 묶어두고 np.memmap으로 읽는 스냅샷
+#
+# 평가기(MotionEvaluator)를 만들 때마다 MotionRecording을 조회해서 배열과 엔벨로프를 다시 만드는 대신,
+# 미리 내보낸 스냅샷 파일을 memmap으로 열기만 함
+# - 같은 서버의 모든 워커 프로세스가 OS 페이지 캐시에 올라간 파일 하나를 함께 씀 (프로세스마다 복사본이 생기지 않음)
+# - 엔벨로프도 파일에 들어 있으므로, 처음 여는 비용은 파일을 여는 것 정도뿐임
+#
+# [파일]  magic(4) | 포맷 버전(1) | 빈 칸(3) | 인덱스 길이(4)      <- 리틀엔디언
+#         인덱스: utf-8 JSON (동작 이름, reference_version, DTW 윈도우, 녹화별 위치/모양)
+#         본문: 64바이트 경계에서 시작하는 float32 리틀엔디언 배열 (녹화 배열과 엔벨로프를 이어 붙임)
+#
+# 스냅샷에는 만들 때의 MotionType.reference_version이 기록되어 있어서,
+# 모범 동작이 바뀌어 버전이 올라가면 오래된 파일로 판단하고 다시 만듦
+# 0점 동작은 평가에 쓰이지 않으므로 (max_dtw 보정은 DB에서 읽음) 담지 않음
+# -> 0점 동작이 바뀌어도 reference_version은 그대로이므로, 담았다면 오래된 데이터가 남았을 것임
+#
+# 배열은 float32로 저장하므로, 아직 sensor_data_json(float64)으로만 남아 있는 옛 녹화는 DB에서 읽을 때와
+# 점수가 아주 조금 다를 수 있음 -> 스냅샷을 켜기 전에 python manage.py backfill_sensor_data 로 바이너리(float32)로 옮겨둘 것
+# (export_reference_snapshots는 옮기지 않은 모범 동작이 있으면 경고함)
+
+import json
+import os
+import struct
+import threading
+import uuid
+from pathlib import Path
+from urllib.parse import quote
+
+import numpy as np
+from django.conf import settings
+
+from .dtw_engine import DTW_WINDOW, envelope
+from .models import MotionRecording, MotionType
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경: 잠금 없이 동작 (같은 스냅샷을 여러 번 만들 수 있지만 결과는 같음)
+    fcntl = None
+
+MAGIC = b"GLRS"
+# 2: 0점 동작을 빼고 모범 동작만 담음 (1 형식 파일은 다시 만듦)
+FORMAT_VERSION = 2
+DTYPE = np.dtype("<f4")
+ALIGNMENT = 64
+SUFFIX = ".refs"
+
+_HEADER = struct.Struct("<4sB3xI")
+
+# 같은 프로세스 안에서 동시에 같은 스냅샷을 만들지 않도록 (프로세스 사이는 파일 잠금)
+_build_lock = threading.Lock()
+
+
+def snapshots_enabled() -> bool:
+    return getattr(settings, "AI_REFERENCE_SNAPSHOTS", False)
+
+
+def snapshot_dir(directory=None) -> Path:
+    return Path(
+        directory
+        or getattr(settings, "AI_REFERENCE_SNAPSHOT_DIR", None)
+        or Path(settings.BASE_DIR) / "var" / "reference_snapshots"
+    )
+
+
+def snapshot_path(motion_name: str, directory=None) -> Path:
+    # 동작 이름에 한글, 공백, / 등이 들어가도 파일 이름으로 쓸 수 있도록 퍼센트 인코딩
+    return snapshot_dir(directory) / f"{quote(motion_name, safe='')}{SUFFIX}"
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class ReferenceSnapshot:
+    """memmap으로 연 스냅샷 파일 하나 (배열들은 모두 파일을 그대로 가리키는 읽기 전용 view)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                raise ValueError("스냅샷 파일이 잘렸습니다.")
+            magic, version, index_length = _HEADER.unpack(header)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError("지원하지 않는 스냅샷 포맷입니다.")
+            index = json.loads(f.read(index_length).decode("utf-8"))
+
+        self.motion_name = index["motion_name"]
+        self.reference_version = index["reference_version"]
+        self.dtw_window = index["dtw_window"]
+        self.entries = index["recordings"]
+        size = index["size"]
+        if size:
+            self.data = np.memmap(self.path, dtype=DTYPE, mode="r", offset=_align(_HEADER.size + index_length), shape=(size,))
+        else:
+            self.data = np.empty(0, dtype=DTYPE)
+
+    def _view(self, offset: int, frames: int, channels: int) -> np.ndarray:
+        return self.data[offset:offset + frames * channels].reshape(frames, channels)
+
+    def recordings(self) -> list:
+        """모범 동작 녹화들의 (프레임 수 × 채널 수) 배열 리스트"""
+        return [self._view(entry["offset"], entry["frames"], entry["channels"]) for entry in self.entries]
+
+    def recording_ids(self) -> list:
+        return [entry["id"] for entry in self.entries]
+
+    def envelopes(self) -> list:
+        """모범 동작별 LB_Keogh 엔벨로프 (lower, upper) 리스트 (recordings()와 같은 순서)"""
+        return [
+            (
+                self._view(entry["lower"], entry["frames"], entry["channels"]),
+                self._view(entry["upper"], entry["frames"], entry["channels"]),
+            )
+            for entry in self.entries
+        ]
+
+    def is_current(self, reference_version) -> bool:
+        return self.reference_version == reference_version and self.dtw_window == DTW_WINDOW
+
+
+def _write_snapshot(path: Path, motion_name: str, reference_version, recordings) -> int:
+    """모범 동작 (id, 배열) 목록을 스냅샷 파일로 저장하고 녹화 수를 반환"""
+    entries = []
+    chunks = []
+    size = 0
+
+    def append(array) -> int:
+        nonlocal size
+        offset = size
+        chunks.append(np.ascontiguousarray(array, dtype=DTYPE))
+        size += array.size
+        return offset
+
+    for recording_id, data in recordings:
+        lower, upper = envelope(data)
+        entries.append({
+            "id": recording_id,
+            "frames": data.shape[0],
+            "channels": data.shape[1],
+            "offset": append(data),
+            "lower": append(lower),
+            "upper": append(upper),
+        })
+
+    index = json.dumps({
+        "motion_name": motion_name,
+        "reference_version": reference_version,
+        "dtw_window": DTW_WINDOW,
+        "size": size,
+        "recordings": entries,
+    }).encode("utf-8")
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(index))
+    padding = _align(len(header) + len(index)) - len(header) - len(index)
+
+    # 다른 이름으로 다 쓴 뒤 바꿔치기: 이미 옛 파일을 memmap으로 열어둔 프로세스는 옛 내용을 계속 읽을 수 있음
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}-{uuid.uuid4().hex}.tmp")
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(header)
+            f.write(index)
+            f.write(b"\0" * padding)
+            for chunk in chunks:
+                f.write(chunk.tobytes())
+        os.replace(temp_path, path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    return len(entries)
+
+
+def build_snapshot(motion_name: str, directory=None) -> int:
+    """DB에서 동작의 모범 동작 녹화를 읽어 스냅샷 파일을 새로 만들고, 담은 녹화 수를 반환"""
+    # 버전을 먼저 읽어야, 그 사이 녹화가 바뀌었을 때 (더 새로운 데이터 + 옛 버전)으로 기록되어 다음에 다시 만들어짐
+    reference_version = (
+        MotionType.objects.filter(motion_name=motion_name).values_list("reference_version", flat=True).first()
+    )
+    if reference_version is None:
+        raise MotionType.DoesNotExist(f"'{motion_name}' 동작이 없습니다.")
+
+    recordings = []
+    queryset = (
+        MotionRecording.objects.filter(motion_type__motion_name=motion_name, score_category="reference")
+        .order_by("pk")
+        .only("pk", "sensor_data_blob", "sensor_data_json")
+    )
+    for record in queryset.iterator(chunk_size=100):
+        data = record.get_sensor_data_to_numpy()
+        if data.ndim == 2 and data.size > 0:
+            recordings.append((record.pk, data))
+
+    path = snapshot_path(motion_name, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return _write_snapshot(path, motion_name, reference_version, recordings)
+
+
+def open_snapshot(motion_name: str, directory=None):
+    """스냅샷 파일을 열어서 반환. 없거나 읽을 수 없으면 None"""
+    path = snapshot_path(motion_name, directory)
+    try:
+        snapshot = ReferenceSnapshot(path)
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError, OSError) as e:
+        print(f"[Error] 스냅샷 파일 {path.name}을 읽을 수 없어 다시 만듭니다: {e}")
+        return None
+    if snapshot.motion_name != motion_name:
+        return None
+    return snapshot
+
+
+def get_snapshot(motion_name: str, reference_version=None, directory=None) -> ReferenceSnapshot:
+    """
+    최신 스냅샷을 반환. 파일이 없거나 reference_version이 다르면(오래된 파일) DB에서 다시 만듦
+    reference_version을 넘겨주지 않으면 DB에서 조회함
+    """
+    if reference_version is None:
+        reference_version = (
+            MotionType.objects.filter(motion_name=motion_name).values_list("reference_version", flat=True).first()
+        )
+    snapshot = open_snapshot(motion_name, directory)
+    if snapshot is not None and snapshot.is_current(reference_version):
+        return snapshot
+
+    path = snapshot_path(motion_name, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _build_lock, open(path.with_name(f".{path.name}.lock"), "a") as lock_file:
+        # 여러 워커가 동시에 오래된 파일을 발견해도 한 프로세스만 다시 만들고, 나머지는 그 결과를 읽음
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        snapshot = open_snapshot(motion_name, directory)
+        if snapshot is None or not snapshot.is_current(reference_version):
+            build_snapshot(motion_name, directory)
+            snapshot = open_snapshot(motion_name, directory)
+    if snapshot is None:
+        raise ValueError(f"'{motion_name}' 스냅샷을 만들지 못했습니다.")
+    return snapshot
+
+
+def legacy_json_recordings(motion_names=None) -> int:
+    """바이너리로 옮기지 않아 sensor_data_json(float64)만 있는 모범 동작 녹화 수"""
+    queryset = MotionRecording.objects.filter(
+        score_category="reference", sensor_data_blob__isnull=True, sensor_data_json__isnull=False
+    )
+    if motion_names:
+        queryset = queryset.filter(motion_type__motion_name__in=motion_names)
+    return queryset.count()
+
+
+def export_snapshots(motion_names=None, force: bool = False, directory=None) -> dict:
+    """
+    동작들의 스냅샷을 내보냄 (motion_names가 없으면 모든 동작)
+    이미 최신인 스냅샷은 건너뛰고(force=True면 모두 다시 만듦), 모든 동작을 내보낼 때는 삭제된 동작의 파일도 지움
+    """
+    motions = MotionType.objects.values_list("motion_name", "reference_version")
+    if motion_names:
+        motions = motions.filter(motion_name__in=motion_names)
+    motions = list(motions)
+
+    result = {"built": [], "skipped": [], "removed": []}
+    for motion_name, reference_version in motions:
+        snapshot = None if force else open_snapshot(motion_name, directory)
+        if snapshot is not None and snapshot.is_current(reference_version):
+            result["skipped"].append(motion_name)
+            continue
+        build_snapshot(motion_name, directory)
+        result["built"].append(motion_name)
+
+    if not motion_names:
+        known = {snapshot_path(motion_name, directory).name for motion_name, _ in motions}
+        for path in snapshot_dir(directory).glob(f"*{SUFFIX}"):
+            if path.name not in known:
+                path.unlink(missing_ok=True)
+                path.with_name(f".{path.name}.lock").unlink(missing_ok=True)
+                result["removed"].append(path.name)
+    return result
@@ -0,0 +1,265 @@
+# ai/rollups.py
+# 평가 결과(UserRecording)의 회사 × 동작 × 일/주 집계(ScoreRollup) 갱신, 재계산, 조회
+#
+# - record_scores: 평가 결과를 저장하는 모든 경로(단건 평가, 배치 평가, 세션 finalize, 지연 저장 flush)에서
+#   결과 저장과 같은 트랜잭션 안에서 호출함. 여러 건을 메모리에서 (회사, 동작, 기간, 시작 날짜)별로 먼저 합친 뒤
+#   집계 행마다 "UPDATE ... SET count = count + n, ..." 한 번으로 DB에서 더함 (없는 행은 ignore_conflicts로 만든 뒤 다시 UPDATE)
+#   -> 읽고 나서 쓰는 잠금(SELECT ... FOR UPDATE) 왕복이 없어서, 같은 회사/동작의 평가가 몰려도
+#      집계 행 잠금은 UPDATE 문이 실행되는 순간부터 커밋까지만 잡힘 (여러 워커가 동시에 더해도 값이 빠지지 않음)
+# - rebuild_rollups: 원본 기록을 DB에서 GROUP BY로 다시 집계 (AI_PASS_SCORE를 바꿨거나 집계가 어긋났을 때)
+#   직원이 삭제되어 CASCADE로 지워진 기록은 다시 집계하면 빠짐
+# - trends / pass_rates: 조회 범위의 집계 행만 읽으므로, 원본 기록 수와 관계없이 (기간 수 × 동작 수)에 비례
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DateField, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least, TruncDate, TruncWeek
+from django.utils import timezone
+
+from organizations.models import Employee
+from .models import ScoreRollup, UserRecording
+
+PERIODS = (ScoreRollup.PERIOD_DAY, ScoreRollup.PERIOD_WEEK)
+HISTOGRAM_BINS = 10
+HISTOGRAM_FIELDS = [f"bin_{index}" for index in range(HISTOGRAM_BINS)]
+DEFAULT_PASS_SCORE = 70.0
+# 한 번에 조회할 수 있는 최대 기간 수 (조회 비용이 원본 기록 수가 아니라 이 값에 비례)
+MAX_BUCKETS = 366
+
+
+def pass_score() -> float:
+    return float(getattr(settings, "AI_PASS_SCORE", DEFAULT_PASS_SCORE))
+
+
+def histogram_bin(score: float) -> int:
+    """10점 단위 점수 구간 번호 (100점은 마지막 구간)"""
+    return min(max(int(score // 10), 0), HISTOGRAM_BINS - 1)
+
+
+def bucket_start(value, period: str):
+    """datetime(또는 date)이 속한 기간의 시작 날짜 (TIME_ZONE 기준, 주 단위는 월요일)"""
+    if hasattr(value, "hour"):
+        value = timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    if period == ScoreRollup.PERIOD_WEEK:
+        return value - timedelta(days=value.weekday())
+    return value
+
+
+def _increment(key: tuple, delta: dict, now) -> int:
+    """집계 행 하나에 delta를 UPDATE 한 번으로 더하고, 갱신한 행 수(0 또는 1)를 반환"""
+    company_id, motion_type_id, period, start = key
+    score_min, score_max = Value(delta["score_min"]), Value(delta["score_max"])
+    return ScoreRollup.objects.filter(
+        company_id=company_id, motion_type_id=motion_type_id, period=period, bucket_start=start
+    ).update(
+        count=F("count") + delta["count"],
+        score_sum=F("score_sum") + delta["score_sum"],
+        score_min=Least(Coalesce("score_min", score_min), score_min),
+        score_max=Greatest(Coalesce("score_max", score_max), score_max),
+        pass_count=F("pass_count") + delta["pass_count"],
+        updated_at=now,
+        **{field: F(field) + added for field, added in zip(HISTOGRAM_FIELDS, delta["histogram"]) if added},
+    )
+
+
+def record_scores(recordings) -> int:
+    """
+    저장한 UserRecording들(company_id, user_id, motion_type_id, score, recorded_at만 사용)을 집계에 더하고,
+    갱신한 집계 행 수를 반환
+    결과 저장과 같은 트랜잭션 안에서 호출해야 저장과 집계가 함께 반영되거나 함께 취소됨
+    company_id가 비어 있는 기록만 직원 -> 회사를 조회함
+    """
+    recordings = list(recordings)
+    if not recordings:
+        return 0
+    companies = {recording.user_id: recording.company_id for recording in recordings if recording.company_id}
+    unknown = {recording.user_id for recording in recordings} - set(companies)
+    if unknown:
+        companies.update(Employee.objects.filter(pk__in=unknown).values_list("pk", "company_id"))
+    threshold = pass_score()
+
+    deltas = {}
+    for recording in recordings:
+        company = companies.get(recording.user_id)
+        if company is None:
+            continue
+        score = recording.score
+        for period in PERIODS:
+            key = (company, recording.motion_type_id, period, bucket_start(recording.recorded_at, period))
+            delta = deltas.get(key)
+            if delta is None:
+                delta = deltas[key] = {
+                    "count": 0, "score_sum": 0.0, "score_min": score, "score_max": score,
+                    "pass_count": 0, "histogram": [0] * HISTOGRAM_BINS,
+                }
+            delta["count"] += 1
+            delta["score_sum"] += score
+            delta["score_min"] = min(delta["score_min"], score)
+            delta["score_max"] = max(delta["score_max"], score)
+            delta["pass_count"] += score >= threshold
+            delta["histogram"][histogram_bin(score)] += 1
+    if not deltas:
+        return 0
+
+    # 항상 같은 순서로 갱신해서 워커끼리 교착 상태가 생기지 않도록 함
+    keys = sorted(deltas)
+    now = timezone.now()
+    with transaction.atomic(savepoint=False):
+        missing = [key for key in keys if not _increment(key, deltas[key], now)]
+        if missing:
+            # 처음 생기는 집계 행은 빈 값으로 만든 뒤 다시 더함 (다른 워커가 먼저 만들었으면 건너뜀)
+            ScoreRollup.objects.bulk_create(
+                [
+                    ScoreRollup(company_id=company, motion_type_id=motion_type_id, period=period, bucket_start=start)
+                    for company, motion_type_id, period, start in missing
+                ],
+                ignore_conflicts=True,
+            )
+            for key in missing:
+                _increment(key, deltas[key], now)
+    return len(keys)
+
+
+def _aggregate(queryset, period: str):
+    """원본 기록을 (회사, 동작, 기간 시작 날짜)별로 DB에서 집계"""
+    truncate = TruncDate("recorded_at") if period == ScoreRollup.PERIOD_DAY else TruncWeek(
+        "recorded_at", output_field=DateField()
+    )
+    bins = {
+        f"bin_{index}": Count(
+            "id",
+            filter=(Q(score__gte=index * 10) if index else Q())
+            & (Q(score__lt=(index + 1) * 10) if index < HISTOGRAM_BINS - 1 else Q()),
+        )
+        for index in range(HISTOGRAM_BINS)
+    }
+    return (
+        queryset.annotate(bucket=truncate)
+        .values("user__company_id", "motion_type_id", "bucket")
+        .annotate(
+            count=Count("id"),
+            score_sum=Sum("score"),
+            score_min=Min("score"),
+            score_max=Max("score"),
+            pass_count=Count("id", filter=Q(score__gte=pass_score())),
+            **bins,
+        )
+        .order_by()
+    )
+
+
+def rebuild_rollups(company_id=None) -> int:
+    """집계를 지우고 원본 기록에서 다시 계산해서, 만든 집계 행 수를 반환 (company_id를 주면 그 회사만)"""
+    recordings = UserRecording.objects.all()
+    rollups = ScoreRollup.objects.all()
+    if company_id is not None:
+        recordings = recordings.filter(user__company_id=company_id)
+        rollups = rollups.filter(company_id=company_id)
+
+    created = 0
+    with transaction.atomic():
+        rollups.delete()
+        for period in PERIODS:
+            batch = []
+            for row in _aggregate(recordings, period).iterator(chunk_size=2000):
+                batch.append(ScoreRollup(
+                    company_id=row["user__company_id"],
+                    motion_type_id=row["motion_type_id"],
+                    period=period,
+                    bucket_start=row["bucket"],
+                    count=row["count"],
+                    score_sum=row["score_sum"],
+                    score_min=row["score_min"],
+                    score_max=row["score_max"],
+                    pass_count=row["pass_count"],
+                    **{field: row[field] for field in HISTOGRAM_FIELDS},
+                ))
+                if len(batch) >= 1000:
+                    ScoreRollup.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            ScoreRollup.objects.bulk_create(batch)
+            created += len(batch)
+    return created
+
+
+def bucket_range(period: str, start, end) -> list:
+    """start~end를 포함하는 기간 시작 날짜 목록"""
+    step = timedelta(days=7 if period == ScoreRollup.PERIOD_WEEK else 1)
+    current, last = bucket_start(start, period), bucket_start(end, period)
+    buckets = []
+    while current <= last:
+        buckets.append(current)
+        current += step
+    return buckets
+
+
+def _summary(count: int, score_sum: float, score_min, score_max, pass_count: int) -> dict:
+    return {
+        "count": count,
+        "avgScore": score_sum / count if count else None,
+        "minScore": score_min,
+        "maxScore": score_max,
+        "passCount": pass_count,
+        "passRate": pass_count / count if count else None,
+    }
+
+
+def trends(company_id, period: str, start, end, motion_type_id=None) -> list:
+    """
+    기간별 평가 수, 평균/최저/최고 점수, 합격률, 점수 분포
+    motion_type_id가 없으면 모든 동작을 합침. 평가가 없는 기간도 count 0으로 채워서 반환
+    """
+    buckets = bucket_range(period, start, end)
+    rows = ScoreRollup.objects.filter(
+        company_id=company_id, period=period, bucket_start__gte=buckets[0], bucket_start__lte=buckets[-1]
+    )
+    if motion_type_id is not None:
+        rows = rows.filter(motion_type_id=motion_type_id)
+
+    # 동작별 집계 행을 기간별로 DB에서 합침
+    merged = {
+        row["bucket_start"]: row
+        for row in rows.values("bucket_start").annotate(
+            total=Sum("count"), score_total=Sum("score_sum"), lowest=Min("score_min"),
+            highest=Max("score_max"), passes=Sum("pass_count"),
+            **{f"{field}_total": Sum(field) for field in HISTOGRAM_FIELDS},
+        ).order_by()
+    }
+
+    result = []
+    for bucket in buckets:
+        row = merged.get(bucket)
+        if row is None:
+            result.append({"bucketStart": bucket, **_summary(0, 0.0, None, None, 0), "histogram": [0] * HISTOGRAM_BINS})
+            continue
+        result.append({
+            "bucketStart": bucket,
+            **_summary(row["total"], row["score_total"], row["lowest"], row["highest"], row["passes"]),
+            "histogram": [row[f"{field}_total"] for field in HISTOGRAM_FIELDS],
+        })
+    return result
+
+
+def pass_rates(company_id, start, end) -> list:
+    """start~end(날짜) 동안의 동작별 평가 수, 평균/최저/최고 점수, 합격률 (일 단위 집계를 DB에서 합침)"""
+    rows = (
+        ScoreRollup.objects.filter(
+            company_id=company_id, period=ScoreRollup.PERIOD_DAY, bucket_start__gte=start, bucket_start__lte=end
+        )
+        .values("motion_type__motion_name")
+        .annotate(
+            total=Sum("count"), score_total=Sum("score_sum"), lowest=Min("score_min"),
+            highest=Max("score_max"), passes=Sum("pass_count"),
+        )
+        .order_by("motion_type__motion_name")
+    )
+    return [
+        {
+            "motionName": row["motion_type__motion_name"],
+            **_summary(row["total"], row["score_total"], row["lowest"], row["highest"], row["passes"]),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,188 @@
+# ai/scoring.py
+# 전처리된 사용자 데이터와 모범 동작 배열만으로 점수를 계산하는 순수 함수들
+# DB/Django에 의존하지 않으므로 MotionEvaluator와 배치 평가용 프로세스 풀이 함께 사용함
+
+import heapq
+import math
+
+from .dtw_engine import DTW_ENGINES, dtw_distance, lb_keogh
+from .preprocessing import preprocess_array
+
+
+# 0점이 확정되었는지 판단할 때의 여유 비율
+# DTW 거리 계산(제곱합 후 sqrt)의 반올림 오차로, 실제로는 남은 예산 안에 드는 거리를 넘었다고 판단하지 않도록 함
+ABANDON_SLACK = 1e-9
+
+
+# 모든 모범 동작과의 dtw 거리를 계산 (average 방식)
+# budget(모범 동작 수 × max_dtw_distance)이 주어지면, 거리 합이 budget 이상이 되는 순간 0점이 확정됨
+# -> 모범 동작 i의 거리가 budget - (지금까지의 합) - (아직 비교하지 않은 모범 동작들의 LB_Keogh 하한 합)을 넘으면
+#    거리 합이 budget을 넘으므로, 그 값에서 dtw 계산을 멈추고 나머지 모범 동작도 비교하지 않음
+# (거리 리스트, 0점 확정 여부)를 반환
+def all_distances(user_data, references, stats, engine="exact", budget=None, lower_bounds=None):
+    dtw_distances = []
+    total = 0.0
+    remaining = sum(lower_bounds) if lower_bounds else 0.0
+    for index, ref_data in enumerate(references):
+        cutoff = None
+        if budget is not None:
+            lower_bound = lower_bounds[index] if lower_bounds else 0.0
+            remaining -= lower_bound
+            cutoff = (budget - total - remaining) * (1 + ABANDON_SLACK)
+            if cutoff <= lower_bound:
+                # 하한만으로도 예산을 넘으므로 계산하지 않음
+                stats["dtw_pruned"] += len(references) - index
+                return dtw_distances, True
+        try:
+            distance = dtw_distance(user_data, ref_data, max_dist=cutoff, engine=engine)
+            stats["dtw_calls"] += 1
+        except Exception as e:
+            print(f"dtw 거리 계산 중 오류 발생: {e}")
+            continue
+        if math.isinf(distance):
+            stats["dtw_abandoned"] += 1
+            return dtw_distances, True
+        dtw_distances.append(distance)
+        total += distance
+    return dtw_distances, False
+
+
+# 가장 가까운 k개 모범 동작과의 dtw 거리만 계산 (nearest_k 방식)
+# LB_Keogh 하한이 작은 순서대로 비교하다가, 하한이 현재 k번째 거리보다 크면 나머지는 모두 건너뜀
+# 이미 k개를 찾은 뒤에는 k번째 거리를 넘는 순간 dtw 계산을 중단(early-stop)함
+# (coarse_to_fine 방식의 거리도 exact 이상이므로 LB_Keogh 하한으로 건너뛰어도 결과가 같음)
+#
+# budget(k × max_dtw_distance)이 주어지면: 어떤 모범 동작이 가장 가까운 k개에 들어간다면 k개의 거리 합은
+# (그 거리 + 다른 모범 동작들의 거리 하한 중 가장 작은 k-1개의 합) 이상이므로, 그 거리가
+# budget - (하한 k-1개의 합)을 넘으면 그 모범 동작은 k개에 들지 않거나 어차피 0점임 -> 그 값에서도 계산을 멈춤
+# (거리 하한은 처음에는 LB_Keogh, 계산한 뒤에는 실제 거리 또는 계산을 멈춘 값)
+# (거리 리스트, 0점 확정 여부)를 반환
+def nearest_distances(user_data, references, envelopes, k, stats, engine="exact", budget=None):
+    bounds = sorted(
+        (lb_keogh(user_data, lower, upper), idx)
+        for idx, (lower, upper) in enumerate(envelopes)
+    )
+    count = min(k, len(bounds))
+    known = {idx: lower_bound for lower_bound, idx in bounds}
+    nearest = []  # 부호를 뒤집어 저장한 최대 힙 (가장 먼 거리가 맨 앞)
+    budget_hit = False
+    for position, (lower_bound, idx) in enumerate(bounds):
+        if len(nearest) == k and lower_bound >= -nearest[0]:
+            stats["dtw_pruned"] += len(bounds) - position
+            break
+        cutoff = -nearest[0] if len(nearest) == k else None
+        if budget is not None:
+            others = heapq.nsmallest(count - 1, (value for other, value in known.items() if other != idx))
+            budget_cutoff = (budget - sum(others)) * (1 + ABANDON_SLACK)
+            if budget_cutoff <= lower_bound:
+                # 하한이 이미 예산을 넘으므로 계산하지 않음
+                stats["dtw_pruned"] += 1
+                budget_hit = True
+                continue
+            if cutoff is None or budget_cutoff < cutoff:
+                cutoff = budget_cutoff
+        try:
+            distance = dtw_distance(user_data, references[idx], max_dist=cutoff, engine=engine)
+            stats["dtw_calls"] += 1
+        except Exception as e:
+            print(f"dtw 거리 계산 중 오류 발생: {e}")
+            continue
+        if math.isinf(distance):
+            # k번째 거리(또는 남은 예산)보다 멀어서 중간에 계산을 멈춘 경우
+            stats["dtw_abandoned"] += 1
+            known[idx] = max(lower_bound, cutoff)
+            if len(nearest) < k:
+                budget_hit = True
+            continue
+        known[idx] = distance
+        if len(nearest) < k:
+            heapq.heappush(nearest, -distance)
+        else:
+            heapq.heapreplace(nearest, -distance)
+    # 예산 때문에 k개를 다 채우지 못했다면, 빠진 모범 동작이 k개에 들어가는 경우이므로 0점
+    return [-distance for distance in nearest], budget_hit and len(nearest) < count
+
+
+# 전처리된 사용자 데이터를 모범 동작들과 비교해서 점수를 계산
+# mode: "average"(모든 모범 동작과의 평균) 또는 "nearest_k"(가장 가까운 k개 모범 동작과의 평균)
+# engine: DTW 계산 방식 ("exact" 또는 "coarse_to_fine", ai/dtw_engine.py)
+# early_abandon: 평균 거리가 max_dtw_distance 이상이면 0점이므로, 0점이 확정되는 순간 남은 DTW 계산을 멈춤
+#   (0점보다 큰 점수는 early_abandon=False일 때와 같은 값. 0점이 확정된 경우 avg_dtw_distance는 None)
+def score_motion(user_data, references, envelopes, max_dtw_distance: float, mode: str = "average", k: int = 3,
+                 engine: str = "exact", early_abandon: bool = True) -> dict:
+    if not references:
+        return {"error": "모범 동작 데이터가 없습니다ㅜㅠ"}
+
+    if engine not in DTW_ENGINES:
+        return {"error": f"지원하지 않는 DTW 계산 방식입니다: {engine}"}
+
+    # 정규화 시, 외부에서 받은 max_dtw_distance 값을 사용
+    if max_dtw_distance <= 0:
+        # 0으로 나누는 것을 방지
+        return {"error": "max_dtw_distance가 0보다 커야 합니다."}
+
+    stats = {"dtw_calls": 0, "dtw_pruned": 0, "dtw_abandoned": 0}
+    if mode == "nearest_k":
+        if k < 1:
+            return {"error": "nearest_k는 1 이상이어야 합니다."}
+        budget = min(k, len(references)) * max_dtw_distance if early_abandon else None
+        dtw_distances, zero_score = nearest_distances(
+            user_data, references, envelopes, k, stats, engine=engine, budget=budget
+        )
+    elif mode == "average":
+        budget, lower_bounds = None, None
+        if early_abandon:
+            budget = len(references) * max_dtw_distance
+            try:
+                lower_bounds = [lb_keogh(user_data, lower, upper) for lower, upper in envelopes]
+            except Exception as e:
+                # 하한 없이도 예산으로 계산을 멈출 수 있음
+                print(f"LB_Keogh 하한 계산 중 오류 발생: {e}")
+        dtw_distances, zero_score = all_distances(
+            user_data, references, stats, engine=engine, budget=budget, lower_bounds=lower_bounds
+        )
+    else:
+        return {"error": f"지원하지 않는 평가 방식입니다: {mode}"}
+
+    if zero_score:
+        # 0점이 확정되어 남은 계산을 멈춘 경우 (실제 평균 거리는 max_dtw_distance 이상이지만 정확한 값은 모름)
+        average_dtw_distance = None
+        normalized_distance = 1.0
+    else:
+        if not dtw_distances:
+            return {"error": "모든 모범 동작과 비교 중 오류가 발생하여 dtw 거리를 계산할 수 없습니다."}
+        average_dtw_distance = sum(dtw_distances) / len(dtw_distances)
+        normalized_distance = min(average_dtw_distance / max_dtw_distance, 1.0)
+
+    accuracy_percentage = max(0, (1 - normalized_distance)) * 100
+    accuracy_percentage = min(100, accuracy_percentage)
+
+    return {
+        "score": accuracy_percentage,
+        "avg_dtw_distance": average_dtw_distance, # 디버깅 및 분석을 위해 추가 정보 반환
+        "normalized_distance": normalized_distance,
+        "evaluation_mode": mode,
+        "compared_references": len(dtw_distances),
+        **stats, # dtw 계산 횟수 / LB_Keogh로 건너뛴 횟수 / 중간에 멈춘 횟수
+    }
+
+
+# 프로세스 풀에서 실행하는 작업 단위: 원본 센서 배열(프레임 수 × 채널 수) 전처리 + 점수 계산
+# 예외도 결과 딕셔너리로 돌려줘서 한 항목의 실패가 배치 전체를 멈추지 않도록 함
+def score_sensor_array(sensor_array, channels, references, envelopes, max_dtw_distance, mode="average", k=3,
+                       engine="exact") -> dict:
+    try:
+        user_data = preprocess_array(sensor_array, channels)
+        return score_motion(user_data, references, envelopes, max_dtw_distance, mode=mode, k=k, engine=engine)
+    except Exception as e:
+        return {"error": f"평가 중 오류 발생: {str(e)}"}
+
+
+# 프로세스 풀에서 실행하는 작업 묶음: 같은 동작의 센서 배열 여러 개를 한 번에 평가
+# 모범 동작과 엔벨로프는 묶음마다 한 번만 직렬화되어 자식 프로세스로 넘어감 (항목마다 넘기지 않음)
+def score_sensor_arrays(items, references, envelopes, max_dtw_distance, mode="average", k=3, engine="exact") -> list:
+    """items: (원본 센서 배열, 채널 이름) 리스트. 결과는 items와 같은 순서"""
+    return [
+        score_sensor_array(sensor_array, channels, references, envelopes, max_dtw_distance, mode=mode, k=k, engine=engine)
+        for sensor_array, channels in items
+    ]
@@ -0,0 +1,117 @@
+# ai/sensor_codec.py
+# 전처리된 센서 배열을 DB에 저장하기 위한 바이너리 포맷
+#
+# [헤더]  magic(4) | version(1) | flags(1) | 채널 수(2) | 프레임 수(4)      <- 리틀엔디언
+#         채널 이름들: (이름 길이(2) + utf-8 이름) × 채널 수 (이름을 모르면 길이 0)
+# [본문]  float32 리틀엔디언 배열 (프레임 수 × 채널 수), flags의 0번 비트가 켜져 있으면 zlib 압축
+#
+# 압축하지 않은 경우 본문을 np.frombuffer로 복사/파싱 없이 바로 읽을 수 있음
+# 요청 본문에서도 읽으므로, 헤더의 크기가 MAX_FRAMES / MAX_CHANNELS를 넘으면 거부하고
+# 압축은 헤더가 말하는 크기까지만 풀어서 (zip bomb 방지) 정확히 그 크기가 아니면 거부함
+
+import struct
+import zlib
+
+import numpy as np
+
+MAGIC = b"GLSD"
+FORMAT_VERSION = 1
+FLAG_ZLIB = 0x01
+DTYPE = np.dtype("<f4")
+
+# 100Hz 기준 약 16분, 채널은 장갑 센서(11개)보다 넉넉하게
+MAX_FRAMES = 100_000
+MAX_CHANNELS = 64
+
+_HEADER = struct.Struct("<4sBBHI")
+_NAME_LEN = struct.Struct("<H")
+
+
+def encode(data: np.ndarray, channels=None, compress: bool = False) -> bytes:
+    """(프레임 수 × 채널 수) 배열을 float32 바이너리로 변환"""
+    data = np.asarray(data, dtype=DTYPE)
+    if data.ndim != 2:
+        if data.size:
+            raise ValueError("센서 데이터는 (프레임 수 × 채널 수) 2차원 배열이어야 합니다.")
+        data = data.reshape(0, 0)
+    num_frames, num_channels = data.shape
+    channels = list(channels or [])
+    if channels and len(channels) != num_channels:
+        raise ValueError("채널 이름 개수와 배열의 채널 수가 다릅니다.")
+
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, FLAG_ZLIB if compress else 0, num_channels, num_frames)]
+    for idx in range(num_channels):
+        name = channels[idx].encode("utf-8") if channels else b""
+        parts.append(_NAME_LEN.pack(len(name)))
+        parts.append(name)
+
+    payload = np.ascontiguousarray(data).tobytes()
+    parts.append(zlib.compress(payload) if compress else payload)
+    return b"".join(parts)
+
+
+def decode(blob) -> tuple:
+    """
+    바이너리를 (배열, 채널 이름 리스트)로 변환
+    압축하지 않은 데이터는 원본 버퍼를 그대로 가리키는 읽기 전용 배열을 반환함
+    """
+    buffer = memoryview(blob)
+    magic, version, flags, num_channels, num_frames = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("지원하지 않는 센서 데이터 포맷입니다.")
+    if num_frames > MAX_FRAMES or num_channels > MAX_CHANNELS:
+        raise ValueError(f"센서 데이터가 너무 큽니다 (프레임 최대 {MAX_FRAMES}, 채널 최대 {MAX_CHANNELS}).")
+
+    offset = _HEADER.size
+    channels = []
+    for _ in range(num_channels):
+        (length,) = _NAME_LEN.unpack_from(buffer, offset)
+        offset += _NAME_LEN.size
+        channels.append(bytes(buffer[offset:offset + length]).decode("utf-8"))
+        offset += length
+    if not any(channels):
+        channels = []
+
+    expected = num_frames * num_channels * DTYPE.itemsize
+    if flags & FLAG_ZLIB:
+        # 헤더 크기보다 1바이트만 더 풀어봄 (max_length 0은 무제한이므로 +1).
+        # 압축 스트림이 그 안에서 끝나지 않았거나, 뒤에 남은 데이터가 있거나, 크기가 다르면 잘못된 데이터
+        inflater = zlib.decompressobj()
+        payload = inflater.decompress(buffer[offset:], expected + 1)
+        if not inflater.eof or inflater.unconsumed_tail or inflater.unused_data or len(payload) != expected:
+            raise ValueError("압축된 센서 데이터의 크기가 헤더와 다릅니다.")
+        offset = 0
+    else:
+        if len(buffer) - offset != expected:
+            raise ValueError("센서 데이터의 크기가 헤더와 다릅니다.")
+        payload = buffer
+    data = np.frombuffer(payload, dtype=DTYPE, count=num_frames * num_channels, offset=offset)
+    return data.reshape(num_frames, num_channels), channels
+
+
+def backfill_sensor_blobs(model, batch_size: int = 500, compress: bool = False, drop_json: bool = False) -> int:
+    """
+    sensor_data_json만 있는 MotionRecording 행을 바이너리 형식으로 옮김
+    (데이터 마이그레이션에서도 쓰므로, 과거 버전 모델 클래스를 인자로 받음)
+    """
+    pending = model.objects.filter(sensor_data_blob__isnull=True, sensor_data_json__isnull=False)
+    fields = ["sensor_data_blob", "sensor_data_json"] if drop_json else ["sensor_data_blob"]
+    converted = 0
+    last_pk = 0
+    while True:
+        # pk 순서로 조금씩 가져와서 전체 테이블을 메모리에 올리지 않음
+        batch = list(pending.filter(pk__gt=last_pk).order_by("pk").only("pk", "sensor_data_json")[:batch_size])
+        if not batch:
+            break
+        for record in batch:
+            record.sensor_data_blob = encode(np.asarray(record.sensor_data_json, dtype=DTYPE), compress=compress)
+            if drop_json:
+                record.sensor_data_json = None
+        model.objects.bulk_update(batch, fields)
+        converted += len(batch)
+        last_pk = batch[-1].pk
+
+    if drop_json:
+        # 이전 실행에서 바이너리만 채우고 JSON을 남겨둔 행도 정리
+        model.objects.filter(sensor_data_blob__isnull=False, sensor_data_json__isnull=False).update(sensor_data_json=None)
+    return converted
@@ -1,8 +1,17 @@
 # ai/serializers.py
 
+import struct
+import zlib
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
 # SensorDevice 모델을 추가로 임포트
-from .models import UserRecording, MotionRecording, MotionType, SensorDevice
+from .models import UserRecording, MotionRecording, MotionType, SensorDevice, Job
+from .rollups import MAX_BUCKETS, bucket_range
+from .sensor_codec import MAX_CHANNELS, MAX_FRAMES
 
 
 # --- 신규: MotionType 관리를 위한 Serializer ---
@@ -11,7 +20,10 @@ class MotionTypeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = MotionType
-        fields = ['id', 'motionType', 'description', 'max_dtw_distance']
+        fields = [
+            'id', 'motionType', 'description', 'max_dtw_distance', 'evaluation_mode', 'nearest_k',
+            'dtw_engine', 'reference_set', 'template_count',
+        ]
         read_only_fields = ['id', 'max_dtw_distance']
 
 
@@ -25,14 +37,203 @@ class SensorDeviceSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'company', 'api_key', 'created_at']
 
 
+# --- 백그라운드 작업 상태 조회용 Serializer ---
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        # last_error(예외 traceback)는 서버 경로 / SQL이 드러나므로 API로 내보내지 않음 (워커 로그 / DB에서 확인)
+        fields = ['id', 'kind', 'status', 'attempts', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
+
+
 # --- 기존 Serializer들 ---
 
+class SensorFramesField(serializers.Field):
+    """
+    프레임 딕셔너리 리스트 형식의 센서 데이터
+    ListField(child=DictField())는 프레임마다 DictField 검증을 거치며 새 딕셔너리를 만들기 때문에,
+    리스트/딕셔너리 여부만 확인하고 원본 리스트를 그대로 넘겨줌
+    """
+    default_error_messages = {
+        "invalid": "센서 데이터는 딕셔너리들의 리스트여야 합니다.",
+        "empty": "센서 데이터가 비어 있습니다.",
+        "too_large": f"센서 데이터가 너무 큽니다 (프레임 최대 {MAX_FRAMES}).",
+    }
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list) or not all(isinstance(frame, dict) for frame in data):
+            self.fail("invalid")
+        if not data:
+            self.fail("empty")
+        if len(data) > MAX_FRAMES:
+            self.fail("too_large")
+        return data
+
+
+class SensorMatrixField(serializers.Field):
+    """컬럼 형식의 센서 데이터: [[프레임0 값들], [프레임1 값들], ...] -> (프레임 수 × 채널 수) 배열"""
+    default_error_messages = {
+        "invalid": "frames는 숫자로 이루어진 2차원 리스트여야 합니다.",
+        "empty": "센서 데이터가 비어 있습니다.",
+        "too_large": f"센서 데이터가 너무 큽니다 (프레임 최대 {MAX_FRAMES}, 채널 최대 {MAX_CHANNELS}).",
+    }
+
+    def to_internal_value(self, data):
+        # 배열로 바꾸기 전에 프레임 수부터 확인 (큰 리스트를 통째로 변환하지 않도록)
+        if not isinstance(data, list):
+            self.fail("invalid")
+        if len(data) > MAX_FRAMES:
+            self.fail("too_large")
+        try:
+            array = np.asarray(data)
+        except (TypeError, ValueError):
+            self.fail("invalid")
+        # dtype을 지정해서 변환하면 "1.5" 같은 문자열도 숫자로 바뀌므로, 정수/실수 배열만 받음
+        if array.ndim != 2 or array.dtype.kind not in "iuf":
+            self.fail("invalid")
+        if array.size == 0:
+            self.fail("empty")
+        if array.shape[1] > MAX_CHANNELS:
+            self.fail("too_large")
+        return array.astype(np.float64, copy=False)
+
+
+class SensorBinaryField(serializers.Field):
+    """바이너리 형식의 센서 데이터 (ai/sensor_codec.py 포맷) -> (배열, 채널 이름 리스트)"""
+    default_error_messages = {
+        "invalid": "센서 데이터 바이너리 형식이 올바르지 않습니다: {error}",
+        "no_channels": "센서 데이터 바이너리에 채널 이름이 없습니다.",
+        "empty": "센서 데이터가 비어 있습니다.",
+    }
+
+    def to_internal_value(self, data):
+        from .sensor_codec import decode
+        try:
+            array, channels = decode(data)
+        except (TypeError, ValueError, struct.error, zlib.error) as e:
+            self.fail("invalid", error=str(e))
+        if not channels:
+            self.fail("no_channels")
+        if array.size == 0:
+            self.fail("empty")
+        return array, channels
+
+
 class EvaluationRequestSerializer(serializers.Serializer):
-    """Unity로부터 평가 요청을 받을 때의 전체 데이터 형식"""
+    """
+    Unity로부터 평가 요청을 받을 때의 전체 데이터 형식
+    센서 데이터는 아래 세 형식 중 하나로 받고, 검증이 끝나면 sensorArray(프레임 수 × 채널 수 배열)와 channels로 통일함
+    1. sensorData: [{"flex1": .., "gyro_x": ..}, ...]             (기존 형식, 프레임마다 센서 이름 반복)
+    2. channels + frames: ["flex1", ..], [[.., ..], ...]            (컬럼 형식, 센서 이름은 한 번만)
+    3. sensorBinary: application/octet-stream 본문 (views에서 채워줌, ai/sensor_codec.py 포맷)
+    """
+    motionName = serializers.CharField()
+    empNo = serializers.CharField()
+    sensorData = SensorFramesField(required=False)
+    channels = serializers.ListField(child=serializers.CharField(), allow_empty=False, required=False)
+    frames = SensorMatrixField(required=False)
+    sensorBinary = SensorBinaryField(required=False)
+
+    def validate(self, attrs):
+        from .preprocessing import frames_to_array
+
+        given = [name for name in ("sensorData", "frames", "sensorBinary") if name in attrs]
+        if len(given) != 1:
+            raise serializers.ValidationError("sensorData, frames, sensorBinary 중 하나만 보내야 합니다.")
+
+        if "sensorData" in attrs:
+            try:
+                array, channels = frames_to_array(attrs.pop("sensorData"))
+            except (TypeError, ValueError) as e:
+                raise serializers.ValidationError({"sensorData": str(e)})
+        elif "frames" in attrs:
+            array, channels = attrs.pop("frames"), attrs.pop("channels", None)
+            if not channels:
+                raise serializers.ValidationError({"channels": "frames와 함께 채널 이름 목록을 보내야 합니다."})
+            if len(channels) != array.shape[1]:
+                raise serializers.ValidationError({"frames": "각 프레임의 값 개수가 채널 수와 다릅니다."})
+        else:
+            array, channels = attrs.pop("sensorBinary")
+
+        # 세 형식 공통: 크기 제한, NaN/Inf 거부 (DTW 거리가 nan이 되면 점수 / 응답을 만들 수 없음)
+        if array.shape[0] > MAX_FRAMES or array.shape[1] > MAX_CHANNELS:
+            raise serializers.ValidationError(
+                f"센서 데이터가 너무 큽니다 (프레임 최대 {MAX_FRAMES}, 채널 최대 {MAX_CHANNELS})."
+            )
+        if not np.isfinite(array).all():
+            raise serializers.ValidationError("센서 데이터에 NaN 또는 Inf 값이 있습니다.")
+
+        attrs["sensorArray"] = array
+        attrs["channels"] = tuple(channels)
+        return attrs
+
+
+class EvaluationSessionOpenSerializer(serializers.Serializer):
+    """스트리밍 평가 세션을 열 때의 데이터 형식"""
     motionName = serializers.CharField()
     empNo = serializers.CharField()
-    # sensorData가 '딕셔셔너리들의 리스트' 형태인지만 검증.
-    sensorData = serializers.ListField(child=serializers.DictField())
+
+
+class EvaluationSessionChunkSerializer(serializers.Serializer):
+    """스트리밍 평가 세션에 센서 데이터 조각을 보낼 때의 데이터 형식 (finalize 시에는 둘 다 생략 가능)"""
+    seq = serializers.IntegerField(min_value=0, required=False)
+    sensorData = serializers.ListField(child=serializers.DictField(), required=False)
+
+
+class BatchEvaluationRequestSerializer(serializers.Serializer):
+    """
+    여러 Unity 스테이션의 평가 요청을 한 번에 받을 때의 데이터 형식
+    항목별 형식은 views에서 EvaluationRequestSerializer로 하나씩 검증 (항목별로 오류를 돌려주기 위해)
+    """
+    items = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=getattr(settings, "AI_BATCH_MAX_ITEMS", 100),
+    )
+
+
+class ScoreRollupQuerySerializer(serializers.Serializer):
+    """평가 결과 추이/합격률 조회 조건 (쿼리 파라미터). 날짜를 생략하면 오늘까지 최근 30일(주 단위는 12주)"""
+    period = serializers.ChoiceField(choices=["day", "week"], default="day")
+    motionName = serializers.CharField(required=False)
+    dateFrom = serializers.DateField(required=False)
+    dateTo = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        date_to = attrs.setdefault("dateTo", timezone.localdate())
+        default_days = 7 * 12 - 1 if attrs["period"] == "week" else 30 - 1
+        date_from = attrs.setdefault("dateFrom", date_to - timedelta(days=default_days))
+        if date_from > date_to:
+            raise serializers.ValidationError("dateFrom은 dateTo보다 늦을 수 없습니다.")
+        if len(bucket_range(attrs["period"], date_from, date_to)) > MAX_BUCKETS:
+            raise serializers.ValidationError(f"한 번에 {MAX_BUCKETS}개 기간까지만 조회할 수 있습니다.")
+        return attrs
+
+
+class RecordingHistoryQuerySerializer(serializers.Serializer):
+    """평가 기록 조회 조건 (쿼리 파라미터, 모두 생략 가능)"""
+    empNo = serializers.CharField(required=False)
+    motionName = serializers.CharField(required=False)
+    dateFrom = serializers.DateField(required=False)
+    dateTo = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if attrs.get("dateFrom") and attrs.get("dateTo") and attrs["dateFrom"] > attrs["dateTo"]:
+            raise serializers.ValidationError("dateFrom은 dateTo보다 늦을 수 없습니다.")
+        return attrs
+
+
+class RecordingHistorySerializer(serializers.ModelSerializer):
+    """평가 기록 목록 항목 (직원/동작은 select_related로 함께 읽음)"""
+    empNo = serializers.CharField(source="user.emp_no")
+    employeeName = serializers.CharField(source="user.name")
+    motionName = serializers.CharField(source="motion_type.motion_name")
+    recordedAt = serializers.DateTimeField(source="recorded_at")
+
+    class Meta:
+        model = UserRecording
+        fields = ["id", "empNo", "employeeName", "motionName", "score", "recordedAt"]
+        read_only_fields = fields
 
 
 class UserRecordingSerializer(serializers.ModelSerializer):
@@ -70,8 +271,15 @@ class MotionSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         from .safty_training_ai import preprocess_sensor_data
+        from .sensor_codec import encode
         raw_sensor_data = validated_data.pop("sensorData")
         preprocessed_numpy = preprocess_sensor_data(raw_sensor_data)
-        validated_data["sensor_data_json"] = preprocessed_numpy.tolist()
+        channels = list(raw_sensor_data[0].keys()) if raw_sensor_data else []
+        # JSON 리스트 대신 float32 바이너리로 저장
+        validated_data["sensor_data_blob"] = encode(
+            preprocessed_numpy,
+            channels,
+            compress=getattr(settings, "AI_SENSOR_DATA_COMPRESS", False),
+        )
         validated_data["data_frames"] = preprocessed_numpy.shape[0]
         return super().create(validated_data)
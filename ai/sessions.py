@@ -0,0 +1,180 @@
+# ai/sessions.py
+# 스트리밍 평가 세션: 동작 중에 센서 데이터 조각을 받아 미리 전처리해두고, 끝나면 바로 점수를 계산
+#
+# 1. open_session: (디바이스, 사원번호, 동작 이름)으로 세션 생성 + 평가기 캐시 미리 준비
+# 2. append_chunk: 조각을 검증/전처리해서 저장 (여러 워커 프로세스가 받아도 되도록 상태는 DB에 보관)
+# 3. finalize_session: 끝부분 프레임 전처리 + DTW 비교 + 결과 저장
+#    세션 행 잠금은 데이터를 모을 때와 결과를 기록할 때만 짧게 잡고, DTW 비교는 잠금 없이 수행
+#    (비교에 몇 초가 걸려도 같은 세션의 재시도 / 늦게 온 조각 요청이 DB 잠금에서 기다리지 않음)
+
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .evaluator_cache import get_evaluator
+from .logic import save_recording, score_user_data
+from .metrics import evaluation_seconds, observe_scoring
+from .models import EvaluationSession, EvaluationSessionChunk
+from .preprocessing import StreamingPreprocessor
+
+# 마지막 요청 이후 이 시간이 지난 진행 중 세션은 만료된 것으로 봄
+SESSION_TTL = timedelta(seconds=getattr(settings, "AI_EVALUATION_SESSION_TTL", 10 * 60))
+
+
+class SessionError(Exception):
+    """세션 요청을 처리할 수 없을 때 발생 (status_code는 응답에 쓸 HTTP 상태 코드)"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def open_session(device, employee_id, motion) -> EvaluationSession:
+    """motion은 context_resolver.motion()이 반환한 MotionInfo (ai/context.py)"""
+    session = EvaluationSession.objects.create(device=device, employee_id=employee_id, motion_type_id=motion.id)
+    try:
+        # finalize 때 평가기를 만드느라 기다리지 않도록 미리 캐시에 올려둠
+        get_evaluator(motion.motion_name, version=motion.reference_version)
+    except Exception as e:
+        print(f"[Error] '{motion.motion_name}' 평가기 준비 실패: {e}")
+    return session
+
+
+def _lock_open_session(session_id, device) -> EvaluationSession:
+    # transaction.atomic() 안에서 호출해야 함 (같은 세션의 조각이 동시에 와도 순서대로 처리)
+    session = (
+        EvaluationSession.objects.select_for_update()
+        .select_related("employee", "motion_type")
+        .filter(pk=session_id, device=device)
+        .first()
+    )
+    if session is None:
+        raise SessionError("평가 세션을 찾을 수 없습니다.", status_code=404)
+    if session.status == EvaluationSession.STATUS_OPEN and session.updated_at < timezone.now() - SESSION_TTL:
+        raise SessionError("평가 세션이 만료되었습니다.", status_code=410)
+    return session
+
+
+def _restore_preprocessor(session: EvaluationSession) -> StreamingPreprocessor:
+    tail = None
+    if session.tail:
+        tail = np.frombuffer(session.tail, dtype=np.float64).reshape(-1, len(session.channels))
+    return StreamingPreprocessor(
+        channels=session.channels or None,
+        tail=tail,
+        frames_received=session.frames_received,
+        frames_emitted=session.frames_emitted,
+    )
+
+
+def _push_chunk(session: EvaluationSession, seq: int, frames: list):
+    if seq < session.next_seq:
+        # 이미 받은 조각이 재전송된 경우 (응답 유실 후 재시도) -> 무시
+        return
+    if seq > session.next_seq:
+        raise SessionError(f"{session.next_seq}번 조각을 먼저 보내야 합니다.", status_code=409)
+
+    preprocessor = _restore_preprocessor(session)
+    try:
+        processed = preprocessor.push(frames)
+    except ValueError as e:
+        raise SessionError(f"센서 데이터 형식이 올바르지 않습니다: {e}")
+
+    if len(processed):
+        EvaluationSessionChunk.objects.create(
+            session=session, seq=seq, frames=len(processed), data=processed.tobytes()
+        )
+    session.channels = list(preprocessor.channels or [])
+    session.frames_received = preprocessor.frames_received
+    session.frames_emitted = preprocessor.frames_emitted
+    session.tail = preprocessor.tail.tobytes() if preprocessor.tail is not None else None
+    session.next_seq = seq + 1
+    session.save()
+
+
+def append_chunk(session_id, device, seq: int, frames: list) -> EvaluationSession:
+    with transaction.atomic():
+        session = _lock_open_session(session_id, device)
+        if session.status != EvaluationSession.STATUS_OPEN:
+            raise SessionError("이미 평가가 끝난 세션입니다.", status_code=409)
+        _push_chunk(session, seq, frames)
+    return session
+
+
+def _collect_user_data(session: EvaluationSession) -> np.ndarray:
+    """저장해둔 전처리 조각 + 끝부분 프레임을 이어붙인 전체 사용자 데이터"""
+    preprocessor = _restore_preprocessor(session)
+    try:
+        remaining = preprocessor.finish()
+    except ValueError as e:
+        raise SessionError(f"센서 데이터 형식이 올바르지 않습니다: {e}")
+
+    chunk_rows = session.chunks.order_by("seq").values_list("data", flat=True)
+    parts = [np.frombuffer(data, dtype=np.float64) for data in chunk_rows]
+    if remaining.size:
+        parts.append(remaining.ravel())
+    if not parts:
+        raise SessionError("받은 센서 데이터가 없습니다.")
+    return np.concatenate(parts).reshape(-1, len(session.channels))
+
+
+def finalize_session(session_id, device, seq: int = None, frames: list = None) -> dict:
+    """
+    세션을 마치고 평가 결과를 반환 (마지막 조각을 함께 보낼 수 있음)
+    이미 끝난 세션이면 저장해둔 결과를 그대로 반환
+    """
+    started = time.perf_counter()
+    # 1. 잠금: 마지막 조각 반영 + 평가할 데이터 모으기
+    with transaction.atomic():
+        session = _lock_open_session(session_id, device)
+        if session.status == EvaluationSession.STATUS_FINALIZED:
+            return session.result
+        if frames:
+            _push_chunk(session, session.next_seq if seq is None else seq, frames)
+        user_data = _collect_user_data(session)
+        scored_seq = session.next_seq
+
+    # 2. 잠금 없이 DTW 비교 (단건 평가와 같은 경로, 지표 포함)
+    motion_type = session.motion_type
+    try:
+        result = score_user_data(motion_type, user_data)
+    except Exception as e:
+        print(f"[Error] Evaluation failed for {motion_type.motion_name}: {e}")
+        result = {"error": f"평가 중 오류 발생: {str(e)}"}
+    observe_scoring(motion_type.motion_name, result)
+    if "error" in result:
+        return result
+
+    # 3. 다시 잠금: 그 사이 다른 finalize가 먼저 끝났으면 그 결과를 반환, 새 조각이 왔으면 다시 요청하도록 함
+    with transaction.atomic():
+        session = _lock_open_session(session_id, device)
+        if session.status == EvaluationSession.STATUS_FINALIZED:
+            return session.result
+        if session.next_seq != scored_seq:
+            raise SessionError("평가하는 동안 새 조각이 도착했습니다. 다시 완료 요청을 보내주세요.", status_code=409)
+        session.status = EvaluationSession.STATUS_FINALIZED
+        session.result = result
+        session.tail = None
+        session.save()
+        session.chunks.all().delete()
+        # 단건 평가와 같은 저장 경로 (지연 저장 모드이면 커밋 후 스풀에 기록)
+        save_recording(session.employee_id, motion_type.id, result["score"], session.employee.company_id)
+    evaluation_seconds.observe(time.perf_counter() - started, motion_type.motion_name)
+    return result
+
+
+def purge_expired_sessions() -> int:
+    """만료된 진행 중 세션과 하루 지난 완료 세션을 삭제"""
+    now = timezone.now()
+    expired = EvaluationSession.objects.filter(
+        status=EvaluationSession.STATUS_OPEN, updated_at__lt=now - SESSION_TTL
+    ) | EvaluationSession.objects.filter(
+        status=EvaluationSession.STATUS_FINALIZED, updated_at__lt=now - timedelta(days=1)
+    )
+    _, deleted = expired.delete()
+    return deleted.get(EvaluationSession._meta.label, 0)
@@ -0,0 +1,139 @@
+# ai/signals.py
+import weakref
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from organizations.models import Company, Employee
+
+from .auth_cache import API_KEY_VERSION_KEY
+from .cache_versions import bump_version
+from .context import bump_employees_version, bump_motion_types_version
+from .evaluator_cache import bump_reference_version
+from .jobs import enqueue_recalibration
+from .models import MotionPairDistance, MotionRecording, MotionType, SensorDevice
+
+
+def _deleting_motion_type(origin) -> bool:
+    """동작 유형째 지우는 중인지 (CASCADE로 녹화/쌍별 거리도 함께 지워지므로 다시 계산할 필요 없음)"""
+    if origin is None:
+        return False
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is MotionType
+
+
+# 모범 동작이 추가/수정/삭제되면 MotionType의 버전을 올려서, 모든 워커의 평가기 캐시를 무효화
+@receiver(post_save, sender=MotionRecording)
+@receiver(post_delete, sender=MotionRecording)
+def invalidate_evaluator_on_recording_change(sender, instance, origin=None, **kwargs):
+    if instance.score_category == "reference" and not _deleting_motion_type(origin):
+        bump_reference_version(instance.motion_type_id)
+
+
+class _PendingRecalibration:
+    """한 트랜잭션에서 녹화가 지워진 동작 유형 id를 모아, 커밋 후 한 번에 max_dtw_distance를 다시 계산하는 콜백"""
+
+    def __init__(self):
+        self.motion_type_ids = set()
+
+    def __call__(self):
+        from .logic import recalculate_max_dtw_from_matrix
+
+        motion_type_ids, self.motion_type_ids = self.motion_type_ids, None
+        for motion_type in MotionType.objects.filter(pk__in=motion_type_ids):
+            if motion_type.reference_set == "templates":
+                # 템플릿 기준 보정은 DTW 계산이 필요하므로 작업 큐에서 처리
+                enqueue_recalibration(motion_type)
+            else:
+                recalculate_max_dtw_from_matrix(motion_type)
+
+
+def _pending_recalibration(using) -> _PendingRecalibration:
+    """
+    현재 트랜잭션의 재계산 콜백 (연결마다 하나)
+    연결에는 약한 참조만 두므로, 커밋/롤백으로 Django가 콜백 목록을 버리면 다음 트랜잭션에서 새로 등록함
+    """
+    connection = transaction.get_connection(using)
+    reference = getattr(connection, "pending_recalibration", None)
+    pending = reference() if reference is not None else None
+    if pending is None or pending.motion_type_ids is None:
+        pending = _PendingRecalibration()
+        connection.pending_recalibration = weakref.ref(pending)
+        transaction.on_commit(pending, using=using)
+    return pending
+
+
+# 녹화가 삭제되면 관련 쌍별 DTW 거리도 CASCADE로 지워지므로, 남은 행렬로 max_dtw_distance만 다시 계산
+# - 동작 유형째 지우는 경우는 건너뜀
+# - 커밋 후에 동작마다 한 번만 계산함 (녹화 여러 개를 한 트랜잭션에서 지워도 커밋 콜백은 하나)
+@receiver(post_delete, sender=MotionRecording)
+def recalculate_max_dtw_on_recording_delete(sender, instance, origin=None, using=None, **kwargs):
+    if _deleting_motion_type(origin):
+        return
+    _pending_recalibration(using).motion_type_ids.add(instance.motion_type_id)
+
+
+# 디바이스가 등록/비활성화/키 재발급/삭제되거나 회사 정보가 바뀌면, 모든 워커의 API 키 캐시를 비움
+@receiver(post_save, sender=SensorDevice)
+@receiver(post_delete, sender=SensorDevice)
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def invalidate_api_key_cache(sender, instance, **kwargs):
+    bump_version(API_KEY_VERSION_KEY)
+
+
+# 직원/동작 유형이 바뀌면 평가 요청용 캐시(ai/context.py)를 비움
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def invalidate_employee_context(sender, instance, **kwargs):
+    bump_employees_version(instance.company_id)
+
+
+@receiver(post_save, sender=MotionType)
+@receiver(post_delete, sender=MotionType)
+def invalidate_motion_context(sender, instance, **kwargs):
+    bump_motion_types_version()
+
+
+# 저장 전 값과 비교해서, 저장 후 처리가 필요한 설정이 바뀌었는지 기록
+@receiver(pre_save, sender=MotionType)
+def remember_evaluation_settings(sender, instance, **kwargs):
+    previous = None
+    if instance.pk is not None:
+        previous = (
+            MotionType.objects.filter(pk=instance.pk)
+            .values_list("reference_set", "template_count", "dtw_engine")
+            .first()
+        )
+    if previous is None:
+        instance._reference_set_changed = instance.reference_set == "templates"
+        instance._dtw_engine_changed = False
+    else:
+        instance._reference_set_changed = previous[:2] != (instance.reference_set, instance.template_count)
+        instance._dtw_engine_changed = previous[2] != instance.dtw_engine
+
+
+# 비교할 모범 동작 집합(reference_set)이나 템플릿 개수가 바뀌면 버전을 올려서 평가기를 다시 만들고,
+# 기존 동작이면 max_dtw_distance 보정 작업도 등록함 (templates 방식의 템플릿 생성 작업은 bump_reference_version이 등록)
+@receiver(post_save, sender=MotionType)
+def rebuild_templates_on_reference_set_change(sender, instance, created=False, **kwargs):
+    if getattr(instance, "_reference_set_changed", False):
+        instance._reference_set_changed = False
+        bump_reference_version(instance.pk)
+        # 이 객체를 다시 save()해도 올라간 버전을 덮어쓰지 않도록
+        instance.refresh_from_db(fields=["reference_version"])
+        # 비교 대상(전체 모범 동작 / 템플릿)이 바뀌었으므로 max_dtw_distance도 다시 보정
+        # (templates 방식은 템플릿을 만든 뒤 한 번 더 보정함, ai/motion_templates.py)
+        if not created:
+            enqueue_recalibration(instance)
+
+
+# DTW 계산 방식이 바뀌면 저장된 쌍별 거리는 이전 방식으로 계산한 값이므로 지우고, max_dtw_distance를 다시 계산
+@receiver(post_save, sender=MotionType)
+def recalibrate_on_dtw_engine_change(sender, instance, **kwargs):
+    if getattr(instance, "_dtw_engine_changed", False):
+        instance._dtw_engine_changed = False
+        MotionPairDistance.objects.filter(motion_type_id=instance.pk).delete()
+        enqueue_recalibration(instance)
@@ -1,3 +1,1122 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import zlib
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from scipy.signal import savgol_filter
+
+from organizations.models import Company, Employee
+
+from . import logic, recording_buffer
+from .auth_cache import api_key_cache
+from .context import context_resolver
+from .dtw_engine import COARSE_MIN_FRAMES, coarse_to_fine_distance, dtw_distance, envelope
+from .eval_service import EvaluationService, HashRing, pack_references, unpack_references
+from .evaluator_cache import EvaluatorCache, clear_evaluator_cache, warm_evaluator_cache
+from .jobs import (
+    JOB_HANDLERS, JOB_LEASE, RECALIBRATE_MAX_DTW, claim_next_job, enqueue_job, enqueue_recalibration, run_job,
+)
+from .logic import update_max_dtw_for_motion
+from .metrics import RETIRED_FILE, registry
+from .models import (
+    CacheVersion, EvaluationSession, Job, MotionPairDistance, MotionRecording, MotionType, ScoreRollup, SensorDevice,
+    UserRecording,
+)
+from .motion_templates import load_templates, rebuild_templates
+from .preprocessing import (
+    SAVGOL_POLYORDER, StreamingPreprocessor, preprocess_array, preprocess_frames, resolve_window_length, savgol_smooth,
+)
+from .reference_snapshot import (
+    _write_snapshot, export_snapshots, get_snapshot, legacy_json_recordings, open_snapshot, snapshot_path,
+)
+from .rollups import HISTOGRAM_FIELDS, rebuild_rollups, record_scores
+from .scoring import score_motion, score_sensor_array
+from .sensor_codec import MAX_FRAMES, backfill_sensor_blobs, decode, encode
+from .sessions import SessionError, append_chunk, finalize_session, open_session
+
+CHANNELS = ("flex1", "flex2", "gyro_x")
+
+
+def make_frames(num_frames: int, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 2 * np.pi, num_frames)
+    return [
+        {"flex1": 50 + 30 * np.sin(x) + rng.normal(), "flex2": 40 + 20 * np.cos(x), "gyro_x": 10 * np.sin(2 * x)}
+        for x in t
+    ]
+
+
+# 버전 확인 주기를 길게 잡아서, 캐시가 채워진 뒤의 쿼리만 측정
+@override_settings(AI_CACHE_VERSION_CHECK_INTERVAL=3600, AI_RECORDING_WRITE_BEHIND=False)
+class EvaluateQueryCountTests(TestCase):
+    def setUp(self):
+        # 테스트마다 DB가 롤백되므로 프로세스 캐시도 비움
+        api_key_cache.clear()
+        context_resolver.clear()
+        clear_evaluator_cache()
+
+        self.company = Company.objects.create(name="test", biz_no="000-00-00000", password="password")
+        self.device = SensorDevice.objects.create(company=self.company, device_uid="unity-1")
+        self.employee = Employee.objects.create(company=self.company, emp_no="E001", name="trainee")
+        self.motion_type = MotionType.objects.create(motion_name="fire_exit", max_dtw_distance=50.0)
+        for seed in range(3):
+            frames = make_frames(60, seed)
+            data = np.array([[frame[ch] for ch in CHANNELS] for frame in frames])
+            MotionRecording.objects.create(
+                motion_type=self.motion_type,
+                score_category="reference",
+                data_frames=len(frames),
+                sensor_data_blob=encode(preprocess_array(data, CHANNELS), CHANNELS),
+            )
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_X_API_KEY=self.device.api_key)
+
+    def evaluate(self, emp_no="E001", motion_name="fire_exit"):
+        return self.client.post(
+            "/api/ai/evaluate/",
+            {"empNo": emp_no, "motionName": motion_name, "sensorData": make_frames(60, 99)},
+            format="json",
+        )
+
+    def test_warm_evaluation_only_inserts_result(self):
+        self.assertEqual(self.evaluate().status_code, 200)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.evaluate()
+        self.assertEqual(response.status_code, 200)
+        # 인증/직원/동작/평가기 조회는 모두 캐시에서 처리되고, 결과 저장 INSERT와
+        # 이미 있는 일/주 집계 행에 더하는 UPDATE 두 번만 남아야 함 (집계 행을 읽고 잠그는 SELECT 없음,
+        # SAVEPOINT/RELEASE는 트랜잭션)
+        statements = [query["sql"].split()[0].upper() for query in queries.captured_queries]
+        self.assertEqual([s for s in statements if s not in ("SAVEPOINT", "RELEASE")], ["INSERT", "UPDATE", "UPDATE"])
+        self.assertEqual(UserRecording.objects.filter(user=self.employee).count(), 2)
+        rollups = ScoreRollup.objects.filter(company=self.company, motion_type=self.motion_type)
+        self.assertEqual(sorted(rollups.values_list("period", "count")), [("day", 2), ("week", 2)])
+
+    def test_session_open_uses_context_cache(self):
+        self.assertEqual(self.evaluate().status_code, 200)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/ai/sessions/", {"empNo": "E001", "motionName": "fire_exit"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        # 직원 / 동작 / 평가기는 캐시에서 꺼내고 세션 INSERT만 남아야 함
+        statements = [query["sql"].split()[0].upper() for query in queries.captured_queries]
+        self.assertEqual(statements, ["INSERT"])
+        session = EvaluationSession.objects.get(pk=response.data["sessionId"])
+        self.assertEqual((session.employee_id, session.motion_type_id), (self.employee.id, self.motion_type.id))
+
+        for body in ({"empNo": "E999", "motionName": "fire_exit"}, {"empNo": "E001", "motionName": "unknown"}):
+            self.assertEqual(self.client.post("/api/ai/sessions/", body, format="json").status_code, 404)
+
+    def test_new_employee_is_found_before_cache_refresh(self):
+        self.evaluate()
+        # bulk_create는 시그널이 없어 버전이 오르지 않음 -> 맵에 없는 사원번호는 DB에서 한 번 더 확인
+        Employee.objects.bulk_create([Employee(company=self.company, emp_no="E002", name="new trainee")])
+
+        response = self.evaluate(emp_no="E002")
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_employee_and_api_key(self):
+        self.evaluate()
+        self.assertEqual(self.evaluate(emp_no="NOPE").status_code, 404)
+
+        self.client.credentials(HTTP_X_API_KEY="bogus")
+        self.client.post("/api/ai/evaluate/", {}, format="json")
+        # 없는 API 키도 잠시 캐시되어 재시도가 DB까지 가지 않음
+        with self.assertNumQueries(0):
+            response = self.client.post("/api/ai/evaluate/", {}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_motion_type_change_is_picked_up(self):
+        self.evaluate()
+        self.motion_type.max_dtw_distance = 1e9
+        self.motion_type.save()
+
+        response = self.evaluate()
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(response.data["evaluation"]["score"], 99.0)
+
+    def test_falls_back_to_in_process_scoring_when_service_is_down(self):
+        expected = self.evaluate().data["evaluation"]["score"]
+        with tempfile.TemporaryDirectory() as tmp, override_settings(AI_EVAL_SERVICE_ADDRESS=f"{tmp}/eval.sock"):
+            response = self.evaluate()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["evaluation"]["score"], expected)
+
+    def test_columnar_and_binary_bodies(self):
+        matrix = [[frame[ch] for ch in CHANNELS] for frame in make_frames(60, 99)]
+        expected = self.evaluate().data["evaluation"]["score"]
+
+        response = self.client.post(
+            "/api/ai/evaluate/",
+            {"empNo": "E001", "motionName": "fire_exit", "channels": list(CHANNELS), "frames": matrix},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["evaluation"]["score"], expected)
+
+        response = self.client.post(
+            "/api/ai/evaluate/?empNo=E001&motionName=fire_exit",
+            encode(np.array(matrix), CHANNELS, compress=True),
+            content_type="application/octet-stream",
+        )
+        self.assertEqual(response.status_code, 200)
+        # float32로 보낸 값이므로 점수가 아주 조금 다를 수 있음
+        self.assertAlmostEqual(response.data["evaluation"]["score"], expected, places=1)
+
+    def test_rejects_non_finite_and_oversized_sensor_data(self):
+        matrix = [[frame[ch] for ch in CHANNELS] for frame in make_frames(60, 99)]
+        nan_matrix = [row[:] for row in matrix]
+        nan_matrix[10][1] = float("nan")
+        columnar = {"empNo": "E001", "motionName": "fire_exit", "channels": list(CHANNELS)}
+        bad_payloads = [
+            {**columnar, "frames": [["1.5", "2", "3"]]},
+            {**columnar, "channels": [f"c{i}" for i in range(65)], "frames": [[1] * 65]},
+        ]
+        for payload in bad_payloads:
+            self.assertEqual(self.client.post("/api/ai/evaluate/", payload, format="json").status_code, 400)
+
+        # JSON에는 NaN이 없지만 1e999는 inf로 읽힘
+        for body in (
+            '{"empNo": "E001", "motionName": "fire_exit", "sensorData": [{"flex1": 1e999, "flex2": 1, "gyro_x": 1}]}',
+            '{"empNo": "E001", "motionName": "fire_exit", "channels": ["flex1", "flex2", "gyro_x"], '
+            '"frames": [[1e999, 1, 1]]}',
+        ):
+            response = self.client.post("/api/ai/evaluate/", body, content_type="application/json")
+            self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(
+            "/api/ai/evaluate/?empNo=E001&motionName=fire_exit",
+            encode(np.array(nan_matrix), CHANNELS),
+            content_type="application/octet-stream",
+        )
+        self.assertEqual(response.status_code, 400)
+
+        # 프레임 수 제한은 세 형식 모두에 적용
+        with mock.patch("ai.serializers.MAX_FRAMES", 59):
+            responses = [
+                self.evaluate(),
+                self.client.post("/api/ai/evaluate/", {**columnar, "frames": matrix}, format="json"),
+                self.client.post(
+                    "/api/ai/evaluate/?empNo=E001&motionName=fire_exit",
+                    encode(np.array(matrix), CHANNELS),
+                    content_type="application/octet-stream",
+                ),
+            ]
+        self.assertEqual([response.status_code for response in responses], [400, 400, 400])
+        self.assertFalse(UserRecording.objects.exists())
+
+
+@override_settings(AI_CACHE_VERSION_CHECK_INTERVAL=3600)
+class RecordingHistoryTests(TestCase):
+    def setUp(self):
+        context_resolver.clear()
+        self.company = Company.objects.create(name="test", biz_no="000-00-00000", password="password")
+        other = Company.objects.create(name="other", biz_no="111-11-11111", password="password")
+        self.employee = Employee.objects.create(company=self.company, emp_no="E001", name="trainee")
+        outsider = Employee.objects.create(company=other, emp_no="E001", name="outsider")
+        self.motion_type = MotionType.objects.create(motion_name="fire_exit")
+        # 같은 시각의 기록이 여러 개여야 id로 순서를 가르는지 확인할 수 있음
+        base = timezone.now().replace(microsecond=0)
+        UserRecording.objects.bulk_create(
+            [
+                UserRecording(user=employee, company_id=employee.company_id, motion_type=self.motion_type,
+                              score=index, recorded_at=base - timedelta(seconds=index // 3))
+                for index in range(25)
+                for employee in (self.employee, outsider)
+            ]
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.company)
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row["id"] for row in response.data["results"]]
+            url = response.data["next"]
+        return ids
+
+    def test_pages_cover_company_records_in_order(self):
+        expected = list(
+            UserRecording.objects.filter(company=self.company).order_by("-recorded_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(self.walk("/api/ai/history/?limit=4"), expected)
+        self.assertEqual(self.walk("/api/ai/history/?empNo=E001&motionName=fire_exit&limit=7"), expected)
+
+    def test_later_page_costs_one_query(self):
+        response = self.client.get("/api/ai/history/?limit=5")
+        for _ in range(3):
+            response = self.client.get(response.data["next"])
+        # 몇 번째 페이지든 COUNT/OFFSET 없이 인덱스 범위 조회 한 번
+        with self.assertNumQueries(1):
+            response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_invalid_cursor_and_unknown_employee(self):
+        self.assertEqual(self.client.get("/api/ai/history/?cursor=bogus").status_code, 404)
+        self.assertEqual(self.client.get("/api/ai/history/?empNo=NOPE").status_code, 404)
+
+    @skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN 형식은 SQLite 기준")
+    def test_query_plans_use_keyset_indexes(self):
+        cursor = self.client.get("/api/ai/history/?limit=5").data["next"].split("cursor=")[1]
+        for params, index in (
+            ("", "ai_rec_company_time_idx"),
+            ("empNo=E001&", "ai_rec_user_time_idx"),
+            ("empNo=E001&motionName=fire_exit&", "ai_rec_user_motion_time_idx"),
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(f"/api/ai/history/?{params}limit=5&cursor={cursor}")
+            with connection.cursor() as db:
+                db.execute("EXPLAIN QUERY PLAN " + queries.captured_queries[-1]["sql"])
+                plan = " / ".join(str(row[-1]) for row in db.fetchall())
+            self.assertIn(f"USING INDEX {index}", plan)
+            # 정렬을 인덱스 순서로 처리해야 함 (임시 정렬이 있으면 페이지마다 조건에 맞는 행을 모두 읽음)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+
+class SensorCodecTests(SimpleTestCase):
+    def test_round_trip(self):
+        data = np.random.default_rng(0).normal(size=(120, 3)).astype(np.float32)
+        for compress in (False, True):
+            array, channels = decode(encode(data, CHANNELS, compress=compress))
+            np.testing.assert_array_equal(array, data)
+            self.assertEqual(channels, list(CHANNELS))
+
+    def test_rejects_zip_bomb_and_size_mismatch(self):
+        data = np.zeros((10, 3), dtype=np.float32)
+        header = encode(data, CHANNELS)[: -data.nbytes]
+        compressed_header = encode(data, CHANNELS, compress=True)[: len(header)]
+        # 헤더는 10프레임인데 압축을 풀면 64MB가 되는 본문
+        bomb = compressed_header + zlib.compress(bytes(64 * 1024 * 1024), 9)
+        bad = [
+            bomb,
+            encode(data, CHANNELS, compress=True) + b"tail",
+            encode(data, CHANNELS, compress=True)[:-4],
+            encode(data, CHANNELS) + b"tail",
+            encode(data, CHANNELS)[:-4],
+        ]
+        for blob in bad:
+            with self.assertRaises(ValueError):
+                decode(blob)
+
+    def test_rejects_oversized_header(self):
+        blob = bytearray(encode(np.zeros((1, 3), dtype=np.float32), CHANNELS))
+        blob[8:12] = (MAX_FRAMES + 1).to_bytes(4, "little")
+        with self.assertRaises(ValueError):
+            decode(bytes(blob))
+
+
+
+class SensorBackfillTests(TestCase):
+    def setUp(self):
+        self.motion_type = MotionType.objects.create(motion_name="fire_exit", max_dtw_distance=50.0)
+        rng = np.random.default_rng(0)
+        self.recordings = [
+            MotionRecording.objects.create(
+                motion_type=self.motion_type, score_category="reference", data_frames=40,
+                sensor_data_json=rng.normal(50, 20, size=(40, 3)).tolist(),
+            )
+            for _ in range(3)
+        ]
+        self.before = [recording.get_sensor_data_to_numpy() for recording in self.recordings]
+
+    def test_converts_json_to_blob_once(self):
+        self.assertEqual(backfill_sensor_blobs(MotionRecording, batch_size=2), 3)
+        for recording, before in zip(self.recordings, self.before):
+            recording.refresh_from_db()
+            self.assertIsNotNone(recording.sensor_data_blob)
+            # 변환 전(JSON, float64)과 같은 배열을 float32 정밀도로 돌려줌
+            after = recording.get_sensor_data_to_numpy()
+            self.assertEqual(after.dtype, np.float32)
+            np.testing.assert_allclose(after, before, rtol=1e-6)
+        # 다시 실행해도 이미 옮긴 행은 건드리지 않음
+        self.assertEqual(backfill_sensor_blobs(MotionRecording), 0)
+        self.assertFalse(MotionRecording.objects.filter(sensor_data_json__isnull=True).exists())
+
+    def test_drop_json_also_clears_rows_converted_earlier(self):
+        backfill_sensor_blobs(MotionRecording, compress=True)
+        self.assertEqual(backfill_sensor_blobs(MotionRecording, drop_json=True), 0)
+        self.assertFalse(MotionRecording.objects.filter(sensor_data_json__isnull=False).exists())
+        for recording, before in zip(self.recordings, self.before):
+            recording.refresh_from_db()
+            np.testing.assert_allclose(recording.get_sensor_data_to_numpy(), before, rtol=1e-6)
+
+    def test_command_bumps_reference_version_only_when_converting(self):
+        version = MotionType.objects.get(pk=self.motion_type.pk).reference_version
+        out = StringIO()
+        call_command("backfill_sensor_data", "--drop-json", stdout=out)
+        self.assertIn("3개", out.getvalue())
+        self.assertEqual(MotionType.objects.get(pk=self.motion_type.pk).reference_version, version + 1)
+        self.assertFalse(MotionRecording.objects.filter(sensor_data_json__isnull=False).exists())
+
+        call_command("backfill_sensor_data", stdout=StringIO())
+        self.assertEqual(MotionType.objects.get(pk=self.motion_type.pk).reference_version, version + 1)
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="test", biz_no="000-00-00000", password="password")
+        self.other = Company.objects.create(name="other", biz_no="111-11-11111", password="password")
+        self.motion_type = MotionType.objects.create(motion_name="fire_exit", max_dtw_distance=50.0)
+
+    def test_enqueue_merges_pending_jobs_and_records_requesters(self):
+        first = enqueue_recalibration(self.motion_type, company=self.company)
+        second = enqueue_recalibration(self.motion_type, company=self.other)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(set(first.requested_by.all()), {self.company, self.other})
+        # 같은 키의 대기 작업은 DB에서도 하나만 만들 수 있음 (동시 등록 시 늦은 쪽은 IntegrityError 후 합침)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Job.objects.create(kind=RECALIBRATE_MAX_DTW, dedup_key=first.dedup_key, pending_key=first.dedup_key)
+
+        # 실행이 시작된 뒤에 들어온 요청은 새 작업으로 등록
+        self.assertEqual(claim_next_job().pk, first.pk)
+        self.assertNotEqual(enqueue_recalibration(self.motion_type).pk, first.pk)
+
+    def test_stale_jobs_are_reclaimed_until_max_attempts(self):
+        job = enqueue_recalibration(self.motion_type)
+        claim_next_job()
+        stale = timezone.now() - JOB_LEASE - timedelta(seconds=1)
+        # heartbeat가 살아 있으면 다른 워커가 가져가지 않음
+        self.assertIsNone(claim_next_job())
+
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=stale)
+        reclaimed = claim_next_job()
+        self.assertEqual((reclaimed.pk, reclaimed.attempts), (job.pk, 2))
+
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=stale, attempts=job.max_attempts)
+        self.assertIsNone(claim_next_job())
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.STATUS_FAILED)
+
+    def test_run_job_retries_and_ignores_superseded_attempts(self):
+        def fail(payload):
+            raise RuntimeError("boom")
+
+        with mock.patch.dict(JOB_HANDLERS, {"test_fail": fail}):
+            job = enqueue_job("test_fail", dedup_key="test:1")
+            run_job(claim_next_job())
+            job.refresh_from_db()
+            # 재시도 대기 중에도 같은 키로 다시 등록하면 합쳐짐
+            self.assertEqual((job.status, job.pending_key), (Job.STATUS_PENDING, "test:1"))
+            self.assertEqual(enqueue_job("test_fail", dedup_key="test:1").pk, job.pk)
+
+            # 실행 중에 다른 워커가 이 작업을 다시 가져갔으면 (attempts가 바뀜) 결과를 덮어쓰지 않음
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            claimed = claim_next_job()
+            Job.objects.filter(pk=job.pk).update(attempts=F("attempts") + 1)
+            run_job(claimed)
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.STATUS_RUNNING)
+
+    def test_job_status_is_scoped_to_requesting_company(self):
+        job = enqueue_recalibration(self.motion_type, company=self.company)
+        Job.objects.filter(pk=job.pk).update(last_error="Traceback ... /srv/app/ai/logic.py")
+        client = APIClient()
+        client.force_authenticate(user=self.other)
+        self.assertEqual(client.get(f"/api/ai/jobs/{job.pk}/").status_code, 404)
+
+        client.force_authenticate(user=self.company)
+        response = client.get(f"/api/ai/jobs/{job.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("last_error", response.data)
+
+
+@override_settings(AI_CACHE_VERSION_CHECK_INTERVAL=3600)
+class APIKeyCacheTests(TestCase):
+    def setUp(self):
+        api_key_cache.clear()
+        self.company = Company.objects.create(name="test", biz_no="000-00-00000", password="password")
+        self.device = SensorDevice.objects.create(company=self.company, device_uid="unity-1")
+
+    def test_deactivated_key_is_rejected_after_version_bump(self):
+        self.assertEqual(api_key_cache.get_device(self.device.api_key), self.device)
+        before = api_key_cache.stats()
+        with self.assertNumQueries(0):
+            self.assertEqual(api_key_cache.get_device(self.device.api_key), self.device)
+        self.assertEqual(api_key_cache.stats()["hits"], before["hits"] + 1)
+
+        # post_save 시그널이 버전을 올리므로 확인 주기를 기다리지 않고 캐시가 비워짐
+        self.device.is_active = False
+        self.device.save()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIsNone(api_key_cache.get_device(self.device.api_key))
+        # 버전 확인은 이 프로세스가 물어본 키만 읽음
+        version_query = next(query["sql"] for query in queries if CacheVersion._meta.db_table in query["sql"])
+        self.assertIn(" IN ", version_query)
+        self.assertIn("glife_api_key_cache_misses_total", registry.render())
+
+
+class MetricsAccessTests(TestCase):
+    @override_settings(AI_METRICS_TOKEN="", AI_METRICS_ALLOW_ANONYMOUS=False)
+    def test_denied_without_configured_token(self):
+        self.assertEqual(APIClient().get("/api/ai/metrics/").status_code, 403)
+
+    @override_settings(AI_METRICS_TOKEN="", AI_METRICS_ALLOW_ANONYMOUS=True)
+    def test_anonymous_only_when_explicitly_allowed(self):
+        self.assertEqual(APIClient().get("/api/ai/metrics/").status_code, 200)
+
+    @override_settings(AI_METRICS_TOKEN="secret", AI_METRICS_ALLOW_ANONYMOUS=True)
+    def test_token_is_required_once_configured(self):
+        client = APIClient()
+        self.assertEqual(client.get("/api/ai/metrics/").status_code, 403)
+        self.assertEqual(client.get("/api/ai/metrics/", HTTP_AUTHORIZATION="Bearer secret").status_code, 200)
+
+
+class MetricsRetireTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        # 이미 종료된 프로세스의 pid
+        process = subprocess.Popen(["true"])
+        process.wait()
+        self.dead_pid = process.pid
+
+    def write_process_file(self, name: str, pid: int, count: int):
+        path = Path(self.directory.name) / f"{name}.json"
+        path.write_text(
+            json.dumps({"pid": pid, "metrics": {"glife_evaluations_total": [[["retire_test", "ok"], count]]}}),
+            encoding="utf-8",
+        )
+        return path
+
+    def total(self) -> str:
+        line = 'glife_evaluations_total{motion="retire_test",result="ok"} '
+        for row in registry.render().splitlines():
+            if row.startswith(line):
+                return row[len(line):]
+        return None
+
+    def test_dead_process_files_are_merged_once_and_deleted(self):
+        with override_settings(AI_METRICS_DIR=self.directory.name):
+            first = self.write_process_file(f"{self.dead_pid}-a", self.dead_pid, 3)
+            live = self.write_process_file(f"{os.getpid()}-other", os.getpid(), 1)
+            self.assertEqual(self.total(), "4")
+            self.assertFalse(first.exists())
+            self.assertTrue(live.exists())
+            self.assertTrue((Path(self.directory.name) / RETIRED_FILE).exists())
+            # 다시 합쳐도 한 번만 더해짐
+            self.assertEqual(self.total(), "4")
+
+            self.write_process_file(f"{self.dead_pid}-b", self.dead_pid, 5)
+            self.assertEqual(self.total(), "9")
+
+            # 합계를 저장한 뒤 파일을 지우기 전에 멈춘 경우: 다시 더하지 않고 지우기만 함
+            retired = json.loads((Path(self.directory.name) / RETIRED_FILE).read_text(encoding="utf-8"))
+            stale = self.write_process_file(f"{self.dead_pid}-c", self.dead_pid, 7)
+            retired["merged"].append(stale.stem)
+            (Path(self.directory.name) / RETIRED_FILE).write_text(json.dumps(retired), encoding="utf-8")
+            self.assertEqual(self.total(), "9")
+            self.assertFalse(stale.exists())
+            self.assertEqual(
+                sorted(path.name for path in Path(self.directory.name).glob("*.json")),
+                sorted([RETIRED_FILE, live.name]),
+            )
+
+
+@override_settings(AI_BATCH_WORKERS=2)
+class BatchScoringTests(SimpleTestCase):
+    def tearDown(self):
+        if logic._batch_pool is not None:
+            logic._batch_pool.shutdown()
+            logic._batch_pool = None
+
+    def test_parallel_scores_match_serial_and_send_references_per_chunk(self):
+        motions = {}
+        for name, seeds in (("a", (0, 1)), ("b", (2,))):
+            references = [preprocess_frames(make_frames(60, seed)) for seed in seeds]
+            motions[name] = (references, [envelope(data) for data in references], 5.0, "average", 3, "exact")
+        tasks = []
+        for seed, name in zip(range(10, 16), "aaaaab"):
+            frames = make_frames(60, seed)
+            tasks.append((np.array([[frame[ch] for ch in CHANNELS] for frame in frames]), list(CHANNELS), name))
+        serial = [score_sensor_array(array, channels, *motions[name]) for array, channels, name in tasks]
+
+        pool = logic._get_batch_pool()
+        with mock.patch.object(pool, "submit", wraps=pool.submit) as submit:
+            parallel = logic._score_in_parallel(tasks, motions)
+        self.assertEqual(parallel, serial)
+        # a 5건은 워커 2개에 맞춰 2묶음, b 1건은 1묶음 -> 모범 동작은 3번만 넘어감
+        self.assertEqual(submit.call_count, 3)
+
+
+class StreamingPreprocessorTests(SimpleTestCase):
+    def test_chunks_match_one_shot_preprocessing(self):
+        frames = make_frames(97, 3)
+        expected = preprocess_frames(frames)
+        for sizes in ([97], [1] * 97, [3, 20, 7, 1, 66], [11, 11, 75], [5, 92]):
+            preprocessor = StreamingPreprocessor()
+            parts, start = [], 0
+            for size in sizes:
+                parts.append(preprocessor.push(frames[start:start + size]))
+                start += size
+            parts.append(preprocessor.finish())
+            np.testing.assert_allclose(np.concatenate([p for p in parts if p.size]), expected, rtol=1e-12, atol=1e-12)
+
+    def test_short_recordings_are_finished_in_one_piece(self):
+        frames = make_frames(6, 4)
+        preprocessor = StreamingPreprocessor()
+        self.assertEqual(preprocessor.push(frames).size, 0)
+        np.testing.assert_allclose(preprocessor.finish(), preprocess_frames(frames))
+
+
+@override_settings(AI_CACHE_VERSION_CHECK_INTERVAL=3600, AI_RECORDING_WRITE_BEHIND=False)
+class EvaluationSessionTests(TestCase):
+    def setUp(self):
+        clear_evaluator_cache()
+        self.company = Company.objects.create(name="test", biz_no="000-00-00000", password="password")
+        self.device = SensorDevice.objects.create(company=self.company, device_uid="unity-1")
+        self.employee = Employee.objects.create(company=self.company, emp_no="E001", name="trainee")
+        self.motion_type = MotionType.objects.create(motion_name="fire_exit", max_dtw_distance=50.0)
+        frames = make_frames(60, 0)
+        data = np.array([[frame[ch] for ch in CHANNELS] for frame in frames])
+        MotionRecording.objects.create(
+            motion_type=self.motion_type, score_category="reference", data_frames=len(frames),
+            sensor_data_blob=encode(preprocess_array(data, CHANNELS), CHANNELS),
+        )
+        self.session = open_session(self.device, self.employee.id, context_resolver.motion("fire_exit"))
+        frames = make_frames(60, 99)
+        append_chunk(self.session.id, self.device, 0, frames[:30])
+        self.last = frames[30:]
+
+    def test_finalize_saves_one_recording_and_is_idempotent(self):
+        result = finalize_session(self.session.id, self.device, seq=1, frames=self.last)
+        self.assertIn("score", result)
+        self.assertEqual(finalize_session(self.session.id, self.device), result)
+        self.assertEqual(UserRecording.objects.filter(user=self.employee, company=self.company).count(), 1)
+        self.assertEqual(ScoreRollup.objects.filter(company=self.company, period="day").get().count, 1)
+
+    def test_finalize_goes_through_write_behind_buffer(self):
+        buffer = mock.Mock()
+        with mock.patch("ai.logic.get_recording_buffer", return_value=buffer), \
+                self.captureOnCommitCallbacks(execute=True):
+            result = finalize_session(self.session.id, self.device, seq=1, frames=self.last)
+        buffer.add.assert_called_once_with(self.employee.id, self.motion_type.id, result["score"], self.company.id)
+        self.assertFalse(UserRecording.objects.exists())
+
+    def test_concurrent_finalize_while_scoring_keeps_first_result(self):
+        from . import sessions
+
+        score = sessions.score_user_data
+        # 첫 요청이 DTW 비교를 하는 동안(잠금 없음) 재시도 요청이 먼저 끝난 경우
+        def score_and_race(motion_type, user_data):
+            with mock.patch.object(sessions, "score_user_data", score):
+                self.winner = finalize_session(self.session.id, self.device)
+            return score(motion_type, user_data)
+
+        with mock.patch.object(sessions, "score_user_data", side_effect=score_and_race):
+            result = finalize_session(self.session.id, self.device, seq=1, frames=self.last)
+        self.assertEqual(result, self.winner)
+        self.assertEqual(UserRecording.objects.filter(user=self.employee).count(), 1)
+
+    def test_chunk_arriving_while_scoring_is_not_lost(self):
+        from . import sessions
+
+        score = sessions.score_user_data
+        def score_and_append(motion_type, user_data):
+            append_chunk(self.session.id, self.device, 1, self.last)
+            return score(motion_type, user_data)
+
+        with mock.patch.object(sessions, "score_user_data", side_effect=score_and_append):
+            with self.assertRaises(SessionError) as raised:
+                finalize_session(self.session.id, self.device)
+        self.assertEqual(raised.exception.status_code, 409)
+        self.assertFalse(UserRecording.objects.exists())
+        # 다시 완료 요청을 보내면 늦게 온 조각까지 포함해서 평가
+        finalize_session(self.session.id, self.device)
+        self.assertEqual(EvaluationSession.objects.get(pk=self.session.pk).status, EvaluationSession.STATUS_FINALIZED)
+
+
+class MaxDtwCalibrationTests(TestCase):
+    def setUp(self):
+        self.motion_type = MotionType.objects.create(
+            motion_name="fire_exit", max_dtw_distance=50.0, reference_set="templates", template_count=1
+        )
+        for category, seeds in (("reference", (0, 1, 2)), ("zero_score", (7, 8))):
+            for seed in seeds:
+                frames = make_frames(60, seed)
+                data = np.array([[frame[ch] for ch in CHANNELS] for frame in frames])
+                if category == "zero_score":
+                    data = data[::-1] * 0.5
+                MotionRecording.objects.create(
+                    motion_type=self.motion_type, score_category=category, data_frames=len(frames),
+                    sensor_data_blob=encode(preprocess_array(data, CHANNELS), CHANNELS),
+                )
+
+    def test_template_mode_calibrates_against_templates(self):
+        self.assertEqual(rebuild_templates(self.motion_type.pk), 1)
+        # 템플릿을 저장하면 보정 작업이 등록됨
+        self.assertTrue(Job.objects.filter(kind=RECALIBRATE_MAX_DTW, status=Job.STATUS_PENDING).exists())
+
+        update_max_dtw_for_motion(self.motion_type)
+        templates = load_templates(self.motion_type.motion_name)
+        zero_scores = [
+            record.get_sensor_data_to_numpy()
+            for record in MotionRecording.objects.filter(motion_type=self.motion_type, score_category="zero_score")
+        ]
+        expected = max(dtw_distance(template, zero) for template in templates for zero in zero_scores) * 1.1
+        self.motion_type.refresh_from_db()
+        self.assertAlmostEqual(self.motion_type.max_dtw_distance, expected, places=4)
+        # 전체 모범 동작 × 0점 동작 행렬은 계산하지 않음
+        self.assertFalse(MotionPairDistance.objects.filter(motion_type=self.motion_type).exists())
+
+        # all 방식으로 돌아가면 전체 모범 동작 기준으로 보정
+        self.motion_type.reference_set = "all"
+        self.motion_type.save()
+        update_max_dtw_for_motion(self.motion_type)
+        self.assertEqual(MotionPairDistance.objects.filter(motion_type=self.motion_type).count(), 6)
+
+    def test_deleting_recordings_recalibrates_once_after_commit(self):
+        self.motion_type.reference_set = "all"
+        self.motion_type.save()
+        update_max_dtw_for_motion(self.motion_type)
+        recordings = MotionRecording.objects.filter(motion_type=self.motion_type)
+        with mock.patch("ai.logic.recalculate_max_dtw_from_matrix") as recalculate:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                recordings.filter(pk__in=[recordings.first().pk, recordings.last().pk]).delete()
+                recalculate.assert_not_called()
+        self.assertEqual(len(callbacks), 1)
+        recalculate.assert_called_once()
+
+        # 롤백된 트랜잭션(세이브포인트)의 콜백이 다음 삭제의 재계산을 막지 않음
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                recordings.first().delete()
+                raise IntegrityError
+            recordings.first().delete()
+        self.assertEqual(len(callbacks), 1)
+
+        # 동작 유형째 지우면 녹화마다 다시 계산하거나 버전을 올리지 않음
+        with self.captureOnCommitCallbacks() as callbacks, CaptureQueriesContext(connection) as queries:
+            self.motion_type.delete()
+        self.assertEqual(callbacks, [])
+        self.assertFalse(any("UPDATE" in query["sql"] and "reference_version" in query["sql"] for query in queries))
+
+
+class ScoreRollupTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="test", biz_no="000-00-00000", password="password")
+        self.employee = Employee.objects.create(company=self.company, emp_no="E001", name="trainee")
+        self.motion_type = MotionType.objects.create(motion_name="fire_exit", max_dtw_distance=50.0)
+
+    def snapshot(self):
+        fields = ["period", "bucket_start", "count", "score_min", "score_max", "pass_count", *HISTOGRAM_FIELDS]
+        rows = ScoreRollup.objects.order_by("period", "bucket_start").values_list(*fields, "score_sum")
+        return [(*row[:-1], round(row[-1], 6)) for row in rows]
+
+    def test_incremental_updates_match_rebuild(self):
+        rng = np.random.default_rng(0)
+        now = timezone.now()
+        recordings = [
+            UserRecording(
+                user=self.employee, company=self.company, motion_type=self.motion_type,
+                score=float(rng.choice([0.0, 100.0, rng.uniform(0, 100)])),
+                recorded_at=now - timedelta(days=int(rng.integers(0, 20))),
+            )
+            for _ in range(200)
+        ]
+        UserRecording.objects.bulk_create(recordings)
+        # 여러 번 나눠서 더해도 (새 집계 행 생성 + 기존 행 UPDATE) 다시 계산한 결과와 같아야 함
+        for start in range(0, len(recordings), 37):
+            record_scores(recordings[start:start + 37])
+        incremental = self.snapshot()
+        rebuild_rollups(self.company.id)
+        self.assertEqual(incremental, self.snapshot())
+        self.assertEqual(sum(row[2] for row in incremental if row[0] == "day"), 200)
+
+
+
+# flush가 자체 트랜잭션과 close_old_connections()를 쓰므로 테스트 트랜잭션으로 감싸지 않음
+class RecordingBufferTests(TransactionTestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="test", biz_no="000-00-00000", password="password")
+        self.employee = Employee.objects.create(company=self.company, emp_no="E001", name="trainee")
+        self.motion_type = MotionType.objects.create(motion_name="fire_exit", max_dtw_distance=50.0)
+        self.spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.spool_dir.cleanup)
+
+    def make_buffer(self):
+        # 백그라운드 스레드 없이 스풀 파일만 열어둠 (flush는 테스트에서 직접 호출)
+        buffer = recording_buffer.RecordingBuffer(self.spool_dir.name, flush_interval=3600)
+        buffer._segment = recording_buffer._SpoolSegment(buffer.spool_dir)
+        self.addCleanup(lambda: buffer._segment.file.close())
+        return buffer
+
+    def test_failed_flush_keeps_spool_and_retries(self):
+        buffer = self.make_buffer()
+        buffer.extend([(self.employee.id, self.motion_type.id, score, self.company.id) for score in (80.0, 0.0)])
+        with mock.patch.object(UserRecording.objects, "bulk_create", side_effect=OperationalError("db down")):
+            self.assertEqual(buffer.flush(), 0)
+        stats = buffer.stats()
+        self.assertEqual((stats["depth"], stats["retry_segments"], stats["flush_failures"]), (0, 1, 1))
+        self.assertGreater(stats["spool_bytes"], 0)
+        self.assertFalse(UserRecording.objects.exists())
+        with mock.patch.object(recording_buffer, "_buffer", buffer):
+            self.assertIn("glife_recording_flush_failures_total 1", registry.render())
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(sorted(UserRecording.objects.values_list("score", flat=True)), [0.0, 80.0])
+        self.assertEqual(ScoreRollup.objects.get(period="day").count, 2)
+        self.assertEqual((buffer.stats()["retry_segments"], buffer.stats()["spool_bytes"]), (0, 0))
+
+    def test_orphaned_spool_is_replayed_once(self):
+        crashed = self.make_buffer()
+        crashed.add(self.employee.id, self.motion_type.id, 90.0, self.company.id)
+        # 저장하기 전에 프로세스가 죽은 것처럼 잠금만 풀고 스풀 파일을 남김
+        crashed._segment.release()
+
+        # 살아 있는 워커의 스풀 파일(잠겨 있음)은 건드리지 않음
+        live = self.make_buffer()
+        live.add(self.employee.id, self.motion_type.id, 70.0, self.company.id)
+
+        replayed = recording_buffer.replayed_records.samples()
+        with override_settings(AI_RECORDING_SPOOL_DIR=self.spool_dir.name):
+            self.assertEqual(recording_buffer.replay_orphaned_spool(), 1)
+            self.assertEqual(recording_buffer.replay_orphaned_spool(), 0)
+        self.assertEqual(list(UserRecording.objects.values_list("score", flat=True)), [90.0])
+        self.assertEqual(recording_buffer.replayed_records.samples()[0][1] - (replayed[0][1] if replayed else 0), 1)
+        self.assertTrue(live._segment.path.exists())
+
+    def test_startup_replay_keeps_spool_when_database_is_unavailable(self):
+        crashed = self.make_buffer()
+        crashed.add(self.employee.id, self.motion_type.id, 90.0, self.company.id)
+        crashed._segment.release()
+        with override_settings(AI_RECORDING_SPOOL_DIR=self.spool_dir.name):
+            with mock.patch.object(UserRecording.objects, "bulk_create", side_effect=OperationalError("no such table")):
+                self.assertEqual(recording_buffer.replay_orphaned_spool(), 0)
+            self.assertTrue(crashed._segment.path.exists())
+            self.assertEqual(recording_buffer.replay_orphaned_spool(), 1)
+        self.assertFalse(crashed._segment.path.exists())
+
+
+class SavgolTests(SimpleTestCase):
+    def test_matches_scipy_savgol_filter(self):
+        rng = np.random.default_rng(0)
+        for num_frames in (*range(5, 30), 200):
+            data = rng.normal(size=(num_frames, 4)) * 50
+            window_length = resolve_window_length(num_frames)
+            expected = savgol_filter(data, window_length, SAVGOL_POLYORDER, axis=0, mode="interp")
+            np.testing.assert_allclose(savgol_smooth(data, window_length), expected, rtol=0, atol=1e-9)
+
+    def test_too_short_for_polyorder_fails_like_scipy(self):
+        data = np.ones((4, 2))
+        window_length = resolve_window_length(4)
+        with self.assertRaises(ValueError):
+            savgol_filter(data, window_length, SAVGOL_POLYORDER, axis=0, mode="interp")
+        with self.assertRaises(ValueError):
+            savgol_smooth(data, window_length)
+
+
+class ScoringTests(SimpleTestCase):
+    def setUp(self):
+        # 가까운 모범 동작 4개 + 거꾸로 뒤집은 먼 모범 동작 3개 (LB_Keogh로 건너뛸 수 있는 경우)
+        self.references = [preprocess_frames(make_frames(60, seed)) for seed in range(4)]
+        self.references += [preprocess_frames(make_frames(60, seed))[::-1] * 0.3 for seed in range(4, 7)]
+        self.envelopes = [envelope(data) for data in self.references]
+        self.queries = [preprocess_frames(make_frames(50, seed)) for seed in range(20, 23)]
+        self.queries.append(self.references[5][::-1])
+
+    def test_nearest_k_matches_brute_force(self):
+        max_dtw_distance = 5.0
+        pruned = 0
+        for query in self.queries:
+            distances = sorted(dtw_distance(query, data) for data in self.references)
+            for k in (1, 2, 3, len(self.references) + 1):
+                nearest = distances[:k]
+                expected = max(0, 1 - min(sum(nearest) / len(nearest) / max_dtw_distance, 1.0)) * 100
+                result = score_motion(
+                    query, self.references, self.envelopes, max_dtw_distance, mode="nearest_k", k=k,
+                    early_abandon=False,
+                )
+                self.assertAlmostEqual(result["score"], expected, places=9)
+                self.assertEqual(result["compared_references"], len(nearest))
+                pruned += result["dtw_pruned"]
+        self.assertGreater(pruned, 0)
+
+    def test_early_abandon_keeps_nonzero_scores(self):
+        outcomes = {"positive": 0, "zero": 0, "stopped": 0}
+        for mode in ("average", "nearest_k"):
+            for max_dtw_distance in (0.05, 0.1, 0.105, 0.11, 0.2, 1.0, 3.0, 4.86, 5.0, 10.0):
+                for query in self.queries:
+                    args = (query, self.references, self.envelopes, max_dtw_distance)
+                    full = score_motion(*args, mode=mode, k=2, early_abandon=False)
+                    early = score_motion(*args, mode=mode, k=2, early_abandon=True)
+                    if full["score"] > 0:
+                        # 0점보다 큰 점수는 끝까지 계산한 결과와 같아야 함
+                        self.assertAlmostEqual(early["score"], full["score"], places=9)
+                        self.assertAlmostEqual(early["avg_dtw_distance"], full["avg_dtw_distance"], places=9)
+                        outcomes["positive"] += 1
+                    else:
+                        self.assertEqual(early["score"], 0)
+                        outcomes["zero"] += 1
+                        outcomes["stopped"] += early["avg_dtw_distance"] is None
+        self.assertTrue(all(outcomes.values()), outcomes)
+
+
+class FakeEvaluator:
+    nbytes = 100
+    created = []
+
+    def __init__(self, motion_name, *args):
+        time.sleep(0.05)
+        FakeEvaluator.created.append(motion_name)
+
+
+@mock.patch("ai.evaluator_cache.MotionEvaluator", FakeEvaluator)
+class EvaluatorCacheTests(SimpleTestCase):
+    def setUp(self):
+        FakeEvaluator.created = []
+
+    def test_concurrent_misses_build_once(self):
+        cache = EvaluatorCache(max_bytes=1000, ttl=None)
+        barrier = threading.Barrier(8)
+        results = []
+
+        def load():
+            barrier.wait()
+            results.append(cache.get("fire_exit", 1))
+
+        threads = [threading.Thread(target=load) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(FakeEvaluator.created, ["fire_exit"])
+        self.assertEqual(len({id(evaluator) for evaluator in results}), 1)
+
+    def test_lru_eviction_and_version_invalidation(self):
+        cache = EvaluatorCache(max_bytes=250, ttl=None)
+        first = cache.get("a", 1)
+        cache.get("b", 1)
+        self.assertIs(cache.get("a", 1), first)
+        # 예산(250바이트)을 넘으면 가장 오래 쓰지 않은 b부터 삭제
+        cache.get("c", 1)
+        self.assertEqual(
+            {key: cache.stats()[key] for key in ("entries", "bytes", "evictions", "hits")},
+            {"entries": 2, "bytes": 200, "evictions": 1, "hits": 1},
+        )
+        cache.get("b", 1)
+        self.assertEqual(FakeEvaluator.created.count("b"), 2)
+
+        # 모범 동작이 바뀌어 버전이 오르면 다시 만듦
+        old = cache.get("b", 1)
+        new = cache.get("b", 2)
+        self.assertIsNot(new, old)
+        self.assertIs(cache.get("b", 2), new)
+        self.assertEqual(FakeEvaluator.created.count("b"), 3)
+
+
+
+@mock.patch("ai.evaluator_cache.MotionEvaluator", FakeEvaluator)
+class EvaluatorWarmupTests(TransactionTestCase):
+    # warm_evaluator_cache()가 DB 연결을 닫으므로 TestCase(트랜잭션 안) 대신 사용
+    def setUp(self):
+        FakeEvaluator.created = []
+        self.cache = EvaluatorCache(max_bytes=1000, ttl=None)
+        patcher = mock.patch("ai.evaluator_cache.evaluator_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_warms_every_motion(self):
+        MotionType.objects.create(motion_name="fire_exit", max_dtw_distance=50.0)
+        MotionType.objects.create(motion_name="extinguisher", max_dtw_distance=50.0, reference_version=3)
+        self.assertEqual(warm_evaluator_cache(), 2)
+        self.assertEqual(sorted(FakeEvaluator.created), ["extinguisher", "fire_exit"])
+        # 첫 요청은 DB 조회 없이 캐시에서 바로 꺼냄
+        self.cache.get("extinguisher", 3)
+        self.assertEqual((self.cache.stats()["entries"], self.cache.stats()["hits"]), (2, 1))
+
+    def test_skips_when_database_is_unavailable(self):
+        # 마이그레이션 전이나 DB가 꺼져 있을 때 워커 시작(manage.py 명령 포함)을 막지 않음
+        with mock.patch.object(MotionType.objects, "values_list", side_effect=OperationalError("no such table")):
+            self.assertEqual(warm_evaluator_cache(), 0)
+        self.assertEqual(FakeEvaluator.created, [])
+        self.assertEqual(warm_evaluator_cache(), 0)
+
+class EvalServiceTests(SimpleTestCase):
+    def test_hash_ring_spreads_motions_and_moves_few_on_resize(self):
+        motions = [f"motion_{i}" for i in range(2000)]
+        ring = HashRing(range(8))
+        placement = {motion: ring.node_for(motion) for motion in motions}
+        counts = [list(placement.values()).count(node) for node in range(8)]
+        # 노드마다 평균(250개)에서 크게 벗어나지 않음
+        self.assertGreater(min(counts), 250 * 0.6)
+        self.assertLess(max(counts), 250 * 1.4)
+
+        # 노드를 하나 늘리면 새 노드로 가는 동작만 옮겨감
+        grown = HashRing(range(9))
+        moved = [motion for motion in motions if grown.node_for(motion) != placement[motion]]
+        self.assertTrue(all(grown.node_for(motion) == 8 for motion in moved))
+        self.assertLess(len(moved), len(motions) * 0.2)
+
+    def test_pack_unpack_round_trip(self):
+        rng = np.random.default_rng(0)
+        references = [rng.normal(size=(frames, 3)).astype(np.float32) for frames in (60, 41, 75)]
+        envelopes = [envelope(reference, 5) for reference in references]
+        shm, layout = pack_references(references, envelopes)
+        self.addCleanup(shm.unlink)
+        self.addCleanup(shm.close)
+
+        unpacked, unpacked_envelopes = unpack_references(shm.buf, layout)
+        self.assertEqual(len(unpacked), 3)
+        for original, restored in zip(references, unpacked):
+            np.testing.assert_array_equal(restored, original)
+            self.assertFalse(restored.flags.writeable)
+        for (lower, upper), (restored_lower, restored_upper) in zip(envelopes, unpacked_envelopes):
+            np.testing.assert_array_equal(restored_lower, lower)
+            np.testing.assert_array_equal(restored_upper, upper)
+        # 배열 시작 위치는 64바이트 단위로 정렬
+        self.assertTrue(all(offset % 64 == 0 for offset, _ in layout["slots"]))
+
+    def test_workers_are_grouped_into_nodes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for workers, node_processes, nodes in ((10, 4, [4, 3, 3]), (3, 4, [3]), (4, 1, [1, 1, 1, 1])):
+                service = EvaluationService(workers, f"{tmp}/eval.sock", node_processes=node_processes)
+                self.assertEqual(service.stats()["nodes"], nodes)
+                self.assertEqual(service.stats()["workers"], workers)
+                service.close()
+
+
+class CoarseToFineTests(SimpleTestCase):
+    def noisy_recording(self, num_frames: int, seed: int) -> np.ndarray:
+        rng = np.random.default_rng(seed)
+        data = np.array([[frame[ch] for ch in CHANNELS] for frame in make_frames(num_frames, seed)])
+        return preprocess_array(data + rng.normal(0, 4, size=data.shape), CHANNELS)
+
+    def test_close_to_and_never_below_exact(self):
+        for index in range(8):
+            rows = 300 + 60 * index
+            s1 = self.noisy_recording(rows, index)
+            s2 = self.noisy_recording(rows + (-1) ** index * 25 * (index % 4), 100 + index)
+            exact = dtw_distance(s1, s2)
+            coarse = coarse_to_fine_distance(s1, s2)
+            # 통로 밖의 경로를 보지 않으므로 exact 이상 (부동소수점 오차만 허용), 2% 이내
+            self.assertGreaterEqual(coarse, exact * (1 - 1e-9))
+            self.assertLessEqual(coarse, exact * 1.02)
+            self.assertEqual(dtw_distance(s1, s2, engine="coarse_to_fine"), coarse)
+
+    def test_short_recordings_take_exact_path(self):
+        s1 = self.noisy_recording(COARSE_MIN_FRAMES - 1, 0)
+        s2 = self.noisy_recording(COARSE_MIN_FRAMES + 40, 1)
+        with mock.patch("ai.dtw_engine.corridor_dtw") as corridor_dtw:
+            distance = coarse_to_fine_distance(s1, s2)
+        corridor_dtw.assert_not_called()
+        self.assertEqual(distance, dtw_distance(s1, s2))
+
+
+class ReferenceSnapshotTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.motion_type = MotionType.objects.create(motion_name="fire exit/1", max_dtw_distance=50.0)
+        for category, seed in (("reference", 0), ("reference", 1), ("zero_score", 2)):
+            self.add_recording(category, seed)
+
+    def add_recording(self, category: str, seed: int):
+        frames = make_frames(60, seed)
+        data = np.array([[frame[ch] for ch in CHANNELS] for frame in frames])
+        return MotionRecording.objects.create(
+            motion_type=self.motion_type, score_category=category, data_frames=len(frames),
+            sensor_data_blob=encode(preprocess_array(data, CHANNELS), CHANNELS),
+        )
+
+    def current_version(self) -> int:
+        self.motion_type.refresh_from_db()
+        return self.motion_type.reference_version
+
+    def test_stale_version_is_rebuilt(self):
+        snapshot = get_snapshot(self.motion_type.motion_name, self.current_version(), self.directory)
+        self.assertEqual(len(snapshot.recordings()), 2)
+        # 0점 동작은 담지 않음
+        references = MotionRecording.objects.filter(motion_type=self.motion_type, score_category="reference")
+        self.assertEqual(snapshot.recording_ids(), sorted(references.values_list("pk", flat=True)))
+        np.testing.assert_array_equal(snapshot.recordings()[0], references.order_by("pk")[0].get_sensor_data_to_numpy())
+
+        # 모범 동작이 추가되면 버전이 올라서 다시 만듦 (이미 연 스냅샷은 옛 내용을 계속 읽을 수 있음)
+        self.add_recording("reference", 3)
+        self.assertFalse(snapshot.is_current(self.current_version()))
+        rebuilt = get_snapshot(self.motion_type.motion_name, self.current_version(), self.directory)
+        self.assertTrue(rebuilt.is_current(self.current_version()))
+        self.assertEqual(len(rebuilt.recordings()), 3)
+        self.assertEqual(len(snapshot.recordings()), 2)
+
+    def test_corrupt_or_truncated_file_is_rebuilt(self):
+        version = self.current_version()
+        path = snapshot_path(self.motion_type.motion_name, self.directory)
+        get_snapshot(self.motion_type.motion_name, version, self.directory)
+        valid = path.read_bytes()
+        for broken in (valid[:-64], valid[:40], valid[:6], b"GARBAGE" * 10, b""):
+            path.write_bytes(broken)
+            self.assertIsNone(open_snapshot(self.motion_type.motion_name, self.directory))
+            snapshot = get_snapshot(self.motion_type.motion_name, version, self.directory)
+            self.assertTrue(snapshot.is_current(version))
+            self.assertEqual(path.read_bytes(), valid)
+
+    def test_waits_for_a_rebuild_holding_the_file_lock(self):
+        import fcntl
+
+        version = self.current_version()
+        motion_name = self.motion_type.motion_name
+        path = snapshot_path(motion_name, self.directory)
+        results = []
+        with mock.patch("ai.reference_snapshot.build_snapshot") as build_snapshot:
+            # 다른 프로세스가 스냅샷을 만드는 중 (잠금을 잡고 있음)
+            with open(path.with_name(f".{path.name}.lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                thread = threading.Thread(
+                    target=lambda: results.append(get_snapshot(motion_name, version, self.directory))
+                )
+                thread.start()
+                thread.join(0.2)
+                self.assertTrue(thread.is_alive())
+                _write_snapshot(path, motion_name, version, [(1, np.ones((20, 3)))])
+            thread.join()
+        # 잠금이 풀린 뒤 다시 확인해서, 다른 프로세스가 만든 최신 파일을 그대로 씀
+        build_snapshot.assert_not_called()
+        self.assertEqual(results[0].recording_ids(), [1])
+
+    def test_export_removes_snapshots_of_deleted_motions(self):
+        other = MotionType.objects.create(motion_name="ladder", max_dtw_distance=50.0)
+        self.assertEqual(
+            sorted(export_snapshots(directory=self.directory)["built"]), [self.motion_type.motion_name, "ladder"]
+        )
+        self.assertEqual(
+            sorted(export_snapshots(directory=self.directory)["skipped"]), [self.motion_type.motion_name, "ladder"]
+        )
+        ladder_path = snapshot_path("ladder", self.directory)
+        # get_snapshot이 다시 만들 때 쓰는 잠금 파일도 함께 지워야 함
+        ladder_path.with_name(f".{ladder_path.name}.lock").touch()
+
+        other.delete()
+        # 일부 동작만 내보낼 때는 지우지 않음
+        self.assertEqual(export_snapshots([self.motion_type.motion_name], directory=self.directory)["removed"], [])
+        self.assertTrue(ladder_path.exists())
+        self.assertEqual(export_snapshots(directory=self.directory)["removed"], [ladder_path.name])
+        self.assertFalse(ladder_path.exists())
+        self.assertFalse(ladder_path.with_name(f".{ladder_path.name}.lock").exists())
+        self.assertTrue(snapshot_path(self.motion_type.motion_name, self.directory).exists())
+
+    def test_counts_reference_recordings_not_yet_backfilled(self):
+        self.assertEqual(legacy_json_recordings(), 0)
+        MotionRecording.objects.create(
+            motion_type=self.motion_type, score_category="reference", data_frames=2,
+            sensor_data_json=[[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]],
+        )
+        self.assertEqual(legacy_json_recordings(), 1)
+        self.assertEqual(legacy_json_recordings(["ladder"]), 0)
@@ -3,7 +3,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 # MotionTypeViewSet을 추가로 임포트
-from .views import MotionRecordingView, UnifiedEvaluationView, SensorDeviceViewSet, MotionTypeViewSet
+from .views import (
+    MotionRecordingView, UnifiedEvaluationView, BatchEvaluationView,
+    EvaluationSessionOpenView, EvaluationSessionChunkView, EvaluationSessionFinalizeView,
+    SensorDeviceViewSet, MotionTypeViewSet, JobStatusView, MetricsView, ScoreTrendView, PassRateView,
+    RecordingHistoryView,
+)
 
 # 라우터 생성
 router = DefaultRouter()
@@ -16,6 +21,15 @@ urlpatterns = [
     # 기존 URL
     path('recordings/', MotionRecordingView.as_view(), name='motion-recording'),
     path('evaluate/', UnifiedEvaluationView.as_view(), name='unified-evaluation'),
+    path('evaluate/batch/', BatchEvaluationView.as_view(), name='batch-evaluation'),
+    path('sessions/', EvaluationSessionOpenView.as_view(), name='evaluation-session-open'),
+    path('sessions/<uuid:session_id>/chunks/', EvaluationSessionChunkView.as_view(), name='evaluation-session-chunk'),
+    path('sessions/<uuid:session_id>/finalize/', EvaluationSessionFinalizeView.as_view(), name='evaluation-session-finalize'),
+    path('jobs/<int:pk>/', JobStatusView.as_view(), name='job-status'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('stats/trends/', ScoreTrendView.as_view(), name='score-trends'),
+    path('stats/pass-rates/', PassRateView.as_view(), name='pass-rates'),
+    path('history/', RecordingHistoryView.as_view(), name='recording-history'),
     
     # 라우터에 등록된 URL들을 포함 (/api/ai/devices/, /api/ai/motion-types/ 등)
     path('', include(router.urls)),
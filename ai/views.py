@@ -1,22 +1,45 @@
+from datetime import datetime, time, timedelta
+
+from django.http import HttpResponse
+from django.utils import timezone
 from django.shortcuts import render
+from back.pagination import KeysetPagination
 from organizations.permissions import IsCompanySession
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
+from rest_framework.generics import ListAPIView, RetrieveAPIView
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
+from rest_framework.parsers import JSONParser, FormParser, MultiPartParser
 from rest_framework import status
 
 # --- Permissions ---
-from .permissions import HasValidAPIKey
+from .permissions import HasMetricsToken, HasValidAPIKey
+from .parsers import SensorBinaryParser
 
 # --- Models ---
-from organizations.models import Employee, Company
-from .models import MotionType, SensorDevice
+from .models import MotionType, SensorDevice, Job, UserRecording
 
 # --- Serializers ---
-from .serializers import EvaluationRequestSerializer, MotionSerializer, SensorDeviceSerializer, MotionTypeSerializer
+from .serializers import (
+    EvaluationRequestSerializer, BatchEvaluationRequestSerializer, MotionSerializer,
+    EvaluationSessionOpenSerializer, EvaluationSessionChunkSerializer,
+    SensorDeviceSerializer, MotionTypeSerializer, JobSerializer, ScoreRollupQuerySerializer,
+    RecordingHistoryQuerySerializer, RecordingHistorySerializer,
+)
 
 # --- Logic ---
-from .logic import run_evaluation, update_max_dtw_for_motion
+from .context import context_resolver
+from .logic import run_evaluation, run_batch_evaluation
+from .jobs import enqueue_recalibration
+from .metrics import CONTENT_TYPE, registry, stage_seconds
+from .rollups import pass_rates, pass_score, trends
+from .sessions import SessionError, open_session, append_chunk, finalize_session
+
+
+def local_midnight(day):
+    """TIME_ZONE 기준 그 날짜의 0시"""
+    return timezone.make_aware(datetime.combine(day, time.min))
 
 
 # --- ViewSets & Views ---
@@ -54,7 +77,8 @@ class MotionTypeViewSet(ModelViewSet):
 class MotionRecordingView(APIView):
     """
     모범 동작(reference) 또는 0점 동작(zero_score) 데이터를 받아
-    전처리 후 DB에 저장하고, max_dtw_distance를 업데이트합니다.
+    전처리 후 DB에 저장하고, max_dtw_distance 재계산 작업을 백그라운드 큐에 등록합니다.
+    재계산 진행 상황은 응답의 jobId로 GET /api/ai/jobs/{jobId}/ 에서 확인
     """
     # 이 API는 관리자/개발자용이므로, 추후 IsAdminUser 같은 권한을 추가하는 것이 좋음
     permission_classes = [IsCompanySession]
@@ -62,46 +86,178 @@ class MotionRecordingView(APIView):
         serializer = MotionSerializer(data=request.data)
         if serializer.is_valid():
             motion_recording = serializer.save()
-            update_max_dtw_for_motion(motion_recording.motion_type)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            # DTW 재계산은 run_ai_worker가 처리하므로 요청은 바로 응답
+            job = enqueue_recalibration(motion_recording.motion_type, company=request.user)
+            return Response({**serializer.data, "jobId": job.id}, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class JobStatusView(RetrieveAPIView):
+    """
+    백그라운드 작업(Job)의 상태를 조회하는 API
+    GET /api/ai/jobs/{id}/
+    로그인한 회사가 등록한 작업만 조회할 수 있음 (다른 회사의 작업은 404)
+    """
+    serializer_class = JobSerializer
+    permission_classes = [IsCompanySession]
+
+    def get_queryset(self):
+        return Job.objects.filter(requested_by=self.request.user)
+
+
+class MetricsView(APIView):
+    """
+    평가 단계별 소요 시간, 캐시 통계 등을 Prometheus 텍스트 형식으로 반환하는 API (ai/metrics.py)
+    GET /api/ai/metrics/
+    같은 서버의 모든 워커 프로세스 값을 합쳐서 반환함
+    """
+    authentication_classes = []
+    permission_classes = [HasMetricsToken]
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
+
+
+class ScoreTrendView(APIView):
+    """
+    로그인한 회사의 기간별 평가 수, 평균/최저/최고 점수, 합격률, 점수 분포 (ai/rollups.py 집계에서 조회)
+    GET /api/ai/stats/trends/?period=day|week&motionName=..&dateFrom=YYYY-MM-DD&dateTo=YYYY-MM-DD
+    motionName을 생략하면 모든 동작을 합침
+    """
+    permission_classes = [IsCompanySession]
+
+    def get(self, request, *args, **kwargs):
+        serializer = ScoreRollupQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        query = serializer.validated_data
+
+        motion_type_id = None
+        if query.get("motionName"):
+            motion_type = context_resolver.motion(query["motionName"])
+            if motion_type is None:
+                return Response(
+                    {"error": f"'{query['motionName']}' 동작을 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND
+                )
+            motion_type_id = motion_type.id
+
+        buckets = trends(request.user.pk, query["period"], query["dateFrom"], query["dateTo"], motion_type_id)
+        return Response({
+            "period": query["period"],
+            "motionName": query.get("motionName"),
+            "dateFrom": query["dateFrom"],
+            "dateTo": query["dateTo"],
+            "passScore": pass_score(),
+            "buckets": buckets,
+        })
+
+
+class PassRateView(APIView):
+    """
+    로그인한 회사의 동작별 평가 수, 평균/최저/최고 점수, 합격률 (ai/rollups.py 집계에서 조회)
+    GET /api/ai/stats/pass-rates/?dateFrom=YYYY-MM-DD&dateTo=YYYY-MM-DD
+    """
+    permission_classes = [IsCompanySession]
+
+    def get(self, request, *args, **kwargs):
+        serializer = ScoreRollupQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        query = serializer.validated_data
+        return Response({
+            "dateFrom": query["dateFrom"],
+            "dateTo": query["dateTo"],
+            "passScore": pass_score(),
+            "motions": pass_rates(request.user.pk, query["dateFrom"], query["dateTo"]),
+        })
+
+
+class RecordingHistoryView(ListAPIView):
+    """
+    로그인한 회사의 평가 기록을 최신순으로 조회하는 API
+    GET /api/ai/history/?empNo=..&motionName=..&dateFrom=YYYY-MM-DD&dateTo=YYYY-MM-DD&limit=50&cursor=..
+    (recorded_at, id) 키셋 페이지네이션: 다음 페이지는 응답의 next를 그대로 요청
+    - empNo가 있으면 (user, [motion_type,] recorded_at, id) 인덱스, 없으면 (company, recorded_at, id) 인덱스를 사용
+    """
+    serializer_class = RecordingHistorySerializer
+    permission_classes = [IsCompanySession]
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-recorded_at", "-id")
+
+    def get_queryset(self):
+        query_serializer = RecordingHistoryQuerySerializer(data=self.request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        query = query_serializer.validated_data
+        company = self.request.user
+
+        queryset = UserRecording.objects.select_related("user", "motion_type").only(
+            "id", "score", "recorded_at", "user__emp_no", "user__name", "motion_type__motion_name"
+        )
+        if query.get("empNo"):
+            employee_id = context_resolver.employee_id(company.pk, query["empNo"])
+            if employee_id is None:
+                raise NotFound(f"회사({company.name})에 해당 사원번호({query['empNo']})가 존재하지 않습니다.")
+            # 직원은 로그인한 회사 안에서 찾았으므로 회사 조건을 다시 넣지 않음 (직원 인덱스를 쓰도록)
+            queryset = queryset.filter(user_id=employee_id)
+        else:
+            queryset = queryset.filter(company_id=company.pk)
+        if query.get("motionName"):
+            motion_type = context_resolver.motion(query["motionName"])
+            if motion_type is None:
+                raise NotFound(f"'{query['motionName']}' 동작을 찾을 수 없습니다.")
+            queryset = queryset.filter(motion_type_id=motion_type.id)
+        if query.get("dateFrom"):
+            queryset = queryset.filter(recorded_at__gte=local_midnight(query["dateFrom"]))
+        if query.get("dateTo"):
+            queryset = queryset.filter(recorded_at__lt=local_midnight(query["dateTo"] + timedelta(days=1)))
+        return queryset
+
+
 class UnifiedEvaluationView(APIView):
     """
     Unity로부터 센서 데이터를 받아 즉시 평가하고 결과를 반환하는 API
     POST /api/ai/evaluate/
+    - JSON: {"motionName", "empNo", "sensorData": [...]} 또는 {"motionName", "empNo", "channels": [...], "frames": [[...], ...]}
+    - 바이너리: Content-Type: application/octet-stream, 본문은 ai/sensor_codec.py 포맷,
+      motionName / empNo는 쿼리 파라미터로 전달 (POST /api/ai/evaluate/?motionName=..&empNo=..)
     """
     permission_classes = [HasValidAPIKey]  # 커스텀 권한 클래스로 교체
+    parser_classes = [JSONParser, FormParser, MultiPartParser, SensorBinaryParser]
 
-    def _try_get_employee(self, emp_no: str, company: Company):
-        try:
-            return Employee.objects.get(emp_no=emp_no, company=company)
-        except Employee.DoesNotExist:
-            return None
+    def _request_payload(self, request):
+        if isinstance(request.data, (bytes, bytearray)):
+            return {**request.query_params.dict(), "sensorBinary": request.data}
+        return request.data
 
     def post(self, request, *args, **kwargs):
         company = request.company
-        serializer = EvaluationRequestSerializer(data=request.data)
+        # request.data에 처음 접근할 때 본문을 파싱하므로, 파싱 + 검증을 한 단계로 측정
+        with stage_seconds.time("parse"):
+            serializer = EvaluationRequestSerializer(data=self._request_payload(request))
+            is_valid = serializer.is_valid()
         
-        if not serializer.is_valid():
+        if not is_valid:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         validated_data = serializer.validated_data
         motion_name = validated_data['motionName']
         emp_no = validated_data['empNo']
-        readings = validated_data['sensorData']
+        sensor_array = validated_data['sensorArray']
+        channels = validated_data['channels']
 
-        employee = self._try_get_employee(emp_no, company)
+        # 사원번호 -> 직원 id는 회사별 메모리 캐시에서 조회 (ai/context.py)
+        employee_id = context_resolver.employee_id(company.id, emp_no)
         
-        if not employee:
+        if employee_id is None:
             return Response({"detail": f"회사({company.name})에 해당 사원번호({emp_no})가 존재하지 않습니다."}, status=status.HTTP_404_NOT_FOUND)
 
         evaluation_result = run_evaluation(
             motion_name=motion_name,
-            employee=employee,
-            raw_sensor_data=readings
+            employee_id=employee_id,
+            sensor_array=sensor_array,
+            channels=channels,
+            company_id=company.id,
         )
 
         if "error" in evaluation_result:
@@ -113,3 +269,138 @@ class UnifiedEvaluationView(APIView):
             "evaluation": evaluation_result
         }
         return Response(response_data, status=status.HTTP_200_OK)
+
+
+class BatchEvaluationView(APIView):
+    """
+    여러 직원의 센서 데이터를 한 번에 받아 평가하는 API (훈련장에서 여러 스테이션이 동시에 끝났을 때)
+    POST /api/ai/evaluate/batch/
+    {"items": [{"empNo": ..., "motionName": ..., "sensorData": [...]}, ...]}
+    항목별 성공/실패 결과를 요청 순서대로 반환
+    """
+    permission_classes = [HasValidAPIKey]
+
+    def post(self, request, *args, **kwargs):
+        serializer = BatchEvaluationRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        raw_items = serializer.validated_data["items"]
+        valid_items = []
+        valid_indexes = []
+        results = [None] * len(raw_items)
+        for index, raw_item in enumerate(raw_items):
+            item_serializer = EvaluationRequestSerializer(data=raw_item)
+            if item_serializer.is_valid():
+                valid_items.append(item_serializer.validated_data)
+                valid_indexes.append(index)
+            else:
+                results[index] = {
+                    "index": index,
+                    "empNo": raw_item.get("empNo"),
+                    "motionName": raw_item.get("motionName"),
+                    "ok": False,
+                    "error": item_serializer.errors,
+                }
+
+        if valid_items:
+            for index, result in zip(valid_indexes, run_batch_evaluation(request.company, valid_items)):
+                result["index"] = index
+                results[index] = result
+
+        succeeded = sum(1 for result in results if result["ok"])
+        response_data = {
+            "ok": True,
+            "detail": "일괄 평가가 완료되었습니다.",
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "results": results,
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+
+class EvaluationSessionOpenView(APIView):
+    """
+    스트리밍 평가 세션을 여는 API (동작을 시작할 때 호출)
+    POST /api/ai/sessions/  {"empNo": ..., "motionName": ...}
+    """
+    permission_classes = [HasValidAPIKey]
+
+    def post(self, request, *args, **kwargs):
+        company = request.company
+        serializer = EvaluationSessionOpenSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        emp_no = serializer.validated_data["empNo"]
+        motion_name = serializer.validated_data["motionName"]
+        # 직원 / 동작은 평가 API와 같은 메모리 캐시에서 조회 (ai/context.py)
+        employee_id = context_resolver.employee_id(company.pk, emp_no)
+        if employee_id is None:
+            return Response({"detail": f"회사({company.name})에 해당 사원번호({emp_no})가 존재하지 않습니다."}, status=status.HTTP_404_NOT_FOUND)
+        motion = context_resolver.motion(motion_name)
+        if motion is None:
+            return Response({"detail": f"'{motion_name}' 동작을 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+
+        session = open_session(request.device, employee_id, motion)
+        return Response({"ok": True, "sessionId": session.id, "nextSeq": session.next_seq}, status=status.HTTP_201_CREATED)
+
+
+class EvaluationSessionChunkView(APIView):
+    """
+    동작 중에 센서 데이터 조각을 보내는 API (받는 즉시 검증/전처리)
+    POST /api/ai/sessions/{sessionId}/chunks/  {"seq": 0, "sensorData": [...]}
+    """
+    permission_classes = [HasValidAPIKey]
+
+    def post(self, request, session_id, *args, **kwargs):
+        serializer = EvaluationSessionChunkSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if "seq" not in serializer.validated_data or "sensorData" not in serializer.validated_data:
+            return Response({"detail": "seq와 sensorData가 필요합니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            session = append_chunk(
+                session_id,
+                request.device,
+                serializer.validated_data["seq"],
+                serializer.validated_data["sensorData"],
+            )
+        except SessionError as e:
+            return Response({"detail": e.message}, status=e.status_code)
+
+        return Response({"ok": True, "received": session.frames_received, "nextSeq": session.next_seq}, status=status.HTTP_200_OK)
+
+
+class EvaluationSessionFinalizeView(APIView):
+    """
+    동작이 끝났을 때 세션을 마치고 평가 결과를 받는 API (마지막 조각을 함께 보낼 수 있음)
+    POST /api/ai/sessions/{sessionId}/finalize/
+    """
+    permission_classes = [HasValidAPIKey]
+
+    def post(self, request, session_id, *args, **kwargs):
+        serializer = EvaluationSessionChunkSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            evaluation_result = finalize_session(
+                session_id,
+                request.device,
+                seq=serializer.validated_data.get("seq"),
+                frames=serializer.validated_data.get("sensorData"),
+            )
+        except SessionError as e:
+            return Response({"detail": e.message}, status=e.status_code)
+
+        if "error" in evaluation_result:
+            return Response(evaluation_result, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        response_data = {
+            "ok": True,
+            "detail": "평가가 완료되었습니다.",
+            "evaluation": evaluation_result
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
@@ -14,3 +14,17 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'back.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+# 죽은 워커가 남긴 평가 기록 스풀 파일을 저장 (AI_RECORDING_WRITE_BEHIND=True일 때만)
+if getattr(settings, "AI_RECORDING_WRITE_BEHIND", False):
+    from ai.recording_buffer import replay_orphaned_spool  # noqa: E402
+
+    replay_orphaned_spool()
+
+# 워커가 요청을 받기 전에 모든 동작의 평가기를 미리 준비 (AI_WARMUP_EVALUATORS=True일 때만)
+if getattr(settings, "AI_WARMUP_EVALUATORS", False):
+    from ai.evaluator_cache import warm_evaluator_cache  # noqa: E402
+
+    warm_evaluator_cache()
@@ -0,0 +1,108 @@
+# back/pagination.py
+# 목록 API용 키셋(커서) 페이지네이션
+#
+# OFFSET 페이지네이션은 뒤 페이지로 갈수록 앞의 행을 모두 읽고 버려야 해서 느려짐.
+# 키셋 페이지네이션은 페이지의 마지막 행의 정렬 값(예: recorded_at, id)을 커서로 돌려주고,
+# 다음 페이지는 "그 값 다음 행"부터 인덱스에서 바로 limit개만 읽음 -> 1000번째 페이지도 첫 페이지와 비용이 같음
+#
+# - 뷰의 keyset_ordering으로 정렬 필드를 정함. 마지막 필드는 id처럼 유일해야 하고,
+#   (조회 조건 필드 + 정렬 필드) 순서의 인덱스가 있어야 함. 모든 필드의 방향(오름/내림차순)이 같아야 함
+# - 앞으로만 넘길 수 있음 (응답의 next를 그대로 요청)
+# - 커서는 정렬 값 JSON을 base64로 감싼 문자열이므로 클라이언트는 내용을 해석하지 말고 그대로 돌려보내야 함
+
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = "limit"
+    cursor_query_param = "cursor"
+    # 뷰에 keyset_ordering이 없을 때의 정렬 (최신순)
+    ordering = ("-created_at", "-id")
+    invalid_cursor_message = "커서가 올바르지 않습니다."
+
+    def get_ordering(self, view) -> tuple:
+        ordering = tuple(getattr(view, "keyset_ordering", None) or self.ordering)
+        if len({field.startswith("-") for field in ordering}) != 1:
+            raise ValueError("keyset_ordering의 모든 필드는 같은 방향이어야 합니다.")
+        return ordering
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def encode_cursor(self, values) -> str:
+        values = [value.isoformat() if hasattr(value, "isoformat") else value for value in values]
+        return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+    def decode_cursor(self, queryset, fields, cursor: str) -> list:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            # 모델 필드 형식으로 바꿔야 datetime 등을 정확히 비교함
+            return [queryset.model._meta.get_field(field).to_python(value) for field, value in zip(fields, values)]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def after(fields, values, descending: bool) -> Q:
+        """(fields) > (values) (내림차순이면 <) 조건. 첫 필드의 범위 조건을 함께 넣어 인덱스 범위 검색이 되도록 함"""
+        lookup = "lt" if descending else "gt"
+        condition = Q()
+        for index, field in enumerate(fields):
+            step = Q(**{f"{field}__{lookup}": values[index]})
+            for previous, value in zip(fields[:index], values[:index]):
+                step &= Q(**{previous: value})
+            condition |= step
+        return Q(**{f"{fields[0]}__{lookup}e": values[0]}) & condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = self.get_ordering(view)
+        fields = [field.lstrip("-") for field in ordering]
+        descending = ordering[0].startswith("-")
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+
+        queryset = queryset.order_by(*ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.after(fields, self.decode_cursor(queryset, fields, cursor), descending))
+
+        # 한 행을 더 읽어서 다음 페이지가 있는지 확인 (COUNT 쿼리 없음)
+        rows = list(queryset[: self.page_size_value + 1])
+        page = rows[: self.page_size_value]
+        self.next_cursor = None
+        if len(rows) > self.page_size_value:
+            self.next_cursor = self.encode_cursor([getattr(page[-1], field) for field in fields])
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
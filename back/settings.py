@@ -49,7 +49,7 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "organizations.authentication.CompanyJWTAuthentication",
     ),
 }
 
@@ -146,6 +146,39 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# AI 평가 설정
+
+# 워커 시작 시(wsgi/asgi 로딩 시) 모든 동작의 평가기를 미리 만들어둘지 여부
+AI_WARMUP_EVALUATORS = env.bool("AI_WARMUP_EVALUATORS", default=False)
+
+# 평가 결과(UserRecording)를 스풀 파일 + 메모리 버퍼에 모아서 bulk_create로 저장할지 여부 (ai/recording_buffer.py)
+AI_RECORDING_WRITE_BEHIND = env.bool("AI_RECORDING_WRITE_BEHIND", default=False)
+# 버퍼가 이만큼 차거나, 이 시간(초)이 지나면 DB에 저장
+AI_RECORDING_BUFFER_SIZE = env.int("AI_RECORDING_BUFFER_SIZE", default=200)
+AI_RECORDING_FLUSH_INTERVAL = env.float("AI_RECORDING_FLUSH_INTERVAL", default=1.0)
+# 스풀 파일 위치 (워커 프로세스들이 같은 디렉터리를 써야 죽은 워커의 결과를 다시 저장할 수 있음)
+AI_RECORDING_SPOOL_DIR = env("AI_RECORDING_SPOOL_DIR", default=str(BASE_DIR / "var" / "recording_spool"))
+# True이면 결과마다 fsync (전원 장애까지 대비, 대신 느려짐). False여도 프로세스가 죽는 경우에는 보존됨
+AI_RECORDING_SPOOL_FSYNC = env.bool("AI_RECORDING_SPOOL_FSYNC", default=False)
+
+# 평가기가 모범 동작을 DB 대신 스냅샷 파일(np.memmap)에서 읽을지 여부 (ai/reference_snapshot.py)
+# python manage.py export_reference_snapshots 로 미리 내보낼 수 있고, 없거나 오래된 스냅샷은 평가기를 만들 때 다시 만듦
+AI_REFERENCE_SNAPSHOTS = env.bool("AI_REFERENCE_SNAPSHOTS", default=False)
+# 스냅샷 위치 (같은 서버의 워커 프로세스들이 같은 디렉터리를 써야 페이지 캐시를 함께 씀)
+AI_REFERENCE_SNAPSHOT_DIR = env("AI_REFERENCE_SNAPSHOT_DIR", default=str(BASE_DIR / "var" / "reference_snapshots"))
+
+# GET /api/ai/metrics/ 지표 (ai/metrics.py)
+# 워커 프로세스마다 이 디렉터리에 값을 저장하고, 지표 요청을 받은 워커가 모두 합쳐서 응답함 (비우면 자기 프로세스 값만)
+AI_METRICS_DIR = env("AI_METRICS_DIR", default=str(BASE_DIR / "var" / "metrics"))
+AI_METRICS_FLUSH_INTERVAL = env.float("AI_METRICS_FLUSH_INTERVAL", default=5.0)
+# Authorization: Bearer <토큰> 헤더가 있어야 지표를 볼 수 있음 (비워두면 아무도 볼 수 없음)
+AI_METRICS_TOKEN = env("AI_METRICS_TOKEN", default="")
+# 토큰 없이 지표를 공개 (외부에서 접근할 수 없는 내부망 배포에서만 켤 것)
+AI_METRICS_ALLOW_ANONYMOUS = env.bool("AI_METRICS_ALLOW_ANONYMOUS", default=False)
+
+# 평가 결과 집계(ScoreRollup)의 합격 기준 점수 (ai/rollups.py). 바꾸면 python manage.py rebuild_score_rollups 로 다시 집계
+AI_PASS_SCORE = env.float("AI_PASS_SCORE", default=70.0)
+
 # CORS settings
 
 # 모든 출처의 요청을 전부 허용하는 것을 막음 
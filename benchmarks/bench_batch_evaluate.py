@@ -0,0 +1,89 @@
+# benchmarks/bench_batch_evaluate.py
+# N번의 POST /api/ai/evaluate/ 호출과 한 번의 POST /api/ai/evaluate/batch/ 호출의 처리량 비교
+#
+# 실행: DJANGO_SETTINGS_MODULE=<sqlite 설정> python -m benchmarks.bench_batch_evaluate [항목 수...]
+# (마이그레이션이 적용된 DB가 필요하며, 만든 데이터는 마지막에 롤백함)
+
+import os
+import sys
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "back.settings")
+django.setup()
+
+from django.db import transaction  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from ai.models import MotionRecording, MotionType, SensorDevice  # noqa: E402
+from ai.preprocessing import preprocess_frames  # noqa: E402
+from ai.sensor_codec import encode  # noqa: E402
+from benchmarks.bench_preprocess import CHANNELS, synthetic_frames  # noqa: E402
+from organizations.models import Company, Employee  # noqa: E402
+
+DEFAULT_SIZES = (4, 8, 16)
+REFERENCES = 8
+FRAMES = 200
+
+
+def provision(max_items: int):
+    company = Company.objects.create(name="bench", biz_no="bench-batch", password="bench-password")
+    device = SensorDevice.objects.create(company=company, device_uid="bench-device")
+    Employee.objects.bulk_create(
+        [Employee(company=company, emp_no=f"E{i:05d}", name=f"trainee {i}") for i in range(max_items)]
+    )
+    motion_type = MotionType.objects.create(motion_name="bench_motion", max_dtw_distance=50.0)
+    for seed in range(REFERENCES):
+        data = preprocess_frames(synthetic_frames(FRAMES, seed=seed))
+        MotionRecording.objects.create(
+            motion_type=motion_type,
+            data_frames=len(data),
+            score_category="reference",
+            sensor_data_blob=encode(data, CHANNELS),
+        )
+    client = APIClient()
+    client.credentials(HTTP_X_API_KEY=device.api_key)
+    return client
+
+
+def make_items(count: int) -> list:
+    return [
+        {"empNo": f"E{i:05d}", "motionName": "bench_motion", "sensorData": synthetic_frames(FRAMES, seed=1000 + i)}
+        for i in range(count)
+    ]
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or list(DEFAULT_SIZES)
+    with transaction.atomic():
+        client = provision(max(sizes))
+        # 평가기 캐시와 프로세스 풀 워밍업
+        client.post("/api/ai/evaluate/", make_items(1)[0], format="json")
+        client.post("/api/ai/evaluate/batch/", {"items": make_items(2)}, format="json")
+
+        print(f"cpu={os.cpu_count()} references={REFERENCES} frames={FRAMES}")
+        print(f"{'items':>6} {'single(s)':>10} {'batch(s)':>10} {'single/s':>9} {'batch/s':>9} {'speedup':>8}")
+        for size in sizes:
+            items = make_items(size)
+
+            started = time.perf_counter()
+            for item in items:
+                response = client.post("/api/ai/evaluate/", item, format="json")
+                assert response.status_code == 200, response.content
+            single = time.perf_counter() - started
+
+            started = time.perf_counter()
+            response = client.post("/api/ai/evaluate/batch/", {"items": items}, format="json")
+            batch = time.perf_counter() - started
+            assert response.status_code == 200 and response.data["failed"] == 0, response.content
+
+            print(
+                f"{size:>6} {single:>10.3f} {batch:>10.3f} {size / single:>9.1f} "
+                f"{size / batch:>9.1f} {single / batch:>7.1f}x"
+            )
+        transaction.set_rollback(True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_dtw_engine.py
+# exact / coarse_to_fine DTW 계산 방식(ai/dtw_engine.py)의 속도와 정확도 비교
+#
+# 실행: python -m benchmarks.bench_dtw_engine [--lengths 200 1000 3000] [--pairs 6] [--skip-python 3000]
+#
+# - 모범 동작 길이 L(100Hz 기준 30초 = 3000프레임)마다, 같은 동작을 빠르기를 바꿔 따라 한 좋은 동작과
+#   모양이 틀린 실패 동작을 반씩 만들어 모범 동작과 비교 (사용자 녹화 길이는 L의 0.85~1.15배)
+# - exact(py): 현재 평가기가 쓰는 dtaidistance 파이썬 구현, exact(C): dtaidistance C 구현 (참고용)
+# - 정확도: exact 거리 대비 coarse_to_fine 거리의 상대 오차, 그리고 점수 차이
+#   (max_dtw_distance는 update_max_dtw_for_motion과 같이 실패 동작 거리의 최대값 × 1.1)
+
+import argparse
+import time
+
+import numpy as np
+from dtaidistance import dtw_ndim
+
+from ai.dtw_engine import DTW_WINDOW, dtw_distance
+from ai.preprocessing import preprocess_array
+from benchmarks.bench_preprocess import CHANNELS
+
+
+def recording(rng, length: int, failed: bool = False) -> np.ndarray:
+    """length 프레임 동안 동작 한 번을 전처리한 배열 (속도가 일정하지 않게 시간축을 비틀어서 만듦)"""
+    u = np.linspace(0, 1, length)
+    warp = u + rng.uniform(-0.05, 0.05) * np.sin(2 * np.pi * u * rng.integers(1, 4))
+    t = 4 * np.pi * warp
+    amplitude, phase, sign = (12, np.pi / 2, -1) if failed else (40, 0.0, 1)
+    columns = []
+    for i, name in enumerate(CHANNELS):
+        if name.startswith("flex"):
+            columns.append(50 + amplitude * np.sin(t + i + phase) + rng.normal(0, 2, length))
+        else:
+            columns.append(sign * 25 * np.cos(t * 0.5 + i + phase) + rng.normal(0, 1, length))
+    return preprocess_array(np.column_stack(columns), CHANNELS)
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - started
+
+
+def score(distance: float, max_dtw_distance: float) -> float:
+    return max(0.0, 1 - min(distance / max_dtw_distance, 1.0)) * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description="exact / coarse_to_fine DTW 속도와 정확도 비교")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[200, 1000, 3000])
+    parser.add_argument("--pairs", type=int, default=6, help="길이마다 비교할 사용자 녹화 수 (좋은 동작/실패 동작 반씩)")
+    parser.add_argument("--skip-python", type=int, default=None,
+                        help="이 길이 이상에서는 exact(py) 측정을 건너뜀 (오래 걸림)")
+    args = parser.parse_args()
+
+    print(
+        f"{'frames':>6} {'kind':>6} {'exact py(ms)':>13} {'exact C(ms)':>12} {'c2f(ms)':>9} "
+        f"{'c2f/py':>7} {'rel.err mean':>13} {'rel.err max':>12} {'score diff max':>15}"
+    )
+    for length in args.lengths:
+        rng = np.random.default_rng(length)
+        reference = recording(rng, length)
+        users = [
+            (failed, recording(rng, int(length * rng.uniform(0.85, 1.15)), failed=failed))
+            for failed in [False] * (args.pairs - args.pairs // 2) + [True] * (args.pairs // 2)
+        ]
+        rows = []
+        for failed, user in users:
+            exact_c, c_seconds = timed(
+                lambda a, b: dtw_ndim.distance(a, b, window=DTW_WINDOW, use_c=True), user, reference
+            )
+            py_seconds = None
+            if args.skip_python is None or length < args.skip_python:
+                _, py_seconds = timed(dtw_distance, user, reference)
+            coarse, coarse_seconds = timed(lambda a, b: dtw_distance(a, b, engine="coarse_to_fine"), user, reference)
+            rows.append((failed, exact_c, coarse, py_seconds, c_seconds, coarse_seconds))
+
+        max_dtw_distance = max(row[1] for row in rows if row[0]) * 1.1 if any(row[0] for row in rows) else 1.0
+        for kind, selected in (("good", [row for row in rows if not row[0]]), ("failed", [row for row in rows if row[0]])):
+            if not selected:
+                continue
+            errors = [(coarse - exact) / exact for _, exact, coarse, *_ in selected]
+            score_diffs = [abs(score(coarse, max_dtw_distance) - score(exact, max_dtw_distance))
+                           for _, exact, coarse, *_ in selected]
+            py_times = [row[3] for row in selected if row[3] is not None]
+            py_ms = np.mean(py_times) * 1000 if py_times else None
+            coarse_ms = np.mean([row[5] for row in selected]) * 1000
+            print(
+                f"{length:>6} {kind:>6} {py_ms if py_ms is not None else float('nan'):>13.1f} "
+                f"{np.mean([row[4] for row in selected]) * 1000:>12.2f} {coarse_ms:>9.1f} "
+                f"{(py_ms / coarse_ms if py_ms else float('nan')):>6.1f}x "
+                f"{np.mean(errors) * 100:>12.3f}% {max(errors) * 100:>11.3f}% {max(score_diffs):>15.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/bench_early_abandon.py
+# 0점이 확정되면 DTW 계산을 멈추는 평가(ai/scoring.py의 early_abandon)와 끝까지 계산하는 평가의 속도/결과 비교
+#
+# 실행: python -m benchmarks.bench_early_abandon [--references 8] [--attempts 40] [--frames 200] [--mode average]
+#
+# - 모범 동작 R개, 0점 동작 4개로 max_dtw_distance를 update_max_dtw_for_motion과 같은 방식으로 정함
+#   (모범 동작 × 0점 동작 DTW 거리의 최대값 × 1.1)
+# - 사용자 시도는 실제 교육 현장처럼 섞음: 좋은 동작 50%, 어설픈 동작 20%, 실패한 동작(0점 동작과 비슷) 20%,
+#   엉뚱한 동작(장갑을 낀 채 가만히 있거나 다른 동작) 10%
+# - 두 방식의 점수가 0점보다 크면 모든 결과 값이 같은지, 0점이면 둘 다 0점인지 확인하고 시도 종류별 평균 시간을 출력
+
+import argparse
+import time
+
+import numpy as np
+
+from ai.dtw_engine import dtw_distance, envelope
+from ai.preprocessing import preprocess_array
+from ai.scoring import score_motion
+from benchmarks.bench_preprocess import CHANNELS
+
+ZERO_SCORES = 4
+# (시도 종류, 비율)
+MIX = (("good", 0.5), ("sloppy", 0.2), ("failed", 0.2), ("wrong", 0.1))
+
+
+def attempt(rng, frames: int, kind: str) -> np.ndarray:
+    """kind 종류의 시도 한 번을 전처리한 배열 (길이는 ±15%로 달라짐)"""
+    length = int(frames * rng.uniform(0.85, 1.15))
+    u = np.linspace(0, 1, length)
+    t = 4 * np.pi * (u + rng.uniform(-0.04, 0.04) * np.sin(2 * np.pi * u))
+    amplitude, phase, sign, noise = {
+        "good": (40, 0.0, 1, 2),
+        "sloppy": (30, 0.5, 1, 5),
+        "failed": (12, np.pi / 2, -1, 2),
+    }.get(kind, (0, 0.0, 0, 1))
+    columns = []
+    for i, name in enumerate(CHANNELS):
+        if kind == "wrong":
+            # 다른 동작: 손을 편 채 천천히 흔들기
+            base = 10 + 5 * np.sin(t * 0.25 + i) if name.startswith("flex") else 28 * np.sign(np.sin(t * 0.25 + i))
+            columns.append(base + rng.normal(0, noise, length))
+        elif name.startswith("flex"):
+            columns.append(50 + amplitude * np.sin(t + i + phase) + rng.normal(0, noise, length))
+        else:
+            columns.append(sign * 25 * np.cos(t * 0.5 + i + phase) + rng.normal(0, noise, length))
+    return preprocess_array(np.column_stack(columns), CHANNELS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="0점 확정 시 DTW 계산 중단 효과 측정")
+    parser.add_argument("--references", type=int, default=8)
+    parser.add_argument("--attempts", type=int, default=40)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--mode", choices=["average", "nearest_k"], default="average")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--engine", choices=["exact", "coarse_to_fine"], default="exact")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    references = [attempt(rng, args.frames, "good") for _ in range(args.references)]
+    envelopes = [envelope(data) for data in references]
+    zero_scores = [attempt(rng, args.frames, "failed") for _ in range(ZERO_SCORES)]
+    max_dtw_distance = max(
+        dtw_distance(reference, zero_score, engine=args.engine)
+        for reference in references
+        for zero_score in zero_scores
+    ) * 1.1
+
+    kinds = [kind for kind, ratio in MIX for _ in range(round(args.attempts * ratio))]
+    rows = {kind: [] for kind, _ in MIX}
+    for kind in kinds:
+        user_data = attempt(rng, args.frames, kind)
+        timings = {}
+        results = {}
+        for early_abandon in (False, True):
+            started = time.perf_counter()
+            results[early_abandon] = score_motion(
+                user_data, references, envelopes, max_dtw_distance,
+                mode=args.mode, k=args.k, engine=args.engine, early_abandon=early_abandon,
+            )
+            timings[early_abandon] = time.perf_counter() - started
+
+        full, early = results[False], results[True]
+        if full["score"] > 0:
+            keys = ("score", "avg_dtw_distance", "normalized_distance", "compared_references")
+            assert all(full[key] == early[key] for key in keys), (kind, full, early)
+        else:
+            assert early["score"] == 0, (kind, full, early)
+        rows[kind].append((full["score"], timings[False], timings[True], early["avg_dtw_distance"] is None))
+
+    print(f"mode={args.mode} engine={args.engine} references={args.references} frames={args.frames} "
+          f"max_dtw_distance={max_dtw_distance:.3f}")
+    print(f"{'attempt':>8} {'count':>6} {'score avg':>10} {'0 scores':>9} {'full(ms)':>9} {'early(ms)':>10} {'speedup':>8}")
+    total_full = total_early = 0.0
+    for kind, selected in rows.items():
+        if not selected:
+            continue
+        full_ms = np.mean([row[1] for row in selected]) * 1000
+        early_ms = np.mean([row[2] for row in selected]) * 1000
+        total_full += sum(row[1] for row in selected)
+        total_early += sum(row[2] for row in selected)
+        print(
+            f"{kind:>8} {len(selected):>6} {np.mean([row[0] for row in selected]):>10.1f} "
+            f"{sum(row[0] == 0 for row in selected):>9} {full_ms:>9.1f} {early_ms:>10.1f} {full_ms / early_ms:>7.1f}x"
+        )
+    print(f"{'all':>8} {len(kinds):>6} {'':>10} {'':>9} {total_full * 1000 / len(kinds):>9.1f} "
+          f"{total_early * 1000 / len(kinds):>10.1f} {total_full / total_early:>7.1f}x")
+    print("점수가 0보다 큰 시도는 두 방식의 결과가 모두 같았습니다.")
+
+
+if __name__ == "__main__":
+    main()
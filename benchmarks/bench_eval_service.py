@@ -0,0 +1,175 @@
+# benchmarks/bench_eval_service.py
+# 웹 워커 안에서 평가(in-process)하는 방식과 평가 서비스(python manage.py run_eval_service)를 쓰는 방식의
+# 처리량(evals/s)과 전체 메모리(PSS 합계) 비교
+#
+# 실행: DJANGO_SETTINGS_MODULE=<설정> python -m benchmarks.bench_eval_service [코어 수...]
+# - 코어 수 N마다: 웹 워커 역할의 클라이언트 프로세스 N개 vs (클라이언트 N개 + 평가 프로세스 N개짜리 서비스)
+# - 벤치마크용 동작 데이터는 커밋해서 만들고 (다른 프로세스에서 읽어야 하므로) 끝나면 삭제함
+# - PSS는 공유 메모리를 프로세스 수로 나눠 계산하므로, 같은 메모리를 여러 번 세지 않음 (Linux 전용)
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "back.settings")
+django.setup()
+
+from ai.models import MotionRecording, MotionType  # noqa: E402
+from ai.preprocessing import frames_to_array, preprocess_frames  # noqa: E402
+from ai.sensor_codec import encode  # noqa: E402
+from benchmarks.bench_preprocess import CHANNELS, synthetic_frames  # noqa: E402
+
+DEFAULT_CORES = (4, 8, 16)
+MOTIONS = int(os.environ.get("BENCH_MOTIONS", 16))
+REFERENCES = int(os.environ.get("BENCH_REFERENCES", 8))
+FRAMES = int(os.environ.get("BENCH_FRAMES", 200))
+EVALS_PER_CLIENT = int(os.environ.get("BENCH_EVALS", 4))
+# 노드당 평가 프로세스 수 (BENCH_MOTIONS=1이면 한 동작에 요청이 몰리는 경우를 잴 수 있음)
+NODE_PROCESSES = int(os.environ.get("BENCH_NODE_PROCESSES", 4))
+PREFIX = "bench_svc_"
+# 코어 수보다 많은 프로세스로 돌리면 평가 한 건이 오래 걸릴 수 있으므로 넉넉하게
+TIMEOUT = 3600
+
+
+def provision():
+    for m in range(MOTIONS):
+        motion_type = MotionType.objects.create(motion_name=f"{PREFIX}{m}", max_dtw_distance=50.0)
+        MotionRecording.objects.bulk_create([
+            MotionRecording(
+                motion_type=motion_type,
+                data_frames=FRAMES,
+                score_category="reference",
+                sensor_data_blob=encode(preprocess_frames(synthetic_frames(FRAMES, seed=m * 100 + r)), CHANNELS),
+            )
+            for r in range(REFERENCES)
+        ])
+
+
+def cleanup():
+    MotionType.objects.filter(motion_name__startswith=PREFIX).delete()
+
+
+def pss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def client(mode, index, address, start, done, release, results):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "back.settings")
+    django.setup()
+    from django.conf import settings
+
+    from ai.context import context_resolver
+    from ai.eval_service import evaluate_remote
+    from ai.evaluator_cache import get_evaluator
+
+    settings.AI_EVAL_SERVICE_ADDRESS = address
+    settings.AI_EVAL_SERVICE_TIMEOUT = TIMEOUT
+    sensor_array, channels = frames_to_array(synthetic_frames(FRAMES, seed=10_000 + index))
+    motion_names = [f"{PREFIX}{m}" for m in range(MOTIONS)]
+
+    def evaluate(motion_name):
+        info = context_resolver.motion(motion_name)
+        if mode == "service":
+            result = evaluate_remote(info, sensor_array, channels)
+        else:
+            evaluator = get_evaluator(motion_name, version=info.reference_version)
+            result = evaluator.evaluator_user_motion(
+                sensor_array, info.max_dtw_distance, mode=info.evaluation_mode, k=info.nearest_k, channels=channels,
+                engine=info.dtw_engine,
+            )
+        assert "error" not in result, result
+        return result
+
+    # 워밍업: 모든 동작의 모범 동작이 메모리에 올라온 상태를 만듦 (실제 서비스에서 캐시가 찬 상태)
+    # in-process는 웹 워커마다 평가기를 만들고, 서비스는 동작마다 한 번씩 평가해서 평가 프로세스가 공유 메모리를 붙이게 함
+    for motion_name in motion_names:
+        if mode == "service":
+            if index == 0:
+                evaluate(motion_name)
+        else:
+            info = context_resolver.motion(motion_name)
+            get_evaluator(motion_name, version=info.reference_version)
+    start.wait()
+    started = time.perf_counter()
+    for i in range(EVALS_PER_CLIENT):
+        evaluate(motion_names[(index + i) % MOTIONS])
+    results.put((os.getpid(), time.perf_counter() - started))
+    done.wait()
+    release.wait()
+
+
+def run(mode: str, cores: int, address: str) -> tuple:
+    ctx = multiprocessing.get_context("spawn")
+    service = None
+    service_pids = []
+    if mode == "service":
+        service = subprocess.Popen(
+            [sys.executable, "manage.py", "run_eval_service", "--workers", str(cores), "--address", address,
+             "--timeout", str(TIMEOUT), "--node-processes", str(NODE_PROCESSES)],
+            stdout=subprocess.DEVNULL,
+        )
+        while not os.path.exists(address):
+            time.sleep(0.05)
+
+    start, done, release = ctx.Barrier(cores + 1), ctx.Barrier(cores + 1), ctx.Barrier(cores + 1)
+    results = ctx.Queue()
+    clients = [
+        ctx.Process(target=client, args=(mode, i, address, start, done, release, results)) for i in range(cores)
+    ]
+    for process in clients:
+        process.start()
+    start.wait()
+    started = time.perf_counter()
+    reports = [results.get() for _ in clients]
+    wall = time.perf_counter() - started
+    done.wait()
+
+    pids = [pid for pid, _ in reports]
+    if mode == "service":
+        from django.conf import settings
+
+        from ai.eval_service import service_stats
+
+        settings.AI_EVAL_SERVICE_ADDRESS = address
+        service_pids = service_stats()["pids"]
+    total_pss = sum(pss_kb(pid) for pid in pids + service_pids)
+    release.wait()
+    for process in clients:
+        process.join()
+    if service is not None:
+        service.terminate()
+        service.wait()
+    return cores * EVALS_PER_CLIENT / wall, total_pss / 1024
+
+
+def main():
+    cores_list = [int(arg) for arg in sys.argv[1:]] or list(DEFAULT_CORES)
+    cleanup()
+    provision()
+    try:
+        print(
+            f"cpu={os.cpu_count()} motions={MOTIONS} references={REFERENCES} frames={FRAMES} "
+            f"evals/client={EVALS_PER_CLIENT} node_processes={NODE_PROCESSES}"
+        )
+        print(f"{'cores':>5} {'in-proc/s':>10} {'service/s':>10} {'in-proc PSS(MB)':>16} {'service PSS(MB)':>16}")
+        with tempfile.TemporaryDirectory() as tmp:
+            for cores in cores_list:
+                address = os.path.join(tmp, f"eval-{cores}.sock")
+                local_rate, local_pss = run("in-process", cores, address)
+                service_rate, service_pss = run("service", cores, address)
+                print(f"{cores:>5} {local_rate:>10.2f} {service_rate:>10.2f} {local_pss:>16.1f} {service_pss:>16.1f}")
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_preprocess.py
+# 기존 pandas 전처리와 numpy 전처리 엔진의 속도/결과 비교
+#
+# 실행: python -m benchmarks.bench_preprocess
+
+import time
+
+import numpy as np
+import pandas as pd
+from dtaidistance import dtw_ndim
+from scipy.signal import savgol_filter
+
+from ai.preprocessing import preprocess_frames
+
+FRAME_COUNTS = (200, 2_000, 20_000)
+CHANNELS = [f"flex{i}" for i in range(1, 6)] + ["gyro_x", "gyro_y", "gyro_z"]
+# 두 방식의 전처리 결과 / 점수가 일치해야 하는 허용 오차
+TOLERANCE = 1e-9
+
+
+def legacy_preprocess(raw_data_dicts) -> np.ndarray:
+    """변경 전 ai.safty_training_ai.preprocess_sensor_data 구현 (비교용)"""
+    if not raw_data_dicts:
+        return np.array([])
+    df = pd.DataFrame(raw_data_dicts)
+    window_length = min(df.shape[0] - (df.shape[0] % 2 == 0), 11)
+    if window_length < 3:
+        window_length = 3
+    smoothed_data = df.apply(lambda col: savgol_filter(col, window_length, 3))
+    normalized_data = pd.DataFrame(index=smoothed_data.index, columns=smoothed_data.columns)
+    for col in smoothed_data.columns:
+        if "flex" in col:
+            s_min, s_max = 0, 100
+        elif "gyro" in col:
+            s_min, s_max = -30, 30
+        normalized_data[col] = (smoothed_data[col] - s_min) / (s_max - s_min)
+    return normalized_data.values
+
+
+def synthetic_frames(num_frames: int, seed: int = 0, channels=CHANNELS) -> list:
+    """flex(0~100) / gyro(-30~30) 범위의 합성 센서 프레임 생성"""
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 4 * np.pi, num_frames)
+    frames = []
+    columns = {}
+    for i, name in enumerate(channels):
+        if name.startswith("flex"):
+            columns[name] = 50 + 40 * np.sin(t + i) + rng.normal(0, 2, num_frames)
+        else:
+            columns[name] = 25 * np.cos(t * 0.5 + i) + rng.normal(0, 1, num_frames)
+    for idx in range(num_frames):
+        frames.append({name: float(columns[name][idx]) for name in channels})
+    return frames
+
+
+def best_of(func, *args, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def score(user: np.ndarray, ref: np.ndarray) -> float:
+    """MotionEvaluator와 같은 방식으로 계산한 DTW 거리"""
+    return dtw_ndim.distance(user, ref, window=10)
+
+
+def main():
+    print(f"{'frames':>8} {'pandas(ms)':>12} {'numpy(ms)':>12} {'speedup':>9} {'max|diff|':>12} {'dtw diff':>12}")
+    for num_frames in FRAME_COUNTS:
+        user_frames = synthetic_frames(num_frames, seed=1)
+        ref_frames = synthetic_frames(num_frames, seed=2)
+
+        repeat = 3 if num_frames >= 20_000 else 10
+        legacy_time = best_of(legacy_preprocess, user_frames, repeat=repeat)
+        numpy_time = best_of(preprocess_frames, user_frames, repeat=repeat)
+
+        legacy_user = legacy_preprocess(user_frames).astype(np.float64)
+        numpy_user = preprocess_frames(user_frames)
+        max_diff = float(np.max(np.abs(legacy_user - numpy_user)))
+
+        ref = preprocess_frames(ref_frames)
+        dtw_diff = abs(score(legacy_user, ref) - score(numpy_user, ref))
+
+        assert max_diff < TOLERANCE, f"전처리 결과가 허용 오차를 벗어났습니다: {max_diff}"
+        print(
+            f"{num_frames:>8} {legacy_time * 1000:>12.2f} {numpy_time * 1000:>12.2f} "
+            f"{legacy_time / numpy_time:>8.1f}x {max_diff:>12.2e} {dtw_diff:>12.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_sensor_storage.py
+# MotionRecording 센서 데이터 저장 형식(JSON vs float32 바이너리) 용량/로딩 시간 비교
+#
+# 실행: python -m benchmarks.bench_sensor_storage [녹화 개수]
+
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from ai.preprocessing import preprocess_frames
+from ai.sensor_codec import decode, encode
+from benchmarks.bench_preprocess import CHANNELS, synthetic_frames
+
+DEFAULT_RECORDINGS = 3_000
+
+
+def build_corpus(count: int) -> list:
+    """200~400 프레임 길이의 전처리된 녹화 데이터 생성"""
+    rng = np.random.default_rng(0)
+    base = [preprocess_frames(synthetic_frames(400, seed=seed)) for seed in range(20)]
+    return [base[i % len(base)][: int(rng.integers(200, 401))] for i in range(count)]
+
+
+def timed(func, items) -> float:
+    started = time.perf_counter()
+    for item in items:
+        func(item)
+    return time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RECORDINGS
+    corpus = build_corpus(count)
+
+    # 변경 전: preprocessed_numpy.tolist()를 JSONField로 저장 -> json.loads + pd.DataFrame(...).values
+    json_rows = [json.dumps(data.tolist()) for data in corpus]
+    raw_rows = [encode(data, CHANNELS) for data in corpus]
+    zlib_rows = [encode(data, CHANNELS, compress=True) for data in corpus]
+
+    json_load = timed(lambda row: pd.DataFrame(json.loads(row)).values, json_rows)
+    raw_load = timed(decode, raw_rows)
+    zlib_load = timed(decode, zlib_rows)
+
+    json_bytes = sum(len(row.encode("utf-8")) for row in json_rows)
+    raw_bytes = sum(len(row) for row in raw_rows)
+    zlib_bytes = sum(len(row) for row in zlib_rows)
+
+    print(f"{count} recordings, {sum(len(d) for d in corpus)} frames x {len(CHANNELS)} channels")
+    print(f"{'format':>10} {'size(MB)':>10} {'ratio':>7} {'load total(ms)':>15} {'per rec(us)':>12}")
+    for name, size, load in (
+        ("json", json_bytes, json_load),
+        ("float32", raw_bytes, raw_load),
+        ("f32+zlib", zlib_bytes, zlib_load),
+    ):
+        print(
+            f"{name:>10} {size / 1e6:>10.2f} {json_bytes / size:>6.1f}x "
+            f"{load * 1000:>15.1f} {load / count * 1e6:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_templates.py
+# DBA 템플릿(ai/motion_templates.py)으로 평가했을 때의 점수가 전체 모범 동작으로 평가한 점수를 얼마나 따라가는지,
+# 평가가 얼마나 빨라지는지 합성 데이터로 확인
+#
+# 실행: python -m benchmarks.bench_templates [--references 16 64] [--templates 2 4 8] [--queries 20] [--frames 200]
+#
+# - 동작 하나를 "스타일" 4가지(위상/진폭이 조금씩 다름)로 녹화했다고 보고, 녹화마다 속도(길이)와 잡음을 다르게 만듦
+# - 평가 대상은 모범 동작과 같은 방식으로 새로 만든 좋은 동작(held-out)과, 진폭/모양이 틀린 실패 동작을 반씩 섞음
+# - max_dtw_distance는 update_max_dtw_for_motion과 같이 (모범 동작 × 0점 동작 DTW 거리의 최대값 × 1.1)
+# - DB를 쓰지 않음 (benchmarks/settings_sqlite.py로 Django만 초기화)
+
+import argparse
+import os
+
+import django
+import numpy as np
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings_sqlite")
+django.setup()
+
+from dtaidistance import dtw_ndim  # noqa: E402
+
+from ai.dtw_engine import DTW_WINDOW  # noqa: E402
+from ai.motion_templates import compare_scores  # noqa: E402
+from ai.preprocessing import preprocess_array  # noqa: E402
+from benchmarks.bench_preprocess import CHANNELS  # noqa: E402
+
+STYLES = 4
+ZERO_SCORES = 4
+
+
+def recording(rng, frames: int, style: int, failed: bool = False) -> np.ndarray:
+    """스타일 style로 한 동작을 전처리한 (프레임 수 × 채널 수) 배열 (길이는 ±15%로 달라짐)"""
+    length = int(frames * rng.uniform(0.85, 1.15))
+    t = np.linspace(0, 4 * np.pi, length)
+    phase = 0.4 * style
+    amplitude = 40 - 4 * style
+    if failed:
+        # 실패한 동작: 손가락을 덜 굽히고 손목 회전 방향이 반대
+        amplitude *= 0.3
+        phase += np.pi / 2
+    columns = []
+    for i, name in enumerate(CHANNELS):
+        if name.startswith("flex"):
+            columns.append(50 + amplitude * np.sin(t + i + phase) + rng.normal(0, 2, length))
+        else:
+            sign = -1 if failed else 1
+            columns.append(sign * 25 * np.cos(t * 0.5 + i + phase) + rng.normal(0, 1, length))
+    return preprocess_array(np.column_stack(columns), CHANNELS)
+
+
+def max_dtw_distance(references: list, zero_scores: list) -> float:
+    distance = max(
+        dtw_ndim.distance(reference, zero_score, window=DTW_WINDOW, use_c=True)
+        for reference in references
+        for zero_score in zero_scores
+    )
+    return distance * 1.1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DBA 템플릿 평가 정확도/속도 비교")
+    parser.add_argument("--references", type=int, nargs="+", default=[16, 64])
+    parser.add_argument("--templates", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--queries", type=int, default=20, help="평가할 동작 수 (좋은 동작/실패 동작 반씩)")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--mode", choices=["average", "nearest_k"], default="average")
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'refs':>5} {'tmpl':>5} {'mean|d|':>8} {'max|d|':>8} {'bias':>7} {'corr':>6} "
+        f"{'build(s)':>9} {'full(ms)':>9} {'tmpl(ms)':>9} {'speedup':>8}"
+    )
+    for reference_count in args.references:
+        rng = np.random.default_rng(reference_count)
+        references = [recording(rng, args.frames, index % STYLES) for index in range(reference_count)]
+        zero_scores = [recording(rng, args.frames, index % STYLES, failed=True) for index in range(ZERO_SCORES)]
+        good = args.queries - args.queries // 2
+        queries = [recording(rng, args.frames, index % STYLES) for index in range(good)]
+        queries += [recording(rng, args.frames, index % STYLES, failed=True) for index in range(args.queries // 2)]
+        max_distance = max_dtw_distance(references, zero_scores)
+
+        for template_count in args.templates:
+            result = compare_scores(references, queries, template_count, max_distance, mode=args.mode, k=args.k)
+            correlation = "-" if result["correlation"] is None else f"{result['correlation']:.3f}"
+            per_query = max(1, result["queries"])
+            print(
+                f"{result['references']:>5} {result['templates']:>5} {result['mean_abs_diff']:>8.2f} "
+                f"{result['max_abs_diff']:>8.2f} {result['mean_bias']:>+7.2f} {correlation:>6} "
+                f"{result['build_seconds']:>9.2f} {result['full_seconds'] * 1000 / per_query:>9.1f} "
+                f"{result['template_seconds'] * 1000 / per_query:>9.1f} {result['speedup']:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
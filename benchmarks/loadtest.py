@@ -0,0 +1,423 @@
+# benchmarks/loadtest.py
+# 평가 API와 대시보드(JWT) 목록 API에 동시 요청을 보내는 asyncio 부하 테스트
+#
+# 실행: python -m benchmarks.loadtest [--concurrency 16] [--duration 30] [--mix evaluate=8,motion_types=1,courses=1]
+#                                    [--workers 1] [--url http://127.0.0.1:8000] [--out report.json]
+#
+# 1. 현재 설정(기본 benchmarks/settings_sqlite.py)의 DB에 회사 / 센서 장비 / 직원 / 동작(모범 동작) / 교육 과정 / 수강 신청을 만듦
+# 2. 같은 설정으로 앱을 띄움 (--workers가 2 이상이고 gunicorn이 설치되어 있으면 gunicorn, 아니면 runserver)
+#    --url을 주면 이미 떠 있는 서버를 사용 (서버가 같은 DB를 쓰고 있어야 함)
+# 3. 회사마다 POST /api/organizations/login/ 으로 JWT를 받고, --concurrency개의 연결(keep-alive)로
+#    --mix 비율에 맞춰 요청을 보냄
+# 4. 엔드포인트별 처리량, p50/p95/p99 지연 시간, 오류율을 출력 (--out이면 JSON으로도 저장)
+# 만든 데이터는 끝나면 삭제함 (--keep이면 남겨둠)
+#
+# HTTP 클라이언트는 외부 패키지 없이 asyncio 스트림으로 구현 (HTTP/1.1 keep-alive, Content-Length / chunked 응답)
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import django
+import numpy as np
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings_sqlite")
+
+PREFIX = "loadtest"
+PASSWORD = "loadtest-password"
+DEFAULT_MIX = "evaluate=8,motion_types=1,courses=1"
+REQUEST_TIMEOUT = 60.0
+
+
+# --- 데이터 준비 ---
+
+def provision(args) -> dict:
+    from ai.models import MotionRecording, MotionType, SensorDevice
+    from ai.preprocessing import preprocess_frames
+    from ai.sensor_codec import encode
+    from benchmarks.bench_preprocess import CHANNELS, synthetic_frames
+    from courses.models import Course
+    from enrollments.models import Enrollment
+    from organizations.models import Company, Employee
+
+    cleanup()
+    motion_type = MotionType.objects.create(motion_name=f"{PREFIX}_motion", max_dtw_distance=50.0)
+    MotionRecording.objects.bulk_create([
+        MotionRecording(
+            motion_type=motion_type,
+            data_frames=args.frames,
+            score_category="reference",
+            sensor_data_blob=encode(preprocess_frames(synthetic_frames(args.frames, seed=seed)), CHANNELS),
+        )
+        for seed in range(args.references)
+    ])
+
+    tenants = []
+    for index in range(args.companies):
+        # save()에서 비밀번호를 해싱하므로 create 사용
+        company = Company.objects.create(name=f"{PREFIX} {index}", biz_no=f"{PREFIX}-{index:04d}", password=PASSWORD)
+        device = SensorDevice.objects.create(company=company, device_uid=f"{PREFIX}-device-{index}")
+        Employee.objects.bulk_create([
+            Employee(company=company, emp_no=f"E{number:06d}", name=f"trainee {number}")
+            for number in range(args.employees)
+        ])
+        courses = Course.objects.bulk_create([
+            Course(company=company, title=f"{PREFIX} course {number}") for number in range(args.courses)
+        ])
+        if courses:
+            # 직원마다 과정 하나씩 수강 신청
+            employees = Employee.objects.filter(company=company).order_by("pk")
+            Enrollment.objects.bulk_create([
+                Enrollment(employee=employee, course=courses[number % len(courses)], company=company)
+                for number, employee in enumerate(employees)
+            ])
+        tenants.append({"biz_no": company.biz_no, "api_key": device.api_key})
+    return {"motion_name": motion_type.motion_name, "tenants": tenants}
+
+
+def cleanup():
+    from ai.models import MotionType
+    from organizations.models import Company
+
+    # 직원 / 장비 / 과정 / 수강 신청 / 평가 기록은 CASCADE로 함께 삭제됨
+    Company.objects.filter(biz_no__startswith=f"{PREFIX}-").delete()
+    MotionType.objects.filter(motion_name=f"{PREFIX}_motion").delete()
+
+
+# --- 서버 ---
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int):
+    port = free_port()
+    env = {**os.environ, "PYTHONUNBUFFERED": "1"}
+    if workers > 1 and importlib.util.find_spec("gunicorn") is not None:
+        command = [sys.executable, "-m", "gunicorn", "back.wsgi:application",
+                   "--workers", str(workers), "--bind", f"127.0.0.1:{port}", "--log-level", "warning"]
+    else:
+        if workers > 1:
+            print("[주의] gunicorn이 설치되어 있지 않아 runserver(프로세스 1개, 스레드)로 실행합니다.")
+        command = [sys.executable, "manage.py", "runserver", f"127.0.0.1:{port}", "--noreload"]
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"서버가 시작되지 않았습니다: {' '.join(command)}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return server, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("서버가 60초 안에 시작되지 않았습니다.")
+
+
+# --- HTTP 클라이언트 ---
+
+class HTTPConnection:
+    """keep-alive 연결 하나 (서버가 연결을 닫으면 다음 요청 때 다시 연결)"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, headers: dict, body: bytes = b"") -> tuple:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(body)}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        status = int(status_line.split(" ", 2)[1])
+        response_headers = {}
+        for line in header_lines:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readuntil(b"\r\n")
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+            payload = b"".join(chunks)
+        elif "content-length" in response_headers:
+            payload = await self.reader.readexactly(int(response_headers["content-length"]))
+        else:
+            payload = await self.reader.read()
+            response_headers["connection"] = "close"
+
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, payload
+
+
+# --- 요청 종류 ---
+
+def build_requests(setup: dict, tokens: dict, args) -> dict:
+    """엔드포인트 이름 -> (요청을 만드는 함수) ; 함수는 (method, path, headers, body)를 반환"""
+    from ai.preprocessing import frames_to_array
+    from ai.sensor_codec import encode
+    from benchmarks.bench_preprocess import synthetic_frames
+
+    rng = random.Random(args.seed)
+    motion_name = setup["motion_name"]
+    tenants = setup["tenants"]
+    # 미리 만들어 둔 센서 데이터를 돌려 가며 사용 (요청을 만드는 비용이 측정에 섞이지 않도록)
+    samples = [synthetic_frames(args.frames, seed=10_000 + seed) for seed in range(8)]
+    if args.payload == "binary":
+        bodies = [encode(*frames_to_array(frames)) for frames in samples]
+    elif args.payload == "columnar":
+        bodies = []
+        for frames in samples:
+            array, channels = frames_to_array(frames)
+            bodies.append({"channels": list(channels), "frames": array.tolist()})
+    else:
+        bodies = [{"sensorData": frames} for frames in samples]
+
+    def evaluate():
+        tenant = rng.choice(tenants)
+        emp_no = f"E{rng.randrange(args.employees):06d}"
+        headers = {"X-API-Key": tenant["api_key"]}
+        body = rng.choice(bodies)
+        if args.payload == "binary":
+            headers["Content-Type"] = "application/octet-stream"
+            return "POST", f"/api/ai/evaluate/?empNo={emp_no}&motionName={motion_name}", headers, body
+        headers["Content-Type"] = "application/json"
+        payload = json.dumps({"empNo": emp_no, "motionName": motion_name, **body}).encode("utf-8")
+        return "POST", "/api/ai/evaluate/", headers, payload
+
+    def dashboard(path):
+        def build():
+            token = tokens[rng.choice(tenants)["biz_no"]]
+            return "GET", path, {"Authorization": f"Bearer {token}"}, b""
+        return build
+
+    return {
+        "evaluate": evaluate,
+        "motion_types": dashboard("/api/ai/motion-types/"),
+        "courses": dashboard("/api/courses/courses/"),
+        "enrollments": dashboard("/api/enrollments/"),
+    }
+
+
+def parse_mix(mix: str, available) -> dict:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in available:
+            raise SystemExit(f"알 수 없는 엔드포인트입니다: {name} (사용 가능: {', '.join(available)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+async def login(host: str, port: int, tenants: list) -> dict:
+    connection = HTTPConnection(host, port)
+    tokens = {}
+    try:
+        for tenant in tenants:
+            body = json.dumps({"biz_no": tenant["biz_no"], "password": PASSWORD}).encode("utf-8")
+            status, payload = await connection.request(
+                "POST", "/api/organizations/login/", {"Content-Type": "application/json"}, body
+            )
+            if status != 200:
+                raise RuntimeError(f"로그인 실패 ({tenant['biz_no']}): {status} {payload[:200]!r}")
+            tokens[tenant["biz_no"]] = json.loads(payload)["access"]
+    finally:
+        await connection.close()
+    return tokens
+
+
+async def drive(host: str, port: int, builders: dict, weights: dict, args, duration: float, record: bool) -> dict:
+    names = list(weights)
+    # failures: 응답을 받지 못한 요청 (연결 오류, 시간 초과)
+    stats = {name: {"latencies": [], "statuses": {}, "failures": 0} for name in names}
+    deadline = time.perf_counter() + duration
+    remaining = [args.requests] if args.requests and record else None
+
+    async def worker(worker_index: int):
+        rng = random.Random(args.seed + worker_index)
+        connection = HTTPConnection(host, port)
+        try:
+            while time.perf_counter() < deadline:
+                if remaining is not None:
+                    if remaining[0] <= 0:
+                        break
+                    remaining[0] -= 1
+                name = rng.choices(names, weights=[weights[n] for n in names])[0]
+                method, path, headers, body = builders[name]()
+                started = time.perf_counter()
+                try:
+                    status, _ = await asyncio.wait_for(
+                        connection.request(method, path, headers, body), REQUEST_TIMEOUT
+                    )
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+                    await connection.close()
+                    stats[name]["failures"] += 1
+                    continue
+                elapsed = time.perf_counter() - started
+                stats[name]["latencies"].append(elapsed)
+                stats[name]["statuses"][status] = stats[name]["statuses"].get(status, 0) + 1
+        finally:
+            await connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(args.concurrency)))
+    return {"elapsed": time.perf_counter() - started, "endpoints": stats}
+
+
+def summarize(result: dict) -> dict:
+    elapsed = result["elapsed"]
+    summary = {"elapsed": elapsed, "endpoints": {}}
+    all_latencies = []
+    total_requests = total_errors = 0
+    for name, stats in result["endpoints"].items():
+        latencies = np.array(stats["latencies"]) * 1000
+        # 응답을 받지 못한 요청은 지연 시간에는 빠지고, 요청 수와 오류에는 포함
+        requests = len(latencies) + stats["failures"]
+        errors = stats["failures"] + sum(count for status, count in stats["statuses"].items() if status >= 400)
+        all_latencies.extend(stats["latencies"])
+        total_requests += requests
+        total_errors += errors
+        statuses = {str(status): count for status, count in sorted(stats["statuses"].items())}
+        if stats["failures"]:
+            statuses["no_response"] = stats["failures"]
+        summary["endpoints"][name] = {
+            "requests": requests,
+            "throughput": requests / elapsed if elapsed else 0.0,
+            "error_rate": errors / requests if requests else 0.0,
+            "statuses": statuses,
+            **percentiles(latencies),
+        }
+    summary["total"] = {
+        "requests": total_requests,
+        "throughput": total_requests / elapsed if elapsed else 0.0,
+        "error_rate": total_errors / total_requests if total_requests else 0.0,
+        **percentiles(np.array(all_latencies) * 1000),
+    }
+    return summary
+
+
+def percentiles(latencies_ms) -> dict:
+    if not len(latencies_ms):
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None}
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99), "mean_ms": float(latencies_ms.mean())}
+
+
+def print_summary(summary: dict):
+    def fmt(value):
+        return f"{value:>9.1f}" if value is not None else f"{'-':>9}"
+
+    print(f"{'endpoint':<14} {'requests':>9} {'req/s':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'errors':>7}  statuses")
+    rows = list(summary["endpoints"].items()) + [("total", summary["total"])]
+    for name, row in rows:
+        statuses = " ".join(f"{status}:{count}" for status, count in row.get("statuses", {}).items())
+        print(
+            f"{name:<14} {row['requests']:>9} {row['throughput']:>8.1f} {fmt(row['p50_ms'])} {fmt(row['p95_ms'])} "
+            f"{fmt(row['p99_ms'])} {row['error_rate'] * 100:>6.1f}%  {statuses}"
+        )
+
+
+async def run_load(base_url: str, setup: dict, args) -> dict:
+    parts = urlsplit(base_url)
+    host, port = parts.hostname, parts.port or 80
+    tokens = await login(host, port, setup["tenants"])
+    builders = build_requests(setup, tokens, args)
+    weights = parse_mix(args.mix, builders)
+    if args.warmup:
+        # 평가기 캐시 / API 키 캐시 등을 채우는 워밍업 (결과에 포함하지 않음)
+        await drive(host, port, builders, weights, args, args.warmup, record=False)
+    return summarize(await drive(host, port, builders, weights, args, args.duration, record=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="평가 API / 대시보드 API 부하 테스트")
+    parser.add_argument("--url", default=None, help="이미 떠 있는 서버 주소 (기본: 새로 띄움)")
+    parser.add_argument("--workers", type=int, default=1, help="띄울 서버의 워커 프로세스 수 (gunicorn 필요)")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시 연결 수")
+    parser.add_argument("--duration", type=float, default=30.0, help="측정 시간(초)")
+    parser.add_argument("--requests", type=int, default=0, help="총 요청 수 (주면 그만큼 보내고 끝냄)")
+    parser.add_argument("--warmup", type=float, default=3.0, help="워밍업 시간(초)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"엔드포인트별 비율 (기본: {DEFAULT_MIX})")
+    parser.add_argument("--payload", choices=("frames", "columnar", "binary"), default="frames",
+                        help="평가 요청 본문 형식")
+    parser.add_argument("--companies", type=int, default=4)
+    parser.add_argument("--employees", type=int, default=100, help="회사별 직원 수")
+    parser.add_argument("--courses", type=int, default=20, help="회사별 교육 과정 수")
+    parser.add_argument("--references", type=int, default=8, help="모범 동작 수")
+    parser.add_argument("--frames", type=int, default=200, help="녹화 한 개의 프레임 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="결과를 저장할 JSON 파일")
+    parser.add_argument("--keep", action="store_true", help="만든 데이터를 지우지 않음")
+    args = parser.parse_args()
+
+    django.setup()
+    from django.core.management import call_command
+    from django.db import connections
+
+    call_command("migrate", verbosity=0)
+    setup = provision(args)
+    # 서버 프로세스가 DB를 쓰는 동안 이 프로세스의 연결(SQLite 잠금)을 잡고 있지 않도록 닫음
+    connections.close_all()
+
+    server = None
+    try:
+        if args.url:
+            base_url = args.url
+        else:
+            server, base_url = start_server(args.workers)
+        print(
+            f"{base_url} concurrency={args.concurrency} duration={args.duration}s mix={args.mix} "
+            f"payload={args.payload} companies={args.companies} references={args.references} frames={args.frames}"
+        )
+        summary = asyncio.run(run_load(base_url, setup, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if not args.keep:
+            cleanup()
+
+    print_summary(summary)
+    if args.out:
+        report = {"config": {k: v for k, v in vars(args).items() if k != "out"}, **summary}
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"결과를 {args.out}에 저장했습니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# benchmarks/settings_sqlite.py
+# 벤치마크를 오프라인(MySQL/.env 없이)으로 돌리기 위한 SQLite 설정
+#
+# 사용: DJANGO_SETTINGS_MODULE=benchmarks.settings_sqlite python -m benchmarks.<벤치마크>
+# DB 파일 위치는 BENCH_DATABASE 환경 변수로 바꿀 수 있음 (기본: var/bench.sqlite3)
+
+import os
+
+# back/settings.py가 필수로 읽는 환경 변수 (벤치마크에서는 쓰이지 않음)
+os.environ.setdefault("DJANGO_SECRET_KEY", "benchmark-only-secret-key")
+for name in ("DATABASE_NAME", "DATABASE_USER", "DATABASE_PASSWORD", "DATABASE_HOST"):
+    os.environ.setdefault(name, "unused")
+
+from back.settings import *  # noqa: E402,F401,F403
+from back.settings import BASE_DIR  # noqa: E402
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get("BENCH_DATABASE", str(BASE_DIR / "var" / "bench.sqlite3")),
+    }
+}
+
+DEBUG = False
+# 측정 결과가 .env의 운영 설정에 따라 달라지지 않도록 부가 기능은 끔
+AI_WARMUP_EVALUATORS = False
+AI_RECORDING_WRITE_BEHIND = False
+AI_REFERENCE_SNAPSHOTS = False
+AI_METRICS_DIR = ""
+AI_EVAL_SERVICE_ADDRESS = os.environ.get("AI_EVAL_SERVICE_ADDRESS")
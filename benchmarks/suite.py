@@ -0,0 +1,278 @@
+# benchmarks/suite.py
+# 동작 평가 파이프라인 마이크로 벤치마크 모음 (결과를 JSON으로 저장하고, 두 결과를 비교해서 성능 저하를 찾음)
+#
+# 실행:
+#   python -m benchmarks.suite run [--out results.json] [--frames 200] [--channels 8] [--quick]
+#   python -m benchmarks.suite compare base.json new.json [--threshold 0.10]
+#
+# - 기본 설정은 benchmarks/settings_sqlite.py (MySQL 없이 SQLite 파일로 실행, 처음 실행 시 마이그레이션 적용)
+# - 벤치마크용 데이터는 한 트랜잭션 안에서 만들고 마지막에 롤백함
+# - 각 항목은 여러 번 실행해서 가장 빠른 시간(best)과 중앙값(median)을 기록하고, 비교는 best 기준
+#   (best가 다른 프로세스/캐시 상태의 영향을 가장 적게 받음)
+# - compare는 성능이 threshold 이상 나빠진 항목이 있으면 종료 코드 1을 반환 (CI에서 사용 가능)
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings_sqlite")
+
+DEFAULT_FRAMES = 200
+DEFAULT_CHANNELS = 8
+DEFAULT_THRESHOLD = 0.10
+REFERENCE_COUNTS = (1, 4, 16, 32)
+# (모범 동작 수 R, 0점 동작 수 Z)
+PAIR_GRIDS = ((2, 2), (4, 4), (8, 8))
+FRAME_COUNTS = (200, 2_000, 20_000)
+MOTION_PREFIX = "bench_suite_"
+
+
+def make_channels(count: int) -> list:
+    """flex 채널 5개 + 자이로 채널 3개 순서로, count개가 될 때까지 채널 이름을 만듦"""
+    flex = [f"flex{i}" for i in range(1, 6)]
+    gyro = ["gyro_x", "gyro_y", "gyro_z"]
+    channels = (flex[:count - 3] + gyro) if count >= 4 else flex[:count]
+    # 8개를 넘으면 flex 채널을 더 붙임
+    channels += [f"flex{i}" for i in range(6, 6 + count - len(channels))]
+    return channels
+
+
+def quietly(func, *args):
+    # update_max_dtw_for_motion 등이 출력하는 진행 메시지는 숨김
+    with redirect_stdout(io.StringIO()):
+        return func(*args)
+
+
+def measure(func, repeat: int, setup=None) -> dict:
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return {"best": min(timings), "median": statistics.median(timings), "repeat": repeat}
+
+
+class Suite:
+    def __init__(self, frames: int, channels: list, quick: bool):
+        self.frames = frames
+        self.channels = channels
+        self.quick = quick
+        self.results = {}
+
+    def repeat(self, default: int) -> int:
+        return max(1, default // 3) if self.quick else default
+
+    def record(self, name: str, params: dict, timing: dict):
+        key = name + ("[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]" if params else "")
+        self.results[key] = {"name": name, "params": params, **timing}
+        print(f"  {key:<64} best {timing['best'] * 1000:>10.3f}ms  median {timing['median'] * 1000:>10.3f}ms")
+
+    def frames_for(self, seed: int, num_frames: int = None) -> list:
+        from benchmarks.bench_preprocess import synthetic_frames
+
+        return synthetic_frames(num_frames or self.frames, seed=seed, channels=self.channels)
+
+    def recording(self, motion_type, category: str, seed: int):
+        from ai.models import MotionRecording
+        from ai.preprocessing import preprocess_frames
+        from ai.sensor_codec import encode
+
+        data = preprocess_frames(self.frames_for(seed))
+        return MotionRecording(
+            motion_type=motion_type,
+            data_frames=len(data),
+            score_category=category,
+            sensor_data_blob=encode(data, self.channels),
+        )
+
+    def motion(self, name: str, references: int, zero_scores: int = 0):
+        from ai.models import MotionRecording, MotionType
+
+        motion_type = MotionType.objects.create(motion_name=f"{MOTION_PREFIX}{name}", max_dtw_distance=50.0)
+        # bulk_create는 시그널(버전 증가 등)을 보내지 않으므로 측정 대상이 아닌 부수 작업이 생기지 않음
+        MotionRecording.objects.bulk_create(
+            [self.recording(motion_type, "reference", seed) for seed in range(references)]
+            + [self.recording(motion_type, "zero_score", 10_000 + seed) for seed in range(zero_scores)]
+        )
+        return motion_type
+
+    def bench_preprocess(self):
+        from ai.safty_training_ai import preprocess_sensor_data
+
+        for num_frames in FRAME_COUNTS:
+            raw = self.frames_for(1, num_frames)
+            timing = measure(lambda: preprocess_sensor_data(raw), self.repeat(3 if num_frames >= 20_000 else 20))
+            self.record("preprocess_sensor_data", {"frames": num_frames, "channels": len(self.channels)}, timing)
+
+    def bench_decode(self):
+        record = self.recording(None, "reference", 1)
+        timing = measure(record.get_sensor_data_to_numpy, self.repeat(2000))
+        self.record("get_sensor_data_to_numpy", {"frames": self.frames, "channels": len(self.channels)}, timing)
+
+    def bench_evaluator(self):
+        from ai.safty_training_ai import MotionEvaluator
+
+        user_raw = self.frames_for(99)
+        for references in REFERENCE_COUNTS:
+            motion_type = self.motion(f"refs{references}", references)
+            params = {"references": references, "frames": self.frames}
+            timing = measure(lambda: MotionEvaluator(motion_type.motion_name), self.repeat(10))
+            self.record("MotionEvaluator", params, timing)
+
+            evaluator = MotionEvaluator(motion_type.motion_name)
+            for mode in ("average", "nearest_k"):
+                timing = measure(
+                    lambda: evaluator.evaluator_user_motion(user_raw, 50.0, mode=mode, k=3), self.repeat(5)
+                )
+                self.record("evaluator_user_motion", {**params, "mode": mode}, timing)
+
+    def bench_max_dtw(self):
+        from ai.logic import update_max_dtw_for_motion
+        from ai.models import MotionPairDistance
+
+        for references, zero_scores in PAIR_GRIDS:
+            motion_type = self.motion(f"pairs{references}x{zero_scores}", references, zero_scores)
+            # 저장된 DTW 쌍을 지워서 매번 모든 쌍을 새로 계산하도록 함
+            timing = measure(
+                lambda: quietly(update_max_dtw_for_motion, motion_type),
+                self.repeat(3),
+                setup=lambda: MotionPairDistance.objects.filter(motion_type=motion_type).delete(),
+            )
+            self.record(
+                "update_max_dtw_for_motion",
+                {"references": references, "zero_scores": zero_scores, "frames": self.frames},
+                timing,
+            )
+
+    def run(self) -> dict:
+        from django.db import transaction
+
+        with transaction.atomic():
+            for bench in (self.bench_preprocess, self.bench_decode, self.bench_evaluator, self.bench_max_dtw):
+                bench()
+            transaction.set_rollback(True)
+        return self.results
+
+
+def environment() -> dict:
+    import numpy as np
+    from django.conf import settings
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        from importlib.metadata import version
+
+        dtaidistance_version = version("dtaidistance")
+    except Exception:
+        dtaidistance_version = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "dtaidistance": dtaidistance_version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "database": settings.DATABASES["default"]["ENGINE"],
+    }
+
+
+def run_command(args):
+    django.setup()
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+    channels = make_channels(args.channels)
+    print(f"frames={args.frames} channels={len(channels)} ({', '.join(channels)})")
+    suite = Suite(args.frames, channels, args.quick)
+    results = suite.run()
+    report = {
+        "environment": environment(),
+        "config": {"frames": args.frames, "channels": channels, "quick": args.quick},
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"결과를 {args.out}에 저장했습니다.")
+
+
+def compare(base: dict, new: dict, threshold: float) -> list:
+    """두 결과에 모두 있는 항목의 (이름, 이전 best, 새 best, 비율, 성능 저하 여부) 목록"""
+    rows = []
+    for key, base_result in base["results"].items():
+        new_result = new["results"].get(key)
+        if new_result is None:
+            continue
+        ratio = new_result["best"] / base_result["best"] if base_result["best"] else float("inf")
+        rows.append((key, base_result["best"], new_result["best"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def compare_command(args):
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    if base.get("config") != new.get("config"):
+        print(f"[주의] 두 결과의 설정이 다릅니다: {base.get('config')} / {new.get('config')}")
+    rows = compare(base, new, args.threshold)
+    print(f"{'benchmark':<64} {'base(ms)':>10} {'new(ms)':>10} {'change':>8}")
+    for key, base_best, new_best, ratio, regressed in rows:
+        flag = "  << 성능 저하" if regressed else ""
+        print(f"{key:<64} {base_best * 1000:>10.3f} {new_best * 1000:>10.3f} {(ratio - 1) * 100:>+7.1f}%{flag}")
+
+    missing = sorted(set(base["results"]) - set(new["results"]))
+    if missing:
+        print(f"새 결과에 없는 항목: {', '.join(missing)}")
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)}개 항목이 {args.threshold * 100:.0f}% 넘게 느려졌습니다.")
+        return 1
+    print("성능 저하 없음")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="동작 평가 파이프라인 마이크로 벤치마크")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="벤치마크를 실행하고 결과를 JSON으로 저장")
+    run_parser.add_argument("--out", default="bench_results.json")
+    run_parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES, help="녹화 한 개의 프레임 수")
+    run_parser.add_argument("--channels", type=int, default=DEFAULT_CHANNELS, help="채널 수 (flex + gyro)")
+    run_parser.add_argument("--quick", action="store_true", help="반복 횟수를 줄여서 빠르게 실행")
+
+    compare_parser = commands.add_parser("compare", help="두 결과를 비교해서 성능 저하를 표시")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD, help="이 비율 넘게 느려지면 성능 저하 (기본 0.10)"
+    )
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run_command(args)
+        return 0
+    return compare_command(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
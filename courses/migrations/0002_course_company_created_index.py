@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('organizations', '0002_sync_employee_fields'),
+    ]
+
+    operations = [
+        # 새 인덱스를 먼저 만들어야 MySQL이 외래 키 인덱스를 지울 수 있음 (외래 키에는 company로 시작하는 인덱스가 필요)
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['company', 'created_at', 'id'], name='course_company_created_idx'),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='company',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='courses', to='organizations.company'),
+        ),
+    ]
@@ -2,10 +2,17 @@ from django.db import models
 from organizations.models import Company
 
 class Course(models.Model):
-    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="courses")
+    # 외래 키 인덱스는 아래 (company, created_at, id) 인덱스가 대신함
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="courses", db_index=False)
     title = models.CharField(max_length=255)  # 과정명
     description = models.TextField(blank=True, null=True)  # 과정 설명
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # 회사별 과정 목록을 최신순 키셋 페이지네이션(back/pagination.py)으로 조회할 때 사용
+        indexes = [
+            models.Index(fields=["company", "created_at", "id"], name="course_company_created_idx"),
+        ]
+
     def __str__(self):
         return self.title
@@ -5,3 +5,5 @@ class CourseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = ["id", "title", "description", "company", "created_at"]
+        # 회사는 로그인한 회사로 자동 설정
+        read_only_fields = ["id", "company", "created_at"]
@@ -1,3 +1,59 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from organizations.models import Company
+
+from .models import Course
+
+
+class CourseListTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="test", biz_no="000-00-00000", password="password")
+        self.other = Company.objects.create(name="other", biz_no="111-11-11111", password="password")
+        for company in (self.company, self.other):
+            Course.objects.bulk_create([Course(company=company, title=f"course {number}") for number in range(30)])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.company)
+
+    def test_list_is_scoped_and_paginated(self):
+        ids, url = [], "/api/courses/courses/?limit=7"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data["results"]), 7)
+            ids += [row["id"] for row in response.data["results"]]
+            url = response.data["next"]
+        expected = list(Course.objects.filter(company=self.company).order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_page_query_budget_does_not_grow(self):
+        # 과정 수 / 페이지 위치와 관계없이 목록 조회는 쿼리 한 번
+        response = self.client.get("/api/courses/courses/?limit=5")
+        with self.assertNumQueries(1):
+            self.client.get(response.data["next"])
+        Course.objects.bulk_create([Course(company=self.other, title="more") for _ in range(200)])
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/courses/courses/?limit=50")
+        self.assertEqual(len(response.data["results"]), 30)
+
+    def test_create_uses_login_company_and_hides_other_tenants(self):
+        response = self.client.post("/api/courses/courses/", {"title": "new", "company": self.other.pk}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Course.objects.get(pk=response.data["id"]).company, self.company)
+
+        other_course = Course.objects.filter(company=self.other).first()
+        self.assertEqual(self.client.get(f"/api/courses/courses/{other_course.pk}/").status_code, 404)
+
+    def test_list_uses_company_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("EXPLAIN QUERY PLAN 형식은 SQLite 기준")
+        cursor = self.client.get("/api/courses/courses/?limit=5").data["next"].split("cursor=")[1]
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f"/api/courses/courses/?limit=5&cursor={cursor}")
+        with connection.cursor() as db:
+            db.execute("EXPLAIN QUERY PLAN " + queries.captured_queries[-1]["sql"])
+            plan = " / ".join(str(row[-1]) for row in db.fetchall())
+        self.assertIn("USING INDEX course_company_created_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
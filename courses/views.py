@@ -1,12 +1,30 @@
 from rest_framework import generics
+from back.pagination import KeysetPagination
+from organizations.permissions import IsCompanySession
 from .models import Course
 from .serializers import CourseSerializer
 
 class CourseListCreateAPI(generics.ListCreateAPIView):
-    queryset = Course.objects.all()
+    """
+    로그인한 회사(JWT)의 교육 과정 목록 / 등록
+    목록은 최신순 키셋 페이지네이션 ({"next", "results"}, (company, created_at, id) 인덱스)
+    """
     serializer_class = CourseSerializer
+    permission_classes = [IsCompanySession]
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-created_at", "-id")
+
+    def get_queryset(self):
+        return Course.objects.filter(company=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(company=self.request.user)
 
 
 class CourseDetailAPI(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Course.objects.all()
     serializer_class = CourseSerializer
+    permission_classes = [IsCompanySession]
+
+    def get_queryset(self):
+        # 다른 회사의 과정은 404
+        return Course.objects.filter(company=self.request.user)
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_companies(apps, schema_editor):
+    # 기존 수강 신청의 회사를 과정의 회사로 채움 (UPDATE 한 번)
+    Enrollment = apps.get_model('enrollments', 'Enrollment')
+    Course = apps.get_model('courses', 'Course')
+    Enrollment.objects.filter(company__isnull=True).update(
+        company_id=Subquery(Course.objects.filter(pk=OuterRef('course_id')).values('company_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_course_company_created_index'),
+        ('enrollments', '0001_initial'),
+        ('organizations', '0002_sync_employee_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='company',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='organizations.company'),
+        ),
+        # 인덱스를 만들기 전에 채워야 인덱스를 한 번만 만듦
+        migrations.RunPython(backfill_companies, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['company', 'id'], name='enrollment_company_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['course', 'status', 'id'], name='enrollment_course_status_idx'),
+        ),
+    ]
@@ -1,12 +1,31 @@
 from django.db import models
-from organizations.models import Employee
+from organizations.models import Company, Employee
 from courses.models import Course
 
 class Enrollment(models.Model):
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="enrollments")
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="enrollments")
+    # 과정의 회사 (회사별 수강 신청 목록을 과정 테이블 조인 없이 인덱스로 조회하기 위해 함께 저장)
+    # 외래 키 인덱스는 아래 (company, id) 인덱스가 대신함
+    company = models.ForeignKey(
+        Company, on_delete=models.CASCADE, related_name="enrollments", null=True, blank=True, db_index=False
+    )
     enrolled_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, default="enrolled")  # 예: enrolled, cancelled
 
+    class Meta:
+        # 수강 신청 목록은 id 역순(= 신청 순서 역순) 키셋 페이지네이션(back/pagination.py)으로 조회
+        # 회사 전체: (company, id) / 과정별: course 외래 키 인덱스 / 과정 + 상태별: (course, status, id)
+        indexes = [
+            models.Index(fields=["company", "id"], name="enrollment_company_id_idx"),
+            models.Index(fields=["course", "status", "id"], name="enrollment_course_status_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        """회사를 지정하지 않았으면 과정의 회사로 채워서 저장 (bulk_create는 호출하는 쪽에서 채워야 함)"""
+        if self.company_id is None and self.course_id is not None:
+            self.company_id = Course.objects.filter(pk=self.course_id).values_list("company_id", flat=True).first()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.employee.name} → {self.course.title} ({self.status})"
@@ -1,7 +1,24 @@
 from rest_framework import serializers
+from courses.models import Course
+from organizations.models import Employee
 from .models import Enrollment
 
 class EnrollmentSerializer(serializers.ModelSerializer):
+    # 목록에서 직원 이름 / 과정명을 함께 보여줌 (views에서 select_related로 한 번에 조회)
+    employee_name = serializers.CharField(source="employee.name", read_only=True)
+    course_title = serializers.CharField(source="course.title", read_only=True)
+
     class Meta:
         model = Enrollment
-        fields = "__all__"
+        fields = ["id", "employee", "employee_name", "course", "course_title", "company", "enrolled_at", "status"]
+        # 회사는 과정의 회사(= 로그인한 회사)로 자동 설정
+        read_only_fields = ["id", "company", "enrolled_at"]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # 다른 회사의 직원 / 과정으로는 신청할 수 없도록, 선택 가능한 대상을 로그인한 회사 것으로 제한
+        request = self.context.get("request")
+        company_id = getattr(getattr(request, "user", None), "pk", None)
+        fields["employee"].queryset = Employee.objects.filter(company_id=company_id)
+        fields["course"].queryset = Course.objects.filter(company_id=company_id)
+        return fields
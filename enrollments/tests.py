@@ -1,3 +1,91 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from courses.models import Course
+from organizations.models import Company, Employee
+
+from .models import Enrollment
+
+
+class EnrollmentListTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="test", biz_no="000-00-00000", password="password")
+        self.other = Company.objects.create(name="other", biz_no="111-11-11111", password="password")
+        self.courses = {}
+        for company in (self.company, self.other):
+            employees = Employee.objects.bulk_create(
+                [Employee(company=company, emp_no=f"E{number:03d}", name=f"trainee {number}") for number in range(20)]
+            )
+            courses = Course.objects.bulk_create([Course(company=company, title=f"course {number}") for number in range(2)])
+            self.courses[company.pk] = courses
+            Enrollment.objects.bulk_create([
+                Enrollment(employee=employee, course=courses[number % 2], company=company,
+                           status="cancelled" if number % 5 == 0 else "enrolled")
+                for number, employee in enumerate(employees)
+            ])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.company)
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row["id"] for row in response.data["results"]]
+            url = response.data["next"]
+        return ids
+
+    def test_list_is_scoped_and_paginated(self):
+        expected = list(Enrollment.objects.filter(company=self.company).order_by("-id").values_list("id", flat=True))
+        self.assertEqual(self.walk("/api/enrollments/?limit=6"), expected)
+
+        course = self.courses[self.company.pk][0]
+        expected = list(
+            Enrollment.objects.filter(course=course, status="enrolled").order_by("-id").values_list("id", flat=True)
+        )
+        self.assertEqual(self.walk(f"/api/enrollments/?course={course.pk}&status=enrolled&limit=3"), expected)
+
+        other_course = self.courses[self.other.pk][0]
+        self.assertEqual(self.client.get(f"/api/enrollments/?course={other_course.pk}").status_code, 404)
+
+    def test_page_query_budget_does_not_grow(self):
+        # 직원 이름 / 과정명을 보여줘도 행마다 추가 쿼리 없이 페이지당 한 번 (과정으로 거르면 과정 확인 한 번 더)
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/enrollments/?limit=50")
+        self.assertEqual(len(response.data["results"]), 20)
+        self.assertTrue(all(row["employee_name"] and row["course_title"] for row in response.data["results"]))
+        next_page = self.client.get("/api/enrollments/?limit=5").data["next"]
+        with self.assertNumQueries(1):
+            self.client.get(next_page)
+        course = self.courses[self.company.pk][0]
+        with self.assertNumQueries(2):
+            self.client.get(f"/api/enrollments/?course={course.pk}&status=enrolled")
+
+    def test_create_rejects_other_tenant_rows(self):
+        employee = Employee.objects.filter(company=self.company).first()
+        course = self.courses[self.company.pk][1]
+        response = self.client.post("/api/enrollments/", {"employee": employee.pk, "course": course.pk}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Enrollment.objects.get(pk=response.data["id"]).company, self.company)
+
+        outsider = Employee.objects.filter(company=self.other).first()
+        response = self.client.post("/api/enrollments/", {"employee": outsider.pk, "course": course.pk}, format="json")
+        self.assertEqual(response.status_code, 400)
+        other_enrollment = Enrollment.objects.filter(company=self.other).first()
+        self.assertEqual(self.client.get(f"/api/enrollments/{other_enrollment.pk}/").status_code, 404)
+
+    def test_list_uses_keyset_indexes(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("EXPLAIN QUERY PLAN 형식은 SQLite 기준")
+        course = self.courses[self.company.pk][0]
+        for params, index in (("", "enrollment_company_id_idx"), (f"course={course.pk}&status=enrolled&", "enrollment_course_status_idx")):
+            cursor = self.client.get(f"/api/enrollments/?{params}limit=2").data["next"].split("cursor=")[1]
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(f"/api/enrollments/?{params}limit=2&cursor={cursor}")
+            with connection.cursor() as db:
+                db.execute("EXPLAIN QUERY PLAN " + queries.captured_queries[-1]["sql"])
+                plan = " / ".join(str(row[-1]) for row in db.fetchall())
+            self.assertIn(f"USING INDEX {index}", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
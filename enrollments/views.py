@@ -1,11 +1,53 @@
 from rest_framework import generics
+from rest_framework.exceptions import NotFound
+from back.pagination import KeysetPagination
+from courses.models import Course
+from organizations.permissions import IsCompanySession
 from .models import Enrollment
 from .serializers import EnrollmentSerializer
 
+
+def enrollment_queryset(**filters):
+    """수강 신청 목록 (직원 이름 / 과정명은 조인으로 함께, 필요한 컬럼만 조회)"""
+    return Enrollment.objects.filter(**filters).select_related("employee", "course").only(
+        "id", "employee", "course", "company", "enrolled_at", "status", "employee__name", "course__title"
+    )
+
+
 class EnrollmentListCreateAPI(generics.ListCreateAPIView):
-    queryset = Enrollment.objects.all()
+    """
+    로그인한 회사(JWT)의 수강 신청 목록 / 등록
+    목록은 신청 역순 키셋 페이지네이션 ({"next", "results"}), ?course=<과정 id>&status=<상태>로 거를 수 있음
+    """
     serializer_class = EnrollmentSerializer
+    permission_classes = [IsCompanySession]
+    pagination_class = KeysetPagination
+    # enrolled_at은 auto_now_add라 id 순서와 같으므로 id만으로 정렬 (인덱스 (company, id) / (course, status, id))
+    keyset_ordering = ("-id",)
+
+    def get_queryset(self):
+        company = self.request.user
+        course_id = self.request.query_params.get("course")
+        if course_id:
+            if not course_id.isdigit() or not Course.objects.filter(pk=course_id, company=company).exists():
+                raise NotFound("과정을 찾을 수 없습니다.")
+            # 과정은 로그인한 회사 것으로 확인했으므로 회사 조건을 빼서 과정 인덱스를 쓰도록 함
+            queryset = enrollment_queryset(course_id=course_id)
+        else:
+            queryset = enrollment_queryset(company=company)
+        status = self.request.query_params.get("status")
+        if status:
+            queryset = queryset.filter(status=status)
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(company=self.request.user)
+
 
 class EnrollmentDetailAPI(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Enrollment.objects.all()
     serializer_class = EnrollmentSerializer
+    permission_classes = [IsCompanySession]
+
+    def get_queryset(self):
+        # 다른 회사의 수강 신청은 404
+        return enrollment_queryset(company=self.request.user)
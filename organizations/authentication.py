@@ -0,0 +1,23 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import Company
+
+
+class CompanyJWTAuthentication(JWTAuthentication):
+    """
+    ✅ 로그인(CompanyTokenObtainPairView)에서 발급한 JWT의 biz_no 클레임으로 Company를 찾아 request.user로 사용
+    (기본 JWTAuthentication은 Django User 모델에서 biz_no를 찾기 때문에 회사 토큰을 인식하지 못함)
+    """
+
+    def get_user(self, validated_token):
+        try:
+            biz_no = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("토큰에 사업자등록번호가 없습니다.")
+
+        company = Company.objects.filter(biz_no=biz_no).first()
+        if company is None:
+            raise AuthenticationFailed("회사를 찾을 수 없습니다.", code="user_not_found")
+        return company
@@ -0,0 +1,218 @@
+# organizations/employee_import.py
+# 직원 대량 업로드 (CSV / NDJSON)
+#
+# - 파일을 통째로 메모리에 올리지 않고 64KB씩 읽어서 한 줄(한 행)씩 처리함
+#   (업로드 API는 요청 본문 스트림, 관리 명령은 파일 / 표준 입력을 그대로 넘김)
+# - 행을 CHUNK_SIZE개씩 모아서 검사한 뒤, 올바른 행만 (company, emp_no) 유일 제약으로
+#   bulk_create(update_conflicts=True) -> 청크마다 "기존 사원번호 조회 + INSERT ... ON CONFLICT DO UPDATE" 쿼리만 실행
+#   (행마다 get_or_create / save하면 10만 명 업로드에 수십만 번의 쿼리가 필요함)
+# - 같은 청크에서 사원번호가 겹치면 마지막 행이 이김 (한 INSERT에 같은 키가 두 번 들어가면 PostgreSQL이 거부함)
+# - 파일에 있는 컬럼만 갱신함 (CSV에 dept 컬럼이 없으면 기존 직원의 부서는 그대로)
+# - 잘못된 행은 건너뛰고 {"line", "emp_no", "errors": {필드: [메시지]}} 목록으로 돌려줌 (최대 MAX_REPORTED_ERRORS개)
+# - bulk_create는 post_save 시그널을 보내지 않으므로, 끝나면 평가 요청용 직원 캐시 버전(ai/context.py)을 직접 올림
+
+import codecs
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connection, transaction
+
+from .models import Employee
+
+FORMATS = ("csv", "ndjson")
+CHUNK_SIZE = 1000
+READ_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 1000
+
+REQUIRED_FIELDS = ("emp_no", "name")
+OPTIONAL_FIELDS = ("dept", "phone", "email")
+# 컬럼(키) 이름 별칭 -> 모델 필드 (엑셀에서 만든 한글 헤더도 받음)
+FIELD_ALIASES = {
+    "emp_no": "emp_no", "empNo": "emp_no", "사번": "emp_no", "사원번호": "emp_no",
+    "name": "name", "이름": "name", "성명": "name",
+    "dept": "dept", "부서": "dept",
+    "phone": "phone", "전화번호": "phone", "연락처": "phone",
+    "email": "email", "이메일": "email",
+}
+
+
+def detect_format(content_type: str = "", filename: str = ""):
+    """Content-Type 또는 파일 확장자로 형식("csv" / "ndjson")을 정함. 알 수 없으면 None"""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type == "text/csv" or filename.lower().endswith(".csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/jsonl") or filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return None
+
+
+def iter_lines(stream):
+    """바이트 스트림(read(size) 지원)을 UTF-8(BOM 허용) 줄 단위로 읽음. 줄바꿈 문자는 남겨둠 (csv 모듈이 필요로 함)"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    while True:
+        chunk = stream.read(READ_SIZE)
+        if not chunk:
+            break
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def _csv_rows(lines):
+    """(줄 번호, {필드: 값}) 또는 (줄 번호, 오류 메시지)"""
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    fields = [FIELD_ALIASES.get(column.strip()) for column in header]
+    for cells in reader:
+        if not any(cell.strip() for cell in cells):
+            continue
+        yield reader.line_num, {field: cell for field, cell in zip(fields, cells) if field}
+
+
+def _ndjson_rows(lines):
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield number, "JSON 형식이 올바르지 않습니다."
+            continue
+        if not isinstance(data, dict):
+            yield number, "각 줄은 JSON 객체여야 합니다."
+            continue
+        yield number, {FIELD_ALIASES[key]: value for key, value in data.items() if key in FIELD_ALIASES}
+
+
+def _csv_header(stream):
+    """CSV 첫 줄(헤더)을 읽어서 (필드 목록, 나머지 줄을 포함한 줄 반복자)를 반환"""
+    lines = iter_lines(stream)
+    first = next(lines, "")
+    header = next(csv.reader([first]), [])
+    return {FIELD_ALIASES.get(column.strip()) for column in header} - {None}, _chain(first, lines)
+
+
+def _chain(first, lines):
+    yield first
+    yield from lines
+
+
+def clean_row(data: dict):
+    """행 하나를 검사해서 (저장할 값, 오류)를 반환. 값은 문자열로 앞뒤 공백을 지움"""
+    values, errors = {}, {}
+    for field, value in data.items():
+        if value is None:
+            value = ""
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            errors[field] = ["문자열이어야 합니다."]
+            continue
+        value = str(value).strip()
+        max_length = Employee._meta.get_field(field).max_length
+        if len(value) > max_length:
+            errors[field] = [f"{max_length}자 이하여야 합니다."]
+            continue
+        values[field] = value
+    for field in REQUIRED_FIELDS:
+        if field not in errors and not values.get(field):
+            errors[field] = ["필수 항목입니다."]
+    if values.get("email") and "email" not in errors:
+        try:
+            validate_email(values["email"])
+        except ValidationError:
+            errors["email"] = ["올바른 이메일 주소가 아닙니다."]
+    return values, errors
+
+
+def _upsert(company_id, rows: dict, dry_run: bool):
+    """한 청크({사원번호: 값})를 저장하고 (새로 만든 수, 갱신한 수)를 반환"""
+    existing = set(
+        Employee.objects.filter(company_id=company_id, emp_no__in=list(rows)).values_list("emp_no", flat=True)
+    )
+    if dry_run:
+        return len(rows) - len(existing), len(existing)
+
+    # 파일에 있는 컬럼만 갱신하도록, 갱신할 필드 조합별로 나눠서 저장 (CSV는 항상 한 묶음)
+    groups = {}
+    for values in rows.values():
+        fields = tuple(field for field in OPTIONAL_FIELDS if field in values)
+        groups.setdefault(fields, []).append(Employee(company_id=company_id, **values))
+    # MySQL은 충돌 대상 컬럼을 지정하지 않음 (ON DUPLICATE KEY UPDATE가 유일 인덱스를 모두 사용)
+    unique_fields = ["company", "emp_no"] if connection.features.supports_update_conflicts_with_target else None
+    with transaction.atomic():
+        for fields, employees in groups.items():
+            Employee.objects.bulk_create(
+                employees,
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=["name", *fields],
+            )
+    return len(rows) - len(existing), len(existing)
+
+
+def import_employees(company_id, stream, file_format: str, chunk_size: int = CHUNK_SIZE, dry_run: bool = False) -> dict:
+    """
+    stream(바이트, read(size) 지원)의 직원 목록을 company_id 회사에 추가/갱신하고 결과 보고를 반환
+    {"total", "created", "updated", "failed", "errors": [{"line", "emp_no", "errors"}], "errors_truncated"}
+    형식이나 헤더가 잘못되어 아무 행도 처리할 수 없으면 {"error": 메시지}
+    dry_run이면 검사와 추가/갱신 건수 계산만 하고 저장하지 않음
+    """
+    if file_format == "csv":
+        columns, lines = _csv_header(stream)
+        missing = [field for field in REQUIRED_FIELDS if field not in columns]
+        if missing:
+            return {"error": f"CSV 헤더에 필수 컬럼이 없습니다: {', '.join(missing)}"}
+        rows = _csv_rows(lines)
+    elif file_format == "ndjson":
+        rows = _ndjson_rows(iter_lines(stream))
+    else:
+        return {"error": f"지원하지 않는 형식입니다: {file_format}"}
+
+    report = {"total": 0, "created": 0, "updated": 0, "failed": 0, "errors": [], "errors_truncated": False}
+
+    def fail(line, emp_no, errors):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line, "emp_no": emp_no, "errors": errors})
+        else:
+            report["errors_truncated"] = True
+
+    def flush(chunk):
+        created, updated = _upsert(company_id, chunk, dry_run)
+        report["created"] += created
+        report["updated"] += updated
+
+    chunk = {}
+    try:
+        for line, data in rows:
+            report["total"] += 1
+            if isinstance(data, str):
+                fail(line, None, {"non_field_errors": [data]})
+                continue
+            values, errors = clean_row(data)
+            if errors:
+                fail(line, values.get("emp_no") or None, errors)
+                continue
+            # 같은 청크의 같은 사원번호는 마지막 행으로 덮어씀
+            chunk.pop(values["emp_no"], None)
+            chunk[values["emp_no"]] = values
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = {}
+        if chunk:
+            flush(chunk)
+    finally:
+        if not dry_run and (report["created"] or report["updated"]):
+            from ai.context import bump_employees_version
+
+            bump_employees_version(company_id)
+    return report
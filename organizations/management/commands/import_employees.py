@@ -0,0 +1,53 @@
+# organizations/management/commands/import_employees.py
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from organizations.employee_import import CHUNK_SIZE, FORMATS, detect_format, import_employees
+from organizations.models import Company
+
+
+class Command(BaseCommand):
+    help = "CSV / NDJSON 파일의 직원 목록을 회사에 추가하거나 갱신합니다 (사원번호 기준, 파일을 나눠 읽으며 청크 단위로 저장)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("company", help="사업자등록번호")
+        parser.add_argument("path", help="직원 목록 파일 경로 (- 이면 표준 입력)")
+        parser.add_argument("--format", choices=FORMATS, default=None, help="파일 형식 (기본: 확장자로 판단)")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="한 번에 검사/저장할 행 수")
+        parser.add_argument("--dry-run", action="store_true", help="검사와 추가/갱신 건수 계산만 하고 저장하지 않음")
+
+    def handle(self, *args, **options):
+        company_id = Company.objects.filter(biz_no=options["company"]).values_list("pk", flat=True).first()
+        if company_id is None:
+            raise CommandError(f"없는 회사입니다: {options['company']}")
+        path = options["path"]
+        file_format = options["format"] or detect_format(filename=path)
+        if file_format is None:
+            raise CommandError("파일 형식을 알 수 없습니다. --format csv 또는 --format ndjson을 지정하세요.")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size는 1 이상이어야 합니다.")
+
+        started = time.perf_counter()
+        if path == "-":
+            result = import_employees(company_id, sys.stdin.buffer, file_format, options["chunk_size"], options["dry_run"])
+        else:
+            try:
+                with open(path, "rb") as stream:
+                    result = import_employees(company_id, stream, file_format, options["chunk_size"], options["dry_run"])
+            except OSError as e:
+                raise CommandError(f"파일을 열 수 없습니다: {e}")
+        if "error" in result:
+            raise CommandError(result["error"])
+        elapsed = time.perf_counter() - started
+
+        for error in result["errors"]:
+            self.stderr.write(f"{error['line']}번째 줄 ({error['emp_no'] or '-'}): {error['errors']}")
+        if result["errors_truncated"]:
+            self.stderr.write(f"... 오류가 더 있습니다 (모두 {result['failed']}건)")
+        self.stdout.write(self.style.SUCCESS(
+            f"{'[dry-run] ' if options['dry_run'] else ''}{result['total']}행: 추가 {result['created']}, "
+            f"갱신 {result['updated']}, 실패 {result['failed']} "
+            f"({elapsed:.1f}초, 초당 {result['total'] / elapsed if elapsed else 0:.0f}행)"
+        ))
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:48
+
+from django.db import migrations, models
+
+
+def fill_empty_dept(apps, schema_editor):
+    # dept를 NOT NULL로 바꾸기 전에 기존 NULL 값을 빈 문자열로 채움
+    Employee = apps.get_model('organizations', 'Employee')
+    Employee.objects.filter(dept__isnull=True).update(dept='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='employee',
+            unique_together={('company', 'emp_no')},
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='phone',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.RunPython(fill_empty_dept, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='employee',
+            name='dept',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='emp_no',
+            field=models.CharField(max_length=20),
+        ),
+        migrations.RemoveField(
+            model_name='employee',
+            name='created_at',
+        ),
+        migrations.RemoveField(
+            model_name='employee',
+            name='position',
+        ),
+    ]
@@ -13,6 +13,11 @@ class Company(models.Model):
     password = models.CharField(max_length=128)  # 해싱된 비밀번호
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @property
+    def is_authenticated(self):
+        """JWT로 인증된 회사는 request.user로 쓰이므로, Django User처럼 인증 여부를 알려줌"""
+        return True
+
     def set_password(self, raw_password):
         """비밀번호를 해싱하여 저장"""
         self.password = make_password(raw_password)
@@ -0,0 +1,17 @@
+# organizations/parsers.py
+from rest_framework.parsers import BaseParser
+
+
+class EmployeeImportParser(BaseParser):
+    """
+    직원 대량 업로드 본문(CSV / NDJSON)을 읽지 않고 스트림 그대로 넘겨주는 파서
+    뷰가 organizations/employee_import.py로 조금씩 읽어서 처리하므로 파일 전체가 메모리에 올라가지 않음
+    """
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream
+
+
+class EmployeeImportNDJSONParser(EmployeeImportParser):
+    media_type = "application/x-ndjson"
@@ -1,3 +1,122 @@
+import io
+import json
+
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .employee_import import import_employees, iter_lines
+from .models import Company, Employee
+
+URL = "/api/organizations/employees/bulk/"
+
+
+class EmployeeBulkImportTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="test", biz_no="000-00-00000", password="password")
+        self.other = Company.objects.create(name="other", biz_no="111-11-11111", password="password")
+        Employee.objects.create(company=self.company, emp_no="E1", name="old", dept="old dept", phone="010")
+        Employee.objects.create(company=self.other, emp_no="E2", name="other tenant")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.company)
+
+    def test_csv_upserts_and_reports_row_errors(self):
+        body = (
+            "\ufeffemp_no,name,dept,email\n"
+            "E1,새이름,생산1팀,e1@example.com\n"
+            "E2,홍길동,,\n"
+            ",이름없음,,\n"
+            "E3,잘못된메일,,not-an-email\n"
+            "E4,\"쉼표, 포함\",품질팀,\n"
+        )
+        response = self.client.generic("POST", URL, body.encode(), content_type="text/csv")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {key: response.data[key] for key in ("total", "created", "updated", "failed")},
+            {"total": 5, "created": 2, "updated": 1, "failed": 2},
+        )
+        self.assertEqual([(error["line"], error["emp_no"]) for error in response.data["errors"]], [(4, None), (5, "E3")])
+        self.assertIn("email", response.data["errors"][1]["errors"])
+
+        employees = {e.emp_no: e for e in Employee.objects.filter(company=self.company)}
+        self.assertEqual(set(employees), {"E1", "E2", "E4"})
+        # 파일에 있는 컬럼만 갱신 (phone 컬럼이 없으므로 기존 값 유지)
+        self.assertEqual((employees["E1"].name, employees["E1"].dept, employees["E1"].phone), ("새이름", "생산1팀", "010"))
+        self.assertEqual(employees["E4"].name, "쉼표, 포함")
+        # 다른 회사의 같은 사원번호는 건드리지 않음
+        self.assertEqual(Employee.objects.get(company=self.other, emp_no="E2").name, "other tenant")
+
+    def test_ndjson_upload_and_multipart_file(self):
+        lines = [
+            json.dumps({"empNo": "N1", "name": "a", "phone": "010-1"}),
+            "",
+            "{broken",
+            json.dumps(["not", "object"]),
+            json.dumps({"empNo": "N1", "name": "last wins"}),
+        ]
+        response = self.client.generic("POST", URL, "\n".join(lines).encode(), content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 2))
+        self.assertEqual([error["line"] for error in response.data["errors"]], [3, 4])
+        self.assertEqual(Employee.objects.get(company=self.company, emp_no="N1").name, "last wins")
+
+        upload = SimpleUploadedFile("staff.csv", "사번,이름\nM1,김철수\n".encode(), content_type="text/csv")
+        response = self.client.post(URL, {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Employee.objects.filter(company=self.company, emp_no="M1", name="김철수").exists())
+
+    def test_rejects_unknown_format_and_missing_columns(self):
+        response = self.client.generic("POST", URL, b"[]", content_type="application/json")
+        self.assertEqual(response.status_code, 415)
+        response = self.client.generic("POST", URL, b"emp_no,dept\nE9,x\n", content_type="text/csv")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("name", response.data["error"])
+
+    def test_dry_run_does_not_write(self):
+        response = self.client.generic("POST", f"{URL}?dry_run=1", b"emp_no,name\nE1,x\nE5,y\n", content_type="text/csv")
+        self.assertEqual((response.data["created"], response.data["updated"]), (1, 1))
+        self.assertEqual(Employee.objects.get(company=self.company, emp_no="E1").name, "old")
+        self.assertFalse(Employee.objects.filter(emp_no="E5").exists())
+
+    def test_queries_grow_per_chunk_not_per_row(self):
+        body = "emp_no,name\n" + "".join(f"B{number},name {number}\n" for number in range(250))
+        # 청크(100행)마다 기존 사원번호 조회 + 저장(SAVEPOINT / INSERT / RELEASE) 4번, 끝에 직원 캐시 버전 올리기 3번
+        with self.assertNumQueries(3 * 4 + 3):
+            result = import_employees(self.company.id, io.BytesIO(body.encode()), "csv", chunk_size=100)
+        self.assertEqual((result["created"], result["failed"]), (250, 0))
+
+    def test_iter_lines_handles_split_multibyte_characters(self):
+        class Trickle(io.BytesIO):
+            def read(self, size=-1):
+                return super().read(3)
+
+        text = "가나다,라\n마바\n끝"
+        self.assertEqual("".join(iter_lines(Trickle(text.encode()))), text)
+
+
+class CompanyJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        self.company = Company(name="test", biz_no="000-00-00000")
+        self.company.set_password("password")
+        self.company.save()
+        self.client = APIClient()
+
+    def login(self) -> str:
+        response = self.client.post(
+            "/api/organizations/login/", {"biz_no": self.company.biz_no, "password": "password"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data["access"]
+
+    def test_token_resolves_to_company(self):
+        access = self.login()
+        response = self.client.get("/api/courses/courses/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, self.company)
+        self.assertTrue(response.wsgi_request.user.is_authenticated)
 
-# Create your tests here.
+    def test_token_for_deleted_company_is_rejected(self):
+        access = self.login()
+        self.company.delete()
+        response = self.client.get("/api/courses/courses/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertEqual(response.status_code, 401)
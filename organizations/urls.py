@@ -1,9 +1,10 @@
 # organizations/urls.py
 from django.urls import path
-from .views import CompanyTokenObtainPairView
+from .views import CompanyTokenObtainPairView, EmployeeBulkImportView
 from rest_framework_simplejwt.views import TokenRefreshView
 
 urlpatterns = [
     path("login/", CompanyTokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("employees/bulk/", EmployeeBulkImportView.as_view(), name="employee_bulk_import"),
 ]
@@ -1,6 +1,10 @@
 from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework import status
+from .employee_import import detect_format, import_employees
+from .parsers import EmployeeImportNDJSONParser, EmployeeImportParser
+from .permissions import IsCompanySession
 from .serializers import CompanyTokenObtainPairSerializer
 
 class CompanyTokenObtainPairView(APIView):
@@ -9,3 +13,31 @@ class CompanyTokenObtainPairView(APIView):
         if serializer.is_valid():
             return Response(serializer.validated_data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_401_UNAUTHORIZED)
+
+
+class EmployeeBulkImportView(APIView):
+    """
+    로그인한 회사(JWT)의 직원 대량 업로드 (사원번호 기준으로 없으면 추가, 있으면 갱신)
+    - 본문 그대로: Content-Type text/csv 또는 application/x-ndjson
+    - multipart/form-data: file 필드에 .csv / .ndjson(.jsonl) 파일
+    ?dry_run=1이면 검사 결과와 추가/갱신 건수만 반환하고 저장하지 않음
+    """
+    permission_classes = [IsCompanySession]
+    parser_classes = [EmployeeImportParser, EmployeeImportNDJSONParser, MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get("file")
+        if upload is not None:
+            stream, file_format = upload, detect_format(filename=upload.name)
+        else:
+            stream, file_format = request.data, detect_format(content_type=request.content_type)
+        if not hasattr(stream, "read"):
+            return Response({"error": "업로드할 직원 목록이 없습니다."}, status=status.HTTP_400_BAD_REQUEST)
+        if file_format is None:
+            return Response({"error": "CSV 또는 NDJSON 파일만 업로드할 수 있습니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = request.query_params.get("dry_run", "").lower() in ("1", "true")
+        result = import_employees(request.user.id, stream, file_format, dry_run=dry_run)
+        if "error" in result:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_200_OK)